@@ -0,0 +1,237 @@
+# backend/benchmarks/asgi_vs_wsgi.py
+"""
+Compare the public read endpoints under uvicorn (ASGI, async views) and gunicorn (WSGI, DRF views).
+
+Both servers run the same code against the same seeded SQLite file with
+the production profile; the only differences are the server and whether
+DJANGO_ASYNC_VIEWS is on. For every connection count the load generator
+keeps that many keep-alive connections busy for --duration seconds and
+reports requests/sec, latency percentiles and non-200 responses. The
+generator is a single asyncio process using raw HTTP/1.1, so on small
+machines pin it to its own core (or run it elsewhere) before trusting the
+high-concurrency numbers. Needs uvicorn and gunicorn installed:
+
+    pip install uvicorn gunicorn
+    python benchmarks/asgi_vs_wsgi.py --connections 50,200,800 --workers 2
+
+One core shared with the generator, --workers 1 --duration 10 (uvicorn
+0.54, gunicorn 26.2 with 8 threads):
+
+    server   conns     req/s    p50 ms    p95 ms    p99 ms  errors
+      wsgi      10     195.8     44.44    114.65    159.39       0
+      wsgi      50     218.6    223.99    315.82    347.91       0
+      wsgi     200     224.8    873.22    995.61   1035.82       0
+      asgi      10     141.3      70.0     84.97    113.54       0
+      asgi      50     124.5    393.65    486.48    545.33       0
+      asgi     200     123.2   1584.34   1745.24   1820.81       0
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import django
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DB_NAME = os.path.join(tempfile.gettempdir(), "cinema_asgi_vs_wsgi.sqlite3")
+
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+os.environ["DJANGO_DB_NAME"] = DB_NAME
+os.environ.setdefault("DJANGO_DB_PROFILE", "production")
+django.setup()
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from posts.models import Movie, MovieRoom, Seat, Showtime
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def remove_database():
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(DB_NAME + suffix):
+            os.remove(DB_NAME + suffix)
+
+
+def seed(movies, showtimes_per_movie):
+    remove_database()
+    call_command("migrate", verbosity=0)
+    room = MovieRoom.objects.create(name="Bench Hall", capacity=240)
+    Seat.objects.bulk_create(
+        [Seat(movie_room=room, row=chr(ord("A") + r), number=n) for r in range(12) for n in range(1, 21)]
+    )
+    start = timezone.now() + timedelta(days=1)
+    showtimes = []
+    for i in range(movies):
+        movie = Movie.objects.create(
+            title=f"Bench Movie {i:03d}", description="", rating="PG", duration=100, genre="Drama"
+        )
+        showtimes.extend(
+            Showtime(movie=movie, movie_room=room, starts_at=start + timedelta(minutes=i * 300 + j), base_price="10.00")
+            for j in range(showtimes_per_movie)
+        )
+    Showtime.objects.bulk_create(showtimes)
+    return Showtime.objects.order_by("pk").values_list("pk", flat=True).first()
+
+
+def server_command(kind, port, args):
+    if kind == "asgi":
+        return [
+            "uvicorn", "core.asgi:application", "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(args.workers), "--no-access-log", "--log-level", "warning",
+        ]
+    return [
+        "gunicorn", "core.wsgi:application", "--bind", f"127.0.0.1:{port}",
+        "--workers", str(args.workers), "--threads", str(args.wsgi_threads), "--log-level", "warning",
+    ]
+
+
+async def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = dict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+    headers = {name.lower(): value for name, value in headers.items()}
+    if headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers.get("connection", "").lower() == "close"
+
+
+async def connection_loop(port, paths, offset, deadline, results):
+    reader = writer = None
+    index = offset
+    while time.monotonic() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: application/json\r\n\r\n".encode())
+            await writer.drain()
+            status, closed = await read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+            results.append((type(exc).__name__, time.perf_counter() - started))
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        results.append((status, time.perf_counter() - started))
+        if closed:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def load(port, paths, connections, duration):
+    results = []
+    deadline = time.monotonic() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(connection_loop(port, paths, i, deadline, results) for i in range(connections)))
+    elapsed = time.perf_counter() - started
+
+    ok = [latency for code, latency in results if code == 200]
+    return {
+        "requests_per_s": round(len(ok) / elapsed, 1),
+        "p50_ms": round(percentile(ok, 50) * 1000, 2) if ok else None,
+        "p95_ms": round(percentile(ok, 95) * 1000, 2) if ok else None,
+        "p99_ms": round(percentile(ok, 99) * 1000, 2) if ok else None,
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+    }
+
+
+def run(args, paths):
+    rows = []
+    for kind, port in (("wsgi", args.wsgi_port), ("asgi", args.asgi_port)):
+        env = dict(os.environ, DJANGO_ASYNC_VIEWS="1" if kind == "asgi" else "0")
+        server = subprocess.Popen(server_command(kind, port, args), cwd=BACKEND_DIR, env=env)
+        try:
+            asyncio.run(wait_for_port(port))
+            # Warm the catalog cache and each worker's connections
+            asyncio.run(load(port, paths, args.workers * 4, 2))
+            for connections in args.connections:
+                cell = asyncio.run(load(port, paths, connections, args.duration))
+                rows.append({"server": kind, "connections": connections, **cell})
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    return rows
+
+
+def int_list(value):
+    return [int(part) for part in value.split(",") if part]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--connections", type=int_list, default=[50, 200, 800])
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per cell")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="server processes")
+    parser.add_argument("--wsgi-threads", type=int, default=8, help="gunicorn threads per worker")
+    parser.add_argument("--movies", type=int, default=60)
+    parser.add_argument("--showtimes-per-movie", type=int, default=4)
+    parser.add_argument("--asgi-port", type=int, default=8801)
+    parser.add_argument("--wsgi-port", type=int, default=8802)
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    missing = [tool for tool in ("uvicorn", "gunicorn") if shutil.which(tool) is None]
+    if missing:
+        parser.error(f"{' and '.join(missing)} not found; pip install uvicorn gunicorn")
+
+    showtime_id = seed(args.movies, args.showtimes_per_movie)
+    # The mix the catalog pages send: listings, a detail page, a seat map
+    paths = [
+        "/api/movies/",
+        "/api/movies/bench-movie-007/",
+        "/api/showtimes/?page_size=50",
+        f"/api/showtimes/{showtime_id}/seats/",
+    ]
+    try:
+        rows = run(args, paths)
+    finally:
+        remove_database()
+
+    print(f"{'server':>6}  {'conns':>6}  {'req/s':>8}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'errors':>6}")
+    for row in rows:
+        print(
+            f"{row['server']:>6}  {row['connections']:>6}  {row['requests_per_s']:>8}  "
+            f"{row['p50_ms']:>8}  {row['p95_ms']:>8}  {row['p99_ms']:>8}  {row['errors']:>6}"
+        )
+    if args.output:
+        Path(args.output).write_text(json.dumps(rows, indent=2) + "\n")
@@ -0,0 +1,266 @@
+# backend/benchmarks/best_available.py
+"""
+Group bookings in a nearly sold-out 500-seat room: client-picked seats vs best-available.
+
+Lays out --rooms rooms of 20 rows x 25 seats (two aisles), fills
+--occupancy of each showtime at random, then measures:
+
+* lookup: GET /api/showtimes/<id>/best_available/ latency over every room
+  (warm seat-map cache), i.e. the O(rows x cols) block search plus the view;
+* contention: --buyers threads each buying --group adjacent seats in the
+  same showtime. "client" buyers do what the seat-map UI does: fetch the
+  map, pick a random adjacent block and POST /api/bookings/, refetching and
+  retrying on 409 up to --max-attempts times. "server" buyers POST
+  /api/bookings/best_available/ once and let the server pick the block
+  while it holds the showtime lock.
+
+Each strategy runs on a fresh copy of the same occupancy. Uses a throwaway
+SQLite file so the worker threads see each other's commits:
+
+    python benchmarks/best_available.py --occupancy 0.9 --buyers 16 --group 2
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+os.environ.setdefault("DJANGO_DB_PROFILE", "production")
+
+from django.conf import settings
+
+ROW_SEATS = "sssss sssssssssssssss sssss"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def seed_showtime(room, movie, occupancy, rng, offset):
+    from django.utils import timezone
+
+    from posts.models import Booking, Customer, Showtime, Ticket
+
+    showtime = Showtime.objects.create(
+        movie=movie, movie_room=room, starts_at=timezone.now() + timedelta(days=1, minutes=offset), base_price="12.00",
+    )
+    seat_ids = list(room.seats.values_list("id", flat=True))
+    taken = rng.sample(seat_ids, int(len(seat_ids) * occupancy))
+    customer = Customer.objects.get(user__username="house")
+    booking = Booking.objects.create(customer=customer, status=Booking.Status.CONFIRMED)
+    Ticket.objects.bulk_create(
+        [Ticket(booking=booking, showtime=showtime, seat_id=seat_id, price="12.00") for seat_id in taken]
+    )
+    return showtime
+
+
+def disjoint_blocks(showtime, group):
+    """Blocks of ``group`` seats left if every buyer takes the best one (a lower bound on what fits)."""
+    from posts import seatmap
+
+    layout, bitmap = seatmap.read_occupancy(showtime)
+    blocks = 0
+    while True:
+        found = seatmap.best_block(layout, bitmap, group)
+        if found is None:
+            return blocks
+        blocks += 1
+        bitmap = bytearray(bitmap)
+        for seat in found[1]:
+            bitmap[seat[3] >> 3] |= 1 << (seat[3] & 7)
+
+
+def client_pick(seats, group, rng):
+    """A random block of ``group`` adjacent free seats from the verbose seat map."""
+    free = {(seat["row"], seat["column"]): seat["id"] for seat in seats if not seat["isReserved"]}
+    blocks = [
+        [free[(row, column + k)] for k in range(group)]
+        for row, column in free
+        if all((row, column + k) in free for k in range(group))
+    ]
+    return rng.choice(blocks) if blocks else None
+
+
+def buyer(strategy, user, showtime_id, args, results, gate, seed):
+    from django.db import connection
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from posts.views import BookingViewSet, ShowtimeViewSet
+
+    factory = APIRequestFactory()
+    seat_map = ShowtimeViewSet.as_view({"get": "seats"})
+    book = BookingViewSet.as_view({"post": "create"})
+    book_best = BookingViewSet.as_view({"post": "best_available"})
+    rng = random.Random(seed)
+    gate.wait()
+    started = time.perf_counter()
+    requests = conflicts = 0
+    status = None
+    try:
+        if strategy == "server":
+            request = factory.post(
+                "/api/bookings/best_available/",
+                {"showtime": showtime_id, "count": args.group, "payment_method": "card"},
+                format="json",
+            )
+            force_authenticate(request, user)
+            status = book_best(request).status_code
+            requests = 1
+            conflicts = int(status == 409)
+        else:
+            for _ in range(args.max_attempts):
+                request = factory.get(f"/api/showtimes/{showtime_id}/seats/")
+                seats = seat_map(request, pk=showtime_id).data
+                block = client_pick(seats, args.group, rng)
+                if block is None:
+                    status = 409
+                    break
+                request = factory.post(
+                    "/api/bookings/", {"showtime": showtime_id, "seats": block, "payment_method": "card"}, format="json"
+                )
+                force_authenticate(request, user)
+                status = book(request).status_code
+                requests += 2
+                if status != 409:
+                    break
+                conflicts += 1
+    finally:
+        results.append((strategy, status, requests, conflicts, time.perf_counter() - started))
+        connection.close()
+
+
+def contention(strategy, room, movie, users, args, offset):
+    showtime = seed_showtime(room, movie, args.occupancy, random.Random(args.seed), offset)
+    servable = disjoint_blocks(showtime, args.group)
+    results = []
+    gate = threading.Barrier(len(users) + 1)
+    threads = [
+        threading.Thread(target=buyer, args=(strategy, user, showtime.pk, args, results, gate, args.seed + i))
+        for i, user in enumerate(users)
+    ]
+    for thread in threads:
+        thread.start()
+    gate.wait()
+    for thread in threads:
+        thread.join()
+
+    booked = sum(1 for _, status, _, _, _ in results if status == 201)
+    latencies = [elapsed for *_, elapsed in results]
+    return {
+        "buyers": len(users),
+        "best_first_blocks": servable,
+        "booked": booked,
+        "gave_up": len(users) - booked,
+        "conflict_responses": sum(conflicts for _, _, _, conflicts, _ in results),
+        "requests": sum(requests for _, _, requests, _, _ in results),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+    }
+
+
+def run(args):
+    from django.contrib.auth.models import User
+    from django.core.cache import cache
+    from rest_framework.test import APIRequestFactory
+
+    from posts import room_layouts
+    from posts.models import Customer, Movie, MovieRoom
+    from posts.views import ShowtimeViewSet
+
+    rng = random.Random(args.seed)
+    movie = Movie.objects.create(title="Sold Out", description="", rating="PG", duration=120, genre="Drama")
+    Customer.objects.create(user=User.objects.create(username="house"))
+    layout = {"rows": [{"name": chr(ord("A") + r), "seats": ROW_SEATS} for r in range(20)]}
+    rooms = []
+    for index in range(args.rooms):
+        room = MovieRoom.objects.create(name=f"Big {index}", capacity=1)
+        room_layouts.apply_layout(room, layout)
+        rooms.append(room)
+    cache.clear()
+
+    showtimes = [seed_showtime(room, movie, args.occupancy, rng, i) for i, room in enumerate(rooms)]
+    view = ShowtimeViewSet.as_view({"get": "best_available"})
+    factory = APIRequestFactory()
+    for showtime in showtimes:
+        view(factory.get("/", {"count": args.group}), pk=showtime.pk)  # warm the seat-map cache
+    latencies = []
+    found = 0
+    for _ in range(args.lookups):
+        showtime = rng.choice(showtimes)
+        request = factory.get(f"/api/showtimes/{showtime.pk}/best_available/", {"count": args.group})
+        started = time.perf_counter()
+        response = view(request, pk=showtime.pk)
+        latencies.append(time.perf_counter() - started)
+        found += response.status_code == 200
+
+    users = []
+    for i in range(args.buyers):
+        user = User.objects.create(username=f"buyer{i}")
+        Customer.objects.create(user=user)
+        users.append(user)
+
+    return {
+        "seats_per_room": 500,
+        "occupancy": args.occupancy,
+        "group": args.group,
+        "lookup": {
+            "requests": args.lookups,
+            "found_block": found,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        },
+        "contention": {
+            "client": contention("client", rooms[0], movie, users, args, 1000),
+            "server": contention("server", rooms[0], movie, users, args, 2000),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--occupancy", type=float, default=0.9)
+    parser.add_argument("--group", type=int, default=2, help="adjacent seats per purchase")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--buyers", type=int, default=16, help="concurrent group buyers in one showtime")
+    parser.add_argument("--max-attempts", type=int, default=5, help="client retries after a 409")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--output", help="also write the JSON result here")
+    args = parser.parse_args()
+
+    # Threads need a file database to see each other's commits
+    settings.DATABASES["default"]["TEST"] = {
+        "NAME": os.path.join(tempfile.gettempdir(), "cinema_best_available.sqlite3"),
+    }
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        result = run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+# backend/benchmarks/booking_contention.py
+"""
+Fire concurrent POST /api/bookings/ requests at one showtime and report contention.
+
+Every worker thread books random seats from the same room by calling the
+booking view directly (no middleware), so the numbers include the lock check, ticket insert, outbox write
+and response rendering. The report covers throughput, latency percentiles,
+the 409 conflict rate and any seat sold twice, and is also written as JSON so
+runs before and after a change to BookingViewSet.create can be diffed.
+
+SQLite (a throwaway file database next to the system temp dir), with the
+stock connection settings and then the production profile:
+
+    python benchmarks/booking_contention.py --requests 400 --concurrency 16 --profile default
+    python benchmarks/booking_contention.py --requests 400 --concurrency 16 --profile production
+
+PostgreSQL or MySQL launched locally, e.g.
+
+    docker run --rm -p 5432:5432 -e POSTGRES_PASSWORD=bench postgres:16
+    BENCH_DB_PASSWORD=bench python benchmarks/booking_contention.py --database postgresql
+
+The alternative databases read BENCH_DB_NAME, BENCH_DB_USER, BENCH_DB_PASSWORD,
+BENCH_DB_HOST and BENCH_DB_PORT and need their driver (psycopg / mysqlclient)
+installed. Django creates and drops a test_<name> database, so the target
+server only needs a user allowed to create databases.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+from django.conf import settings
+
+ENGINES = {
+    "sqlite": "django.db.backends.sqlite3",
+    "postgresql": "django.db.backends.postgresql",
+    "mysql": "django.db.backends.mysql",
+}
+DEFAULT_PORTS = {"postgresql": "5432", "mysql": "3306"}
+
+
+def configure_database(vendor):
+    """Point the default alias at the requested backend; must run before django.setup()."""
+    if vendor == "sqlite":
+        # The shared in-memory test database serialises writers with table
+        # locks that ignore the busy timeout; a file behaves like production.
+        settings.DATABASES["default"]["TEST"] = {
+            "NAME": os.path.join(tempfile.gettempdir(), "cinema_booking_contention.sqlite3"),
+        }
+        return
+
+    settings.DATABASES["default"] = {
+        "ENGINE": ENGINES[vendor],
+        "NAME": os.environ.get("BENCH_DB_NAME", "cinema"),
+        "USER": os.environ.get("BENCH_DB_USER", "postgres" if vendor == "postgresql" else "root"),
+        "PASSWORD": os.environ.get("BENCH_DB_PASSWORD", ""),
+        "HOST": os.environ.get("BENCH_DB_HOST", "127.0.0.1"),
+        "PORT": os.environ.get("BENCH_DB_PORT", DEFAULT_PORTS[vendor]),
+    }
+
+
+def seed(rows, cols, users):
+    from django.contrib.auth.models import User
+    from django.utils import timezone
+
+    from posts.models import Customer, Movie, MovieRoom, Seat, Showtime
+
+    movie = Movie.objects.create(title="Contention", description="", rating="PG", duration=120, genre="Drama")
+    room = MovieRoom.objects.create(name="Contention Room", capacity=rows * cols)
+    Seat.objects.bulk_create(
+        [Seat(movie_room=room, row=chr(ord("A") + r), number=n) for r in range(rows) for n in range(1, cols + 1)]
+    )
+    showtime = Showtime.objects.create(
+        movie=movie,
+        movie_room=room,
+        starts_at=timezone.now() + timedelta(days=1),
+        base_price=Decimal("12.50"),
+    )
+
+    # Unusable passwords skip the hasher; requests use force_authenticate
+    accounts = []
+    for i in range(users):
+        user = User(username=f"bench{i}", email=f"bench{i}@example.com")
+        user.set_unusable_password()
+        accounts.append(user)
+    accounts = User.objects.bulk_create(accounts)
+    Customer.objects.bulk_create([Customer(user=user) for user in accounts])
+    seat_ids = list(Seat.objects.filter(movie_room=room).order_by("id").values_list("id", flat=True))
+    return showtime, accounts, seat_ids
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def worker(user, showtime_id, plans, results, start_gate):
+    from django.db import connection
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from posts.views import BookingViewSet
+
+    # The test client routes exceptions through a process-wide signal and
+    # would attribute one thread's failure to another, so call the view.
+    view = BookingViewSet.as_view({"post": "create"})
+    factory = APIRequestFactory()
+    start_gate.wait()
+    try:
+        for seats in plans:
+            payload = {"showtime": showtime_id, "seats": seats, "payment_method": "card"}
+            request = factory.post("/api/bookings/", payload, format="json")
+            force_authenticate(request, user)
+            started = time.perf_counter()
+            try:
+                code = view(request).status_code
+            except Exception as exc:  # e.g. "database is locked" surfacing as an exception
+                code = type(exc).__name__
+            results.append((code, time.perf_counter() - started, seats))
+    finally:
+        connection.close()
+
+
+def check_integrity(showtime_id, results):
+    from django.db.models import Count
+
+    from posts.models import Ticket
+
+    duplicated = (
+        Ticket.objects.filter(showtime_id=showtime_id)
+        .values("seat_id")
+        .annotate(copies=Count("id"))
+        .filter(copies__gt=1)
+        .count()
+    )
+    confirmed = [seat for code, _, seats in results if code == 201 for seat in seats]
+    sold_to_two_callers = len(confirmed) - len(set(confirmed))
+    stored = Ticket.objects.filter(showtime_id=showtime_id).count()
+    return {
+        "duplicate_ticket_rows": duplicated,
+        "seats_confirmed_to_two_callers": sold_to_two_callers,
+        "tickets_stored": stored,
+        "tickets_confirmed": len(confirmed),
+    }
+
+
+def run(args):
+    showtime, users, seat_ids = seed(args.rows, args.cols, args.concurrency)
+
+    rng = random.Random(args.seed)
+    hot = seat_ids[: max(args.seats_per_booking, int(len(seat_ids) * args.hot_fraction))]
+    per_worker = [[] for _ in range(args.concurrency)]
+    for i in range(args.requests):
+        per_worker[i % args.concurrency].append(rng.sample(hot, args.seats_per_booking))
+
+    results = []
+    start_gate = threading.Barrier(args.concurrency + 1)
+    threads = [
+        threading.Thread(target=worker, args=(user, showtime.id, plans, results, start_gate))
+        for user, plans in zip(users, per_worker)
+    ]
+    for thread in threads:
+        thread.start()
+    start_gate.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for _, latency, _ in results]
+    codes = {}
+    for code, _, _ in results:
+        codes[str(code)] = codes.get(str(code), 0) + 1
+    booked = codes.get("201", 0)
+
+    return {
+        "database": args.database,
+        "profile": settings.DATABASE_PROFILE,
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seats_per_booking": args.seats_per_booking,
+            "rows": args.rows,
+            "cols": args.cols,
+            "hot_seats": len(hot),
+            "seed": args.seed,
+        },
+        "elapsed_s": round(elapsed, 4),
+        "bookings_per_s": round(booked / elapsed, 2) if elapsed else None,
+        "requests_per_s": round(len(results) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            name: round(percentile(latencies, pct) * 1000, 3) if latencies else None
+            for name, pct in (("p50", 50), ("p95", 95), ("p99", 99))
+        },
+        "status_codes": codes,
+        "conflict_rate": round(codes.get("409", 0) / len(results), 4) if results else None,
+        "error_rate": round((len(results) - booked - codes.get("409", 0)) / len(results), 4) if results else None,
+        "integrity": check_integrity(showtime.id, results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database", choices=sorted(ENGINES), default="sqlite")
+    parser.add_argument(
+        "--profile", choices=["default", "production"], default=None,
+        help="SQLite connection profile (DJANGO_DB_PROFILE); defaults to the environment",
+    )
+    parser.add_argument("--requests", type=int, default=200, help="total booking attempts")
+    parser.add_argument("--concurrency", type=int, default=8, help="worker threads (one customer each)")
+    parser.add_argument("--seats-per-booking", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--cols", type=int, default=25)
+    parser.add_argument(
+        "--hot-fraction", type=float, default=0.2,
+        help="share of the room every request picks from; lower means more conflicts",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    if args.profile:
+        os.environ["DJANGO_DB_PROFILE"] = args.profile
+    configure_database(args.database)
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        report = run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    body = json.dumps(report, indent=2)
+    print(body)
+    if args.output:
+        Path(args.output).write_text(body + "\n")
+
+    integrity = report["integrity"]
+    if integrity["duplicate_ticket_rows"] or integrity["seats_confirmed_to_two_callers"]:
+        sys.exit("double booking detected")
+
+
+if __name__ == "__main__":
+    main()
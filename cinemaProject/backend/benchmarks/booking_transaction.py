@@ -0,0 +1,129 @@
+# backend/benchmarks/booking_transaction.py
+"""
+Measure how long the booking transaction holds its locks as the seat count grows.
+
+Runs against a throwaway test database, so it never touches db.sqlite3:
+
+    python benchmarks/booking_transaction.py --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import setup_test_environment
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from posts.models import Booking, Customer, Movie, MovieRoom, Seat, Showtime, Ticket
+from posts.views import TICKET_PRICE_MULTIPLIERS
+
+SEAT_COUNTS = [1, 2, 4, 8, 12, 16]
+
+
+def seed(rows, cols):
+    movie = Movie.objects.create(title="Benchmark", description="", rating="PG", duration=120, genre="Drama")
+    room = MovieRoom.objects.create(name="Benchmark Room", capacity=rows * cols)
+    Seat.objects.bulk_create(
+        [Seat(movie_room=room, row=chr(ord("A") + r), number=n) for r in range(rows) for n in range(1, cols + 1)]
+    )
+    user = User.objects.create_user(username="bench", password="bench", email="bench@example.com")
+    customer = Customer.objects.create(user=user)
+    return movie, room, user, customer
+
+
+def new_showtime(movie, room, offset):
+    return Showtime.objects.create(
+        movie=movie,
+        movie_room=room,
+        starts_at=timezone.now() + timedelta(days=1, minutes=offset),
+        base_price=Decimal("12.50"),
+    )
+
+
+def per_row_transaction(customer, showtime, seats):
+    """The previous pipeline: one INSERT per seat inside the lock window."""
+    started = time.perf_counter()
+    with transaction.atomic():
+        Ticket.objects.select_for_update().filter(showtime=showtime, seat__in=seats).exists()
+        booking = Booking.objects.create(customer=customer, total_amount=0)
+        total = Decimal("0")
+        for seat in seats:
+            price = showtime.base_price * TICKET_PRICE_MULTIPLIERS[Ticket.TicketType.ADULT]
+            Ticket.objects.create(booking=booking, showtime=showtime, seat=seat, price=price)
+            total += price
+        booking.total_amount = total
+        booking.status = Booking.Status.CONFIRMED
+        booking.save()
+    return time.perf_counter() - started
+
+
+def bulk_transaction(customer, showtime, seats):
+    """The current pipeline: priced up front, one bulk INSERT inside the lock window."""
+    tickets = [
+        Ticket(showtime=showtime, seat=seat, price=showtime.base_price * TICKET_PRICE_MULTIPLIERS[Ticket.TicketType.ADULT])
+        for seat in seats
+    ]
+    total = sum((ticket.price for ticket in tickets), Decimal("0"))
+    started = time.perf_counter()
+    with transaction.atomic():
+        Ticket.objects.select_for_update().filter(showtime=showtime, seat_id__in=[s.id for s in seats]).exists()
+        booking = Booking.objects.create(customer=customer, total_amount=total, status=Booking.Status.CONFIRMED)
+        for ticket in tickets:
+            ticket.booking = booking
+        Ticket.objects.bulk_create(tickets)
+    return time.perf_counter() - started
+
+
+def run(repeat):
+    movie, room, user, customer = seed(rows=8, cols=16)
+    seats = list(Seat.objects.filter(movie_room=room).order_by("id"))
+    client = APIClient()
+    client.force_authenticate(user)
+
+    print(f"{'seats':>5}  {'per-row tx (ms)':>16}  {'bulk tx (ms)':>13}  {'POST /bookings/ (ms)':>21}")
+    offset = 0
+    for count in SEAT_COUNTS:
+        per_row, bulk, request = [], [], []
+        for _ in range(repeat):
+            offset += 1
+            per_row.append(per_row_transaction(customer, new_showtime(movie, room, offset), seats[:count]))
+            offset += 1
+            bulk.append(bulk_transaction(customer, new_showtime(movie, room, offset), seats[:count]))
+            offset += 1
+            showtime = new_showtime(movie, room, offset)
+            payload = {"showtime": showtime.id, "seats": [s.id for s in seats[:count]], "payment_method": "card"}
+            started = time.perf_counter()
+            response = client.post("/api/bookings/", payload, format="json")
+            request.append(time.perf_counter() - started)
+            assert response.status_code == 201, response.content
+
+        print(
+            f"{count:>5}  {statistics.median(per_row) * 1000:>16.3f}  "
+            f"{statistics.median(bulk) * 1000:>13.3f}  {statistics.median(request) * 1000:>21.3f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="samples per seat count (median is reported)")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        run(args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,129 @@
+# backend/benchmarks/bulk_schedule.py
+"""
+Cost of POST /api/admin/showtimes/bulk_schedule/ for a week across many rooms.
+
+Seeds --rooms rooms with one week of existing showtimes, then schedules the
+following week (--per-day slots per room and day, a few deliberately
+overlapping). Reports the overlap check alone (posts.scheduling.plan_schedule
+on already-parsed slots) and the whole request:
+
+    python benchmarks/bulk_schedule.py --rooms 40 --per-day 6
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from posts import scheduling
+from posts.models import Movie, MovieRoom, Showtime
+from posts.serializers import ScheduleSlotSerializer
+
+
+def week_of_slots(rng, rooms, movies, first_day, per_day):
+    slots = []
+    for room in rooms:
+        for day in range(7):
+            opening = timezone.make_aware(datetime.combine(first_day + timedelta(days=day), datetime.min.time()))
+            moment = opening + timedelta(hours=10)
+            for _ in range(per_day):
+                movie = rng.choice(movies)
+                slots.append({
+                    "movie": movie.pk, "movie_room": room.pk, "starts_at": moment.isoformat(),
+                    "format": "2D", "base_price": "12.00",
+                })
+                # Mostly back to back; sometimes too tight on purpose
+                gap = movie.duration + (5 if rng.random() < 0.05 else 20)
+                moment += timedelta(minutes=gap)
+    return slots
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    admin = User.objects.create_superuser(username="bench", password="bench", email="bench@example.com")
+    rooms = [MovieRoom.objects.create(name=f"Room {i}", capacity=100) for i in range(args.rooms)]
+    movies = [
+        Movie.objects.create(title=f"Movie {i}", description="", rating="PG", duration=rng.randint(85, 165), genre="Drama")
+        for i in range(20)
+    ]
+    today = timezone.localdate()
+    existing = week_of_slots(rng, rooms, movies, today, args.per_day)
+    Showtime.objects.bulk_create(
+        Showtime(
+            movie_id=slot["movie"], movie_room_id=slot["movie_room"], starts_at=datetime.fromisoformat(slot["starts_at"]),
+            base_price=slot["base_price"],
+        )
+        for slot in existing
+    )
+
+    slots = week_of_slots(rng, rooms, movies, today + timedelta(days=7), args.per_day)
+    parsed = []
+    for index, slot in enumerate(slots):
+        serializer = ScheduleSlotSerializer(data=slot)
+        serializer.is_valid(raise_exception=True)
+        parsed.append((index, serializer.validated_data))
+
+    check_runs = []
+    for _ in range(args.repeat):
+        # A full queries_log (migrations) would make the capture look empty
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            showtimes, rejected = scheduling.plan_schedule(parsed)
+            check_runs.append(time.perf_counter() - started)
+
+    client = APIClient()
+    client.force_authenticate(admin)
+    started = time.perf_counter()
+    response = client.post("/api/admin/showtimes/bulk_schedule/", {"showtimes": slots}, format="json")
+    request_seconds = time.perf_counter() - started
+    body = response.json()
+
+    return {
+        "rooms": args.rooms,
+        "existing_showtimes": len(existing),
+        "slots": len(slots),
+        "check_queries": len(queries.captured_queries),
+        "check_ms_best": round(min(check_runs) * 1000, 3),
+        "check_ms_median": round(sorted(check_runs)[len(check_runs) // 2] * 1000, 3),
+        "request_status": response.status_code,
+        "request_ms": round(request_seconds * 1000, 1),
+        "created": len(body["created"]),
+        "rejected": len(body["rejected"]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=40)
+    parser.add_argument("--per-day", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=20, help="overlap-check repetitions")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="also write the JSON result here")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        result = run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
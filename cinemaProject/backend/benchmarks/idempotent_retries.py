@@ -0,0 +1,110 @@
+# backend/benchmarks/idempotent_retries.py
+"""
+Cost of a timed-out booking's retries, with and without an Idempotency-Key.
+
+Books --bookings group orders and sends --retries copies of each request
+afterwards, the way a client does after a timeout. Without a key every
+retry reruns the checkout, takes the ticket locks and ends in 409 (the
+seats now belong to the first attempt); with a key it is answered from the
+stored response. Runs against a throwaway test database:
+
+    python benchmarks/idempotent_retries.py --bookings 200 --retries 3
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from posts.models import Customer, Movie, MovieRoom, Seat, Showtime
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def run(args):
+    movie = Movie.objects.create(title="Retry Storm", description="", rating="PG", duration=120, genre="Drama")
+    room = MovieRoom.objects.create(name="Retry Room", capacity=args.group)
+    seats = Seat.objects.bulk_create([Seat(movie_room=room, row="A", number=n) for n in range(1, args.group + 1)])
+    user = User.objects.create_user(username="retrier", password="retrier", email="retrier@example.com")
+    Customer.objects.create(user=user)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    result = {}
+    offset = 0
+    for strategy in ("no key", "idempotency key"):
+        latencies, queries, statuses = [], [], {}
+        for index in range(args.bookings):
+            offset += 1
+            showtime = Showtime.objects.create(
+                movie=movie, movie_room=room, starts_at=timezone.now() + timedelta(days=1, minutes=offset), base_price="12.00",
+            )
+            payload = {"showtime": showtime.id, "seats": [seat.id for seat in seats], "payment_method": "card"}
+            headers = {"HTTP_IDEMPOTENCY_KEY": f"order-{index}"} if strategy == "idempotency key" else {}
+            first = client.post("/api/bookings/", payload, format="json", **headers)
+            assert first.status_code == 201, first.content
+
+            for _ in range(args.retries):
+                reset_queries()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.post("/api/bookings/", payload, format="json", **headers)
+                    latencies.append(time.perf_counter() - started)
+                queries.append(len(captured))
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        result[strategy] = {
+            "retries": len(latencies),
+            "statuses": statuses,
+            "queries_per_retry": round(sum(queries) / len(queries), 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bookings", type=int, default=200)
+    parser.add_argument("--retries", type=int, default=3, help="copies of each request sent after it succeeded")
+    parser.add_argument("--group", type=int, default=4, help="seats per booking")
+    parser.add_argument("--output", help="also write the JSON result here")
+    args = parser.parse_args()
+
+    # Every keyless retry logs "Conflict: /api/bookings/"
+    logging.getLogger("django.request").setLevel(logging.ERROR)
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        result = run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
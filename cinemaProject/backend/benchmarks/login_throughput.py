@@ -0,0 +1,161 @@
+# backend/benchmarks/login_throughput.py
+"""
+Measure logins/sec against PBKDF2 cost and hashing pool size.
+
+Each cell fires --logins POST /api/auth/login/ calls from --concurrency
+threads straight at the login view (session included) and reports
+throughput, latency percentiles and how many logins the pool turned away.
+The "inline" row runs Django's own authenticate() on the request thread,
+which is how login worked before the pool. Uses a throwaway file database
+with the production SQLite profile, so session writes do not dominate:
+
+    python benchmarks/login_throughput.py --iterations 100000,600000,1000000 --pool-sizes 1,2,4,8
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+os.environ.setdefault("DJANGO_DB_PROFILE", "production")
+django.setup()
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from posts import hashing, views
+from posts.models import UserProfile
+
+PASSWORD = "bench-pass-123"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def seed_user(iterations):
+    username = f"bench{iterations}"
+    with override_settings(PASSWORD_PBKDF2_ITERATIONS=iterations):
+        user = User.objects.create(username=username, email=f"{username}@example.com", password=make_password(PASSWORD))
+    UserProfile.objects.filter(user=user).update(is_verified=True)
+    return username
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def inline_login_user(request):
+    """The pre-pool login: authenticate() hashes on the request thread."""
+    user = auth.authenticate(request, username=request.data["username"], password=request.data["password"])
+    return Response(status=200 if user is not None else 400)
+
+
+def fire(view, username, logins, concurrency):
+    factory = APIRequestFactory()
+    results = []
+    gate = threading.Barrier(concurrency + 1)
+    share = [logins // concurrency + (1 if i < logins % concurrency else 0) for i in range(concurrency)]
+
+    def worker(count):
+        gate.wait()
+        try:
+            for _ in range(count):
+                request = factory.post("/api/auth/login/", {"username": username, "password": PASSWORD}, format="json")
+                request.session = SessionStore()
+                started = time.perf_counter()
+                try:
+                    code = view(request).status_code
+                except Exception as exc:
+                    code = type(exc).__name__
+                results.append((code, time.perf_counter() - started))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(count,)) for count in share]
+    for thread in threads:
+        thread.start()
+    gate.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ok = sum(1 for code, _ in results if code == 200)
+    latencies = [latency for _, latency in results]
+    return {
+        "logins_per_s": round(ok / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "ok": ok,
+        "rejected_503": sum(1 for code, _ in results if code == 503),
+        "errors": sum(1 for code, _ in results if code not in (200, 503)),
+    }
+
+
+def run(args):
+    rows = []
+    for iterations in args.iterations:
+        username = seed_user(iterations)
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=iterations):
+            cell = fire(inline_login_user, username, args.logins, args.concurrency)
+            rows.append({"iterations": iterations, "pool": "inline", **cell})
+            for size in args.pool_sizes:
+                with override_settings(PASSWORD_HASH_WORKERS=size, PASSWORD_HASH_QUEUE_LIMIT=args.queue_limit):
+                    hashing.reset_pool()
+                    cell = fire(views.login_user, username, args.logins, args.concurrency)
+                    cell["pool_stats"] = hashing.get_pool().stats()
+                    hashing.reset_pool()
+                rows.append({"iterations": iterations, "pool": size, **cell})
+    return rows
+
+
+def int_list(value):
+    return [int(part) for part in value.split(",") if part]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int_list, default=[100000, 300000, 1000000])
+    parser.add_argument("--pool-sizes", type=int_list, default=[1, 2, 4, os.cpu_count() or 4])
+    parser.add_argument("--logins", type=int, default=64, help="logins per cell")
+    parser.add_argument("--concurrency", type=int, default=16, help="request threads")
+    parser.add_argument("--queue-limit", type=int, default=64)
+    parser.add_argument("--output", help="also write the JSON results here")
+    args = parser.parse_args()
+
+    test_name = os.path.join(tempfile.gettempdir(), "cinema_login_throughput.sqlite3")
+    settings.DATABASES["default"].setdefault("TEST", {})["NAME"] = test_name
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        rows = run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(f"{'iterations':>10}  {'pool':>6}  {'logins/s':>9}  {'p50 ms':>8}  {'p95 ms':>8}  {'503s':>5}")
+    for row in rows:
+        print(
+            f"{row['iterations']:>10}  {row['pool']:>6}  {row['logins_per_s']:>9}  "
+            f"{row['p50_ms']:>8}  {row['p95_ms']:>8}  {row['rejected_503']:>5}"
+        )
+    if args.output:
+        Path(args.output).write_text(json.dumps(rows, indent=2) + "\n")
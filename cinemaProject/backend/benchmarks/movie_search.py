@@ -0,0 +1,141 @@
+# backend/benchmarks/movie_search.py
+"""
+Type-ahead latency of /api/movies/search/ over a large catalog.
+
+Seeds --movies generated titles, then replays what a search box sends
+while someone types: every prefix (two characters and up) of --queries
+random titles (title-only matching, as a search box would ask for; pass
+--full-text to match descriptions too). Each keystroke is timed through the full view with the
+catalog cache cleared (the worst case), and reported as percentiles:
+
+    python benchmarks/movie_search.py --movies 50000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import setup_test_environment
+from rest_framework.test import APIRequestFactory
+
+from posts.models import Movie
+from posts.views import MovieViewSet
+
+WORDS = (
+    "star night dark last lost city river king queen dragon ghost storm iron silver shadow "
+    "summer winter blood fire ocean secret empire return rise fall house road war love "
+    "garden machine planet island signal hunter echo crown forest desert mirror memory"
+).split()
+GENRES = ["Action", "Drama", "Comedy", "Horror", "Sci-Fi", "Thriller", "Romance", "Animation"]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def vocabulary(rng, size):
+    """Made-up words; real catalogs have far more distinct words than WORDS."""
+    syllables = ["ka", "lo", "ri", "zen", "mar", "tho", "vel", "dun", "sa", "qui", "bro", "el", "nor", "ix"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(syllables, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def seed(count, rng):
+    # Titles mix a few common words into a large vocabulary; descriptions
+    # draw from it with a long tail, roughly like real synopses.
+    title_words = WORDS + vocabulary(rng, 4000)
+    description_words = vocabulary(rng, 20000)
+    weights = [1 / (rank + 1) for rank in range(len(description_words))]
+    titles = [
+        " ".join(rng.choice(WORDS) if rng.random() < 0.3 else rng.choice(title_words) for _ in range(rng.randint(1, 4))).title()
+        for _ in range(count)
+    ]
+    Movie.objects.bulk_create(
+        [
+            Movie(
+                title=title,
+                slug=f"movie-{index}",
+                description=" ".join(rng.choices(description_words, weights, k=40)),
+                rating="PG-13",
+                duration=rng.randint(80, 180),
+                genre=rng.choice(GENRES),
+                category=rng.choice(["currently-running", "coming-soon"]),
+            )
+            for index, title in enumerate(titles)
+        ],
+        batch_size=2000,
+    )
+    return titles
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    titles = seed(args.movies, rng)
+    seed_seconds = time.perf_counter() - started
+
+    view = MovieViewSet.as_view({"get": "search"})
+    factory = APIRequestFactory()
+    latencies = []
+    results = []
+    for title in rng.sample(titles, args.queries):
+        for end in range(2, len(title) + 1):
+            params = {"q": title[:end], "include_showtimes": "false"}
+            if args.title_only:
+                params["title_only"] = "true"
+            request = factory.get("/api/movies/search/", params)
+            cache.clear()
+            started = time.perf_counter()
+            response = view(request)
+            latencies.append(time.perf_counter() - started)
+            results.append(len(json.loads(response.content)["results"]))
+
+    return {
+        "movies": args.movies,
+        "title_only": args.title_only,
+        "seed_seconds": round(seed_seconds, 2),
+        "keystrokes": len(latencies),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+        "avg_results": round(sum(results) / len(results), 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--movies", type=int, default=30000)
+    parser.add_argument("--queries", type=int, default=50, help="titles typed out")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--full-text", dest="title_only", action="store_false", help="match descriptions too")
+    parser.add_argument("--output", help="also write the JSON result here")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        result = run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
@@ -0,0 +1,123 @@
+# backend/benchmarks/profile_cards.py
+"""
+GET /api/auth/profile/ latency with and without decrypting saved cards.
+
+Seeds one user with --cards saved cards (the model allows up to 4) and
+times --requests profile GETs straight at the view. The "decrypting" row
+restores how the profile read cards before the last4/brand projection: a
+full PaymentCard query (number and CVV decrypted on load) and a masked
+number cut from the decrypted PAN. "projection" is the current view:
+
+    python benchmarks/profile_cards.py --requests 2000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+import django
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+django.setup()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import setup_test_environment
+from encrypted_model_fields import fields as encrypted_fields
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from posts.models import PaymentCard
+from posts.serializers import PaymentCardSerializer
+from posts.views import user_profile
+
+CARD_NUMBERS = ["4111111111111111", "5500000000000004", "378282246310005", "6011111111111117"]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def decrypting_read_path():
+    """Patch the profile view back to the pre-projection card reads."""
+    def old_masked(self, obj):
+        if obj.card_number:
+            return f"****-****-****-{obj.card_number[-4:]}"
+        return ""
+
+    return [
+        mock.patch.object(PaymentCard, "for_display", classmethod(lambda cls, user: cls.objects.filter(user=user))),
+        mock.patch.object(PaymentCardSerializer, "get_card_number_masked", old_masked),
+    ]
+
+
+def measure(user, requests):
+    factory = APIRequestFactory()
+    latencies = []
+    with mock.patch.object(encrypted_fields, "decrypt_str", wraps=encrypted_fields.decrypt_str) as decrypt:
+        for _ in range(requests):
+            request = factory.get("/api/auth/profile/")
+            force_authenticate(request, user=user)
+            started = time.perf_counter()
+            response = user_profile(request)
+            response.render()
+            latencies.append(time.perf_counter() - started)
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "requests_per_second": round(requests / sum(latencies), 1),
+        "decryptions_per_request": decrypt.call_count / requests,
+    }
+
+
+def run(args):
+    user = User.objects.create_user(username="bench", password="bench", email="bench@example.com")
+    for index in range(args.cards):
+        PaymentCard.objects.create(
+            user=user, card_number=CARD_NUMBERS[index % len(CARD_NUMBERS)], card_holder_name="Bench User",
+            expiry_month=12, expiry_year=2035, cvv="123",
+        )
+
+    patches = decrypting_read_path()
+    for patch in patches:
+        patch.start()
+    try:
+        decrypting = measure(user, args.requests)
+    finally:
+        for patch in patches:
+            patch.stop()
+    projection = measure(user, args.requests)
+
+    return {
+        "cards": args.cards,
+        "requests": args.requests,
+        "decrypting": decrypting,
+        "projection": projection,
+        "speedup_p50": round(decrypting["p50_ms"] / projection["p50_ms"], 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cards", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--output", help="also write the JSON result here")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        result = run(args)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    print(json.dumps(result, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -21,9 +22,17 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'enp16-*=o1b(mod(s_kw-e2xc5r7(abis8fp(f1zdz=m=6n_2o'
 
-# Encryption key for sensitive data (payment cards)
+# Encryption keys for sensitive data (payment cards), newest first.
+# New writes use the first key; every listed key still decrypts. To rotate,
+# prepend a new key, run `manage.py rotate_encryption_key`, then drop the old one.
 # In production, this should be stored in environment variables
-FIELD_ENCRYPTION_KEY = 'OihedcXDdqSuz5EqzkdwJ2s5QwPAAfBoaX06gMqAtSk='
+FIELD_ENCRYPTION_KEY = [
+    key.strip()
+    for key in os.environ.get(
+        "DJANGO_FIELD_ENCRYPTION_KEYS", "OihedcXDdqSuz5EqzkdwJ2s5QwPAAfBoaX06gMqAtSk="
+    ).split(",")
+    if key.strip()
+]
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -52,6 +61,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "posts.routers.ReplicaRoutingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -75,23 +85,90 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+# Serve the native async views in posts/async_views.py; core/asgi.py turns
+# this on, so WSGI deployments keep the DRF views.
+ASYNC_VIEWS = os.environ.get("DJANGO_ASYNC_VIEWS", "0") == "1"
+
+# Live seat streams (posts/seat_stream.py): how long to gather a burst of
+# seat changes into one event, how often each process re-reads the cached
+# bitmap for changes made by other processes, and the idle keep-alive.
+SEAT_STREAM_COALESCE_SECONDS = 0.1
+SEAT_STREAM_RESYNC_SECONDS = 2
+SEAT_STREAM_KEEPALIVE_SECONDS = 15
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get("DJANGO_DB_NAME") or BASE_DIR / 'db.sqlite3',
+    }
+}
+
+# Production SQLite profile (DJANGO_DB_PROFILE=production). Every new
+# connection switches to WAL (readers never block the writer), relaxes fsync
+# to commit boundaries, memory-maps 256 MB and keeps a 64 MB page cache.
+# Write transactions start with BEGIN IMMEDIATE, so concurrent bookings wait
+# up to `timeout` seconds for the write lock instead of failing with
+# "database is locked" when a read lock cannot be upgraded. SQLite ignores
+# SELECT ... FOR UPDATE, so this is also what queues best-available group
+# bookings per showtime; without it they get 409 + Retry-After instead.
+SQLITE_PRODUCTION_OPTIONS = {
+    "init_command": (
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA mmap_size=268435456;"
+        "PRAGMA cache_size=-65536;"
+        "PRAGMA temp_store=MEMORY;"
+    ),
+    "transaction_mode": "IMMEDIATE",
+    "timeout": 20,
+}
+
+DATABASE_PROFILE = os.environ.get("DJANGO_DB_PROFILE", "default")
+if DATABASE_PROFILE == "production":
+    DATABASES["default"]["OPTIONS"] = SQLITE_PRODUCTION_OPTIONS
+
+# Read replicas: DJANGO_DB_REPLICAS is a comma-separated list of SQLite files
+# kept in sync with `manage.py sync_replicas`. Read-only views marked in
+# posts/views.py read from them (see posts/routers.py).
+DATABASE_REPLICAS = []
+for index, path in enumerate(filter(None, os.environ.get("DJANGO_DB_REPLICAS", "").split(",")), start=1):
+    alias = f"replica{index}"
+    DATABASES[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": path.strip(),
+        "OPTIONS": {"init_command": "PRAGMA query_only=ON;", "timeout": 20},
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["posts.routers.ReplicaRouter"]
+
+# How long a user reads from the primary after their own write
+REPLICA_STICKY_SECONDS = 15
+
+# Cache (catalog, seat maps). Local memory per process by default; point every
+# worker at the same store in production, e.g.
+#   "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+#   "LOCATION": "/var/tmp/cinema_cache",
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "cinema",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
     }
 }
 
 # CORS settings for authentication
-CORS_ALLOWED_HEADERS = [
+CORS_ALLOW_HEADERS = [
     'accept',
     'accept-encoding',
     'authorization',
     'content-type',
     'dnt',
+    'idempotency-key',
     'origin',
     'user-agent',
     'x-csrftoken',
@@ -130,11 +207,33 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    # ?format= filters showtimes by projection format (2D, IMAX, ...); pick
+    # a renderer with the Accept header or a .json suffix instead
+    'URL_FORMAT_OVERRIDE': None,
 }
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Password hashing. PBKDF2 cost is set per deployment; hashing runs in a
+# bounded pool of PASSWORD_HASH_WORKERS threads with at most
+# PASSWORD_HASH_QUEUE_LIMIT waiting (see posts/hashing.py). Raising the
+# iteration count rehashes each user's password at their next login.
+PASSWORD_HASHERS = [
+    "posts.hashing.ConfigurablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get("DJANGO_PBKDF2_ITERATIONS", "1000000"))
+PASSWORD_HASH_WORKERS = int(os.environ.get("DJANGO_PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get("DJANGO_PASSWORD_HASH_QUEUE_LIMIT", "64"))
+# ModelBackend with the password check run in that pool. Sessions store the
+# backend path; migration 0023 rewrote existing ModelBackend sessions so the
+# switch did not log anyone out
+AUTHENTICATION_BACKENDS = ["posts.hashing.PooledModelBackend"]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -188,8 +287,54 @@ DEFAULT_FROM_EMAIL = 'Cinema E-Booking <cinema.ebooking.project@gmail.com>'
 
 DEFAULT_FROM_EMAIL = 'Cinema E-Booking System <cinema.ebooking.project@gmail.com>'
 
+# Email outbox worker (python manage.py send_queued_emails --loop)
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 30
+OUTBOX_RETRY_MAX_SECONDS = 3600
+# How long a worker owns the rows it leased; renewed before every message,
+# so it only has to cover one slow SMTP send, not a whole batch
+OUTBOX_LEASE_SECONDS = 300
+# Delivered rows kept for this long (python manage.py prune_sent_emails)
+OUTBOX_SENT_RETENTION_DAYS = int(os.environ.get("DJANGO_OUTBOX_SENT_RETENTION_DAYS", "14"))
+
+# Promotion blasts: subscribers per checkpoint, persistent SMTP connections
+PROMOTION_EMAIL_CHUNK_SIZE = 500
+PROMOTION_EMAIL_POOL_SIZE = 4
+# Consecutive failed runs (pool could not open, server went away) before a
+# blast is marked FAILED; runs back off like the outbox (OUTBOX_RETRY_*)
+PROMOTION_EMAIL_MAX_ATTEMPTS = 5
+# How long a worker owns a job; renewed at every checkpoint, so it has to
+# cover sending one chunk
+PROMOTION_EMAIL_LEASE_SECONDS = 600
+
+# Rows re-encrypted per transaction by `manage.py rotate_encryption_key`
+FIELD_ENCRYPTION_ROTATION_CHUNK_SIZE = 500
+
+# Minutes a room needs between the end of one showing and the next start
+SHOWTIME_CLEANING_BUFFER_MINUTES = int(os.environ.get("DJANGO_SHOWTIME_CLEANING_BUFFER_MINUTES", "15"))
+
+# Largest schedule accepted by POST /api/admin/showtimes/bulk_schedule/
+SHOWTIME_BULK_SCHEDULE_LIMIT = 5000
+
+# Idempotency-Key replays for booking writes (posts/idempotency.py): how long a
+# key is honoured, how many keys `manage.py prune_idempotency_keys` keeps, and
+# after how many seconds an unfinished first attempt is treated as abandoned.
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.environ.get("DJANGO_IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+IDEMPOTENCY_MAX_KEYS = int(os.environ.get("DJANGO_IDEMPOTENCY_MAX_KEYS", "100000"))
+IDEMPOTENCY_LOCK_SECONDS = 60
+
 # Frontend URL for email links
 FRONTEND_URL = 'http://localhost:5173'
 
 # Optional (sometimes needed for Safari/Chrome consistency)
 SESSION_ENGINE = "django.contrib.sessions.backends.db"
+
+# Cached session profile (DJANGO_SESSION_PROFILE=cached): sessions are read
+# from the cache and written through to the database, so authenticated
+# requests skip the session-table read. Every worker must share the cache
+# (see CACHES) or a logout in one process would not reach the others.
+# Purge expired rows with `manage.py purge_expired_sessions`.
+SESSION_PROFILE = os.environ.get("DJANGO_SESSION_PROFILE", "db")
+if SESSION_PROFILE == "cached":
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Movie, UserProfile, PaymentCard
+from .models import AccountToken, Movie, OutboundEmail, UserProfile, PaymentCard
 
 
 @admin.register(Movie)
@@ -15,7 +15,15 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'is_verified', 'subscribed_to_promotions', 'created_at']
     list_filter = ['is_verified', 'subscribed_to_promotions']
     search_fields = ['user__username', 'user__email']
-    readonly_fields = ['verification_token', 'reset_token', 'created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(AccountToken)
+class AccountTokenAdmin(admin.ModelAdmin):
+    list_display = ['user', 'purpose', 'created_at', 'expires_at']
+    list_filter = ['purpose']
+    search_fields = ['user__username', 'user__email']
+    readonly_fields = ['token_hash', 'created_at']
 
 
 @admin.register(PaymentCard)
@@ -24,7 +32,19 @@ class PaymentCardAdmin(admin.ModelAdmin):
     list_filter = ['is_default']
     search_fields = ['user__username', 'card_holder_name']
     readonly_fields = ['created_at', 'updated_at']
-    
+
+    def get_queryset(self, request):
+        # The change form still loads the number when it reads it
+        return super().get_queryset(request).defer(*PaymentCard.SECRET_FIELDS)
+
     def card_last_four(self, obj):
-        return f"****{obj.card_number[-4:]}"
+        return f"****{obj.card_last4}"
     card_last_four.short_description = 'Card Number'
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['subject', 'last_error']
+    readonly_fields = ['created_at', 'sent_at']
@@ -1,5 +1,6 @@
 # posts/apps.py
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class PostsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
@@ -7,4 +8,7 @@ class PostsConfig(AppConfig):
 
     def ready(self):
         # Import signal handlers
-        from . import signals  # noqa: F401
\ No newline at end of file
+        from . import search, signals  # noqa: F401
+
+        # Migrations that rebuild posts_movie drop the full-text triggers
+        post_migrate.connect(search.ensure_index, sender=self)
\ No newline at end of file
@@ -0,0 +1,343 @@
+# posts/async_views.py
+"""
+Native async variants of hot endpoints, served when the project runs under
+ASGI (core/asgi.py turns on ASYNC_VIEWS; see posts/urls.py).
+
+DRF views are synchronous, so these are plain Django async views that keep
+the same URLs, payloads and response shapes as their DRF counterparts.
+Password hashing is awaited on the hashing pool, so the event loop keeps
+serving other requests while PBKDF2 runs.
+
+The public read endpoints (movies, showtimes, seat maps, promo validation)
+query through the async ORM. Work that has no async API -- the cache
+backend and the seat map, which mixes cache and ORM calls -- runs in a
+worker thread via sync_to_async, never on the event loop. Serializing
+already-loaded rows is plain CPU and stays on the loop.
+
+Seat pickers can hold a live stream open instead of polling the seat map
+(posts/seat_stream.py); it is only routed under ASGI.
+
+These views are not faster for plain reads. Django's async ORM still runs
+each query in a thread, so every await adds a hop. On one core with one
+worker, benchmarks/asgi_vs_wsgi.py measured uvicorn at 123-141 req/s and
+gunicorn (DRF views) at 196-225 req/s for 10-200 connections. ASGI earns
+its keep with the seat streams and the awaited password hashing, not with
+read throughput.
+"""
+import asyncio
+import json
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate, alogin
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import (
+    APIException,
+    MethodNotAllowed,
+    NotAuthenticated,
+    NotFound,
+    ParseError,
+    PermissionDenied,
+)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from . import catalog_cache, hashing, seat_stream, seatmap
+from .models import Movie, Promotion, Showtime
+from .pagination import MovieCursorPagination, ShowtimeCursorPagination
+from .routers import SAFE_METHODS, reads_from_replica
+from .serializers import MovieSerializer, ShowtimeSerializer, UserSerializer
+from .views import (
+    MovieViewSet,
+    ShowtimeViewSet,
+    filter_movies,
+    filter_showtimes,
+    search_results,
+    showtime_seat_map,
+    wants_showtimes,
+    with_upcoming_showtimes,
+)
+
+READ_METHODS = ("GET", "HEAD")
+
+
+def read_json(request):
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+# DRF exempts its views from CSRF for anonymous callers; match login_user
+@csrf_exempt
+async def login_user(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    data = read_json(request)
+    if data is None:
+        return JsonResponse({"error": "Invalid JSON body"}, status=400)
+
+    username = data.get("username")
+    email = data.get("email")
+    password = data.get("password")
+    remember_me = data.get("remember_me", False)
+
+    if email and not username:
+        username = await User.objects.filter(email=email).values_list("username", flat=True).afirst()
+        if username is None:
+            return JsonResponse({"error": "Invalid email or password"}, status=400)
+
+    try:
+        user = await aauthenticate(request, username=username, password=password)
+    except hashing.PasswordHashingBusy as exc:
+        return JsonResponse({"error": str(exc.detail)}, status=exc.status_code)
+    if user is None:
+        return JsonResponse({"error": "Invalid credentials"}, status=400)
+
+    if not user.profile.is_verified:
+        return JsonResponse(
+            {"error": "Email not verified. Please check your inbox for the verification link."}, status=403
+        )
+
+    await alogin(request, user)
+    await request.session.aset_expiry(2592000 if remember_me else 0)
+
+    # The profile is already loaded, so serializing touches no database
+    return JsonResponse({"message": "Login successful", "user": UserSerializer(user).data}, status=200)
+
+
+# ---------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------
+def render_json(data, status=200):
+    """Render like a DRF Response, so both paths return identical bytes."""
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type="application/json")
+
+
+def api_errors(view):
+    """Turn Http404 and DRF exceptions into the responses DRF would send."""
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(request, *args, **kwargs)
+        except (Http404, APIException) as exc:
+            if isinstance(exc, Http404):
+                exc = NotFound(*exc.args)
+            detail = exc.detail
+            return render_json(detail if isinstance(detail, (list, dict)) else {"detail": detail}, exc.status_code)
+
+    return wrapper
+
+
+def reads_of(sync_view):
+    """
+    Serve GET/HEAD natively and hand every other method (admin writes on
+    the movie viewset, OPTIONS) to the DRF view it replaces, in a thread.
+    """
+    fallback = sync_to_async(sync_view)
+
+    def decorator(view):
+        view = api_errors(view)
+
+        # DRF runs its own CSRF check for the methods it serves
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method in READ_METHODS:
+                return await view(request, *args, **kwargs)
+            return await fallback(request, *args, **kwargs)
+
+        wrapper.replica_methods = SAFE_METHODS
+        return wrapper
+
+    return decorator
+
+
+async def get_or_404(queryset, **lookup):
+    """aget_object_or_404() that also 404s on malformed lookups, like DRF's get_object()."""
+    try:
+        return await aget_object_or_404(queryset, **lookup)
+    except (TypeError, ValueError):
+        raise Http404
+
+
+# ---------------------------------------------------------
+# Public catalog
+# ---------------------------------------------------------
+def movie_queryset(params, include_showtimes):
+    queryset = Movie.objects.all()
+    if include_showtimes:
+        queryset = with_upcoming_showtimes(queryset)
+    return filter_movies(queryset, params)
+
+
+@reads_of(MovieViewSet.as_view({"get": "list", "post": "create"}))
+async def movie_list(request):
+    include_showtimes = wants_showtimes(request.GET)
+    drf_request = Request(request)
+
+    async def build():
+        paginator = MovieCursorPagination()
+        movies = await paginator.apaginate_queryset(movie_queryset(request.GET, include_showtimes), drf_request)
+        context = {"request": drf_request, "include_showtimes": include_showtimes}
+        return paginator.get_paginated_data(MovieSerializer(movies, many=True, context=context).data)
+
+    return await catalog_cache.acached_response(request, build, time_sensitive=include_showtimes)
+
+
+@reads_of(
+    MovieViewSet.as_view(
+        {"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"}
+    )
+)
+async def movie_detail(request, slug):
+    include_showtimes = wants_showtimes(request.GET)
+
+    async def build():
+        movie = await get_or_404(movie_queryset(request.GET, include_showtimes), slug=slug)
+        context = {"request": Request(request), "include_showtimes": include_showtimes}
+        return MovieSerializer(movie, context=context).data
+
+    return await catalog_cache.acached_response(request, build, time_sensitive=include_showtimes)
+
+
+@reads_of(MovieViewSet.as_view({"get": "search"}))
+async def movie_search(request):
+    include_showtimes = wants_showtimes(request.GET)
+
+    async def build():
+        movies = [movie async for movie in search_results(request.GET, include_showtimes)]
+        context = {"request": Request(request), "include_showtimes": include_showtimes}
+        return {"results": MovieSerializer(movies, many=True, context=context).data}
+
+    return await catalog_cache.acached_response(request, build, time_sensitive=include_showtimes)
+
+
+@reads_of(ShowtimeViewSet.as_view({"get": "list"}))
+async def showtime_list(request):
+    drf_request = Request(request)
+    queryset = filter_showtimes(Showtime.objects.select_related("movie", "movie_room"), request.GET)
+    paginator = ShowtimeCursorPagination()
+    showtimes = await paginator.apaginate_queryset(queryset, drf_request)
+    data = ShowtimeSerializer(showtimes, many=True, context={"request": drf_request}).data
+    return render_json(paginator.get_paginated_data(data))
+
+
+@reads_of(ShowtimeViewSet.as_view({"get": "seats"}))
+async def showtime_seats(request, pk):
+    showtime = await get_or_404(Showtime.objects.select_related("movie_room"), pk=pk)
+    # Cache lookups plus, on a miss, ORM queries: keep them off the event loop
+    seats = await sync_to_async(showtime_seat_map)(showtime, request.GET.get("encoding"))
+    return render_json(seats)
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+async def seat_events(channel, subscriber, encoding):
+    def snapshot():
+        with channel.lock:
+            layout, bitmap = channel.snapshot()
+        if encoding == "bitmap":
+            return sse("snapshot", seatmap.format_compact_seat_map(channel.showtime_id, layout, bitmap))
+        return sse("snapshot", seatmap.format_seat_map(layout, bitmap))
+
+    try:
+        yield snapshot()
+        idle_since = time.monotonic()
+        while True:
+            batch = await subscriber.next_batch(settings.SEAT_STREAM_RESYNC_SECONDS)
+            if channel.resync_due():
+                # Whatever it finds arrives as this subscriber's next batch
+                await sync_to_async(channel.resync)()
+            if batch is None:
+                if time.monotonic() - idle_since >= settings.SEAT_STREAM_KEEPALIVE_SECONDS:
+                    idle_since = time.monotonic()
+                    yield b": keepalive\n\n"
+                continue
+
+            reset, changes = batch
+            if reset:
+                yield snapshot()
+            elif changes:
+                yield sse(
+                    "seats",
+                    {
+                        "reserved": sorted(seat for seat, reserved in changes.items() if reserved),
+                        "released": sorted(seat for seat, reserved in changes.items() if not reserved),
+                    },
+                )
+            idle_since = time.monotonic()
+    finally:
+        seat_stream.unsubscribe(channel, subscriber)
+
+
+@api_errors
+async def showtime_seat_stream(request, pk):
+    """
+    Server-Sent Events for a seat picker: a ``snapshot`` event in the shape
+    of the seats endpoint (``?encoding=bitmap`` for the compact one), then a
+    ``seats`` event with the seat ids reserved and released since the last.
+    """
+    if request.method != "GET":
+        raise MethodNotAllowed(request.method)
+    showtime = await get_or_404(Showtime.objects.select_related("movie_room"), pk=pk)
+    subscriber = seat_stream.Subscriber(asyncio.get_running_loop())
+    channel, _ = await sync_to_async(seat_stream.subscribe)(showtime, subscriber)
+
+    response = StreamingHttpResponse(
+        seat_events(channel, subscriber, request.GET.get("encoding")), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ---------------------------------------------------------
+# Promotions
+# ---------------------------------------------------------
+# Not CSRF-exempt: CsrfViewMiddleware checks it, as DRF does for session users
+@reads_from_replica("POST")
+@api_errors
+async def validate_promo_code(request):
+    """Validate a promotion code before checkout."""
+    if request.method != "POST":
+        raise MethodNotAllowed(request.method)
+    user = await request.auser()
+    if not user.is_authenticated:
+        # Session auth sends no WWW-Authenticate challenge, so DRF answers 403
+        raise PermissionDenied(NotAuthenticated.default_detail, NotAuthenticated.default_code)
+    data = read_json(request)
+    if data is None:
+        raise ParseError()
+
+    code = str(data.get("promo_code", "")).strip()
+    if not code:
+        return render_json({"error": "promo_code is required"}, status=400)
+
+    try:
+        promo = await Promotion.objects.aget(promo_code__iexact=code)
+    except Promotion.DoesNotExist:
+        return render_json({"error": "Promo code not found"}, status=404)
+
+    if not promo.is_active():
+        return render_json({"error": "Promo code is expired or inactive"}, status=400)
+
+    return render_json(
+        {
+            "promo_code": promo.promo_code,
+            "discount_percent": promo.discount_percent,
+            "start_date": promo.start_date,
+            "end_date": promo.end_date,
+            "description": promo.description,
+        }
+    )
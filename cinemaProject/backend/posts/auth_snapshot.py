@@ -0,0 +1,71 @@
+# posts/auth_snapshot.py
+"""
+Cached user snapshots for the auth-status endpoint.
+
+The SPA asks "who am I?" on every navigation. Instead of authenticating the
+request (session row, user row, profile row, serializer pass), the endpoint
+reads the user id and password hash straight from the session and answers
+from a cached snapshot of the serialized user. Signal handlers drop the
+snapshot whenever the user or their profile is saved, and the session hash is
+compared just like Django's auth middleware does, so a password change still
+ends other sessions immediately.
+"""
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+
+SNAPSHOT_KEY = "auth:snapshot:{user_id}"
+SNAPSHOT_TIMEOUT = 60 * 60
+
+
+def build_snapshot(user):
+    from .serializers import UserSerializer  # Local import to avoid circular dependencies
+
+    return {
+        "session_hash": user.get_session_auth_hash(),
+        "is_active": user.is_active,
+        "user": dict(UserSerializer(user).data),
+    }
+
+
+def get_snapshot(user_id):
+    key = SNAPSHOT_KEY.format(user_id=user_id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        user = User.objects.select_related("profile").filter(pk=user_id).first()
+        if user is None:
+            return None
+        snapshot = build_snapshot(user)
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def session_user(session):
+    """Serialized user for a logged-in session, or None if it is anonymous or stale."""
+    user_id = session.get(SESSION_KEY)
+    if user_id is None or session.get(BACKEND_SESSION_KEY) not in settings.AUTHENTICATION_BACKENDS:
+        return None
+    try:
+        user_id = User._meta.pk.to_python(user_id)
+    except Exception:
+        return None
+
+    snapshot = get_snapshot(user_id)
+    if snapshot is None or not snapshot["is_active"]:
+        return None
+    session_hash = session.get(HASH_SESSION_KEY)
+    if not session_hash or not constant_time_compare(session_hash, snapshot["session_hash"]):
+        return None
+    return snapshot["user"]
+
+
+def invalidate(user_id):
+    cache.delete(SNAPSHOT_KEY.format(user_id=user_id))
+
+
+def invalidate_on_commit(user_id):
+    # Dropping it before commit would let a concurrent request re-cache old rows
+    transaction.on_commit(lambda: invalidate(user_id))
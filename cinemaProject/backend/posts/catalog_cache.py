@@ -0,0 +1,143 @@
+# posts/catalog_cache.py
+"""
+Read-through cache for the public movie catalog.
+
+Entries are pre-rendered JSON bytes keyed by a catalog version counter.
+Signal handlers bump the counter whenever a Movie, Showtime or MovieRoom
+changes, which orphans every older entry at once, so nothing is ever served
+stale and no TTL has to be guessed. The only time-based expiry is exact: an
+entry that lists upcoming showtimes lives until the earliest of them starts.
+Works with any Django cache backend (local-memory, file-based, ...).
+"""
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Min
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .routers import use_primary
+
+VERSION_KEY = "catalog:version"
+HITS_KEY = "catalog:hits"
+MISSES_KEY = "catalog:misses"
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock so a lost counter never reuses an old version
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_version()
+
+
+def bump_version_on_commit():
+    transaction.on_commit(bump_version)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "version": get_version(),
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else 0.0,
+    }
+
+
+def _seconds_until_next_showtime():
+    from .models import Showtime  # Local import to avoid circular dependencies
+
+    now = timezone.now()
+    next_start = Showtime.objects.filter(starts_at__gte=now).aggregate(next=Min("starts_at"))["next"]
+    if next_start is None:
+        return None
+    return max(1, int((next_start - now).total_seconds()))
+
+
+def _lookup(request):
+    """Return ``(key, body)``; ``body`` is None on a miss."""
+    path_hash = hashlib.sha1(request.get_full_path().encode()).hexdigest()
+    key = f"catalog:v{get_version()}:{path_hash}"
+    body = cache.get(key)
+    _count(MISSES_KEY if body is None else HITS_KEY)
+    return key, body
+
+
+def _store(key, body, time_sensitive):
+    with use_primary():
+        timeout = _seconds_until_next_showtime() if time_sensitive else None
+    cache.set(key, body, timeout)
+
+
+def _serve(body, state):
+    response = HttpResponse(body, content_type="application/json")
+    response["X-Catalog-Cache"] = state
+    return response
+
+
+def cached_response(request, build, time_sensitive=True):
+    """
+    Serve ``build()`` (a DRF Response) from the cache as raw JSON bytes.
+
+    Only successful JSON responses are cached. ``time_sensitive`` entries
+    expire when the next upcoming showtime starts.
+    """
+    if request.accepted_renderer.format != "json":
+        return build()
+
+    key, body = _lookup(request)
+    if body is not None:
+        return _serve(body, "HIT")
+
+    # Entries live until the next version bump, so fill them from the primary:
+    # a lagging replica would otherwise freeze stale rows into the new version.
+    with use_primary():
+        response = build()
+    if response.status_code != 200:
+        return response
+
+    body = JSONRenderer().render(response.data)
+    _store(key, body, time_sensitive)
+    return _serve(body, "MISS")
+
+
+async def acached_response(request, abuild, time_sensitive=True):
+    """
+    cached_response() for async views; ``abuild()`` returns the response data
+    and raises (Http404, DRF exceptions) for anything that should not be cached.
+
+    Cache backends are synchronous (and may do network or file I/O), so
+    lookups and stores run in a worker thread instead of on the event loop.
+    """
+    key, body = await sync_to_async(_lookup)(request)
+    if body is not None:
+        return _serve(body, "HIT")
+
+    with use_primary():
+        data = await abuild()
+    body = JSONRenderer().render(data)
+    await sync_to_async(_store)(key, body, time_sensitive)
+    return _serve(body, "MISS")
@@ -1,8 +1,10 @@
 # posts/email_utils.py
-from django.core.mail import send_mail
+# Emails are queued in the outbox and delivered by `manage.py send_queued_emails`.
 from django.conf import settings
 from django.utils.html import strip_tags
 
+from .outbox import queue_email
+
 
 
 def send_verification_email(user, token):
@@ -36,13 +38,11 @@ def send_verification_email(user, token):
     
     plain_message = strip_tags(html_message)
     
-    send_mail(
+    queue_email(
         subject,
         plain_message,
-        settings.DEFAULT_FROM_EMAIL,
         [user.email],
         html_message=html_message,
-        fail_silently=False,
     )
 
 
@@ -77,13 +77,11 @@ def send_password_reset_email(user, token):
     
     plain_message = strip_tags(html_message)
     
-    send_mail(
+    queue_email(
         subject,
         plain_message,
-        settings.DEFAULT_FROM_EMAIL,
         [user.email],
         html_message=html_message,
-        fail_silently=False,
     )
 
 
@@ -113,13 +111,11 @@ def send_profile_change_notification(user):
     
     plain_message = strip_tags(html_message)
     
-    send_mail(
+    queue_email(
         subject,
         plain_message,
-        settings.DEFAULT_FROM_EMAIL,
         [user.email],
         html_message=html_message,
-        fail_silently=False,
     )
 
 
@@ -155,79 +151,64 @@ def send_welcome_email(user):
     
     plain_message = strip_tags(html_message)
     
-    send_mail(
+    queue_email(
         subject,
         plain_message,
-        settings.DEFAULT_FROM_EMAIL,
         [user.email],
         html_message=html_message,
-        fail_silently=False,
-    )
-def send_promotion_email_to_subscribers(promotion):
-    """Send promotion details to all users subscribed to marketing emails."""
-    from .models import UserProfile  # Local import to avoid circular dependencies
-
-    subscribers = (
-        UserProfile.objects.filter(subscribed_to_promotions=True)
-        .select_related("user")
-        .exclude(user__email="")
     )
+# Replaced per recipient; the rest of the promotion email is rendered once per blast
+GREETING_PLACEHOLDER = "__GREETING_NAME__"
 
-    if not subscribers.exists():
-        return 0
 
+def render_promotion_email(promotion):
+    """
+    Render a promotion email once for a whole blast.
+
+    Returns (subject, plain_template, html_template); callers substitute
+    GREETING_PLACEHOLDER with each recipient's name.
+    """
     subject = f"{promotion.promo_code} – Save {promotion.discount_percent}% at Cinema E-Booking"
 
-    count = 0
-    for profile in subscribers:
-        user = profile.user
-        greeting_name = user.first_name or user.username or "Movie Fan"
-        html_message = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                    <h2 style="color: #4F46E5;">Exclusive Promotion Just for You!</h2>
-                    <p>Hi {greeting_name},</p>
-                    <p>We have a special offer waiting: enjoy <strong>{promotion.discount_percent}% off</strong> your next booking.</p>
-                    <div style="margin: 20px 0; padding: 15px; background-color: #F3F4F6; border-radius: 8px;">
-                        <p style="margin: 0; font-size: 16px;"><strong>Promo Code:</strong> {promotion.promo_code}</p>
-                        <p style="margin: 8px 0 0 0;">Valid from {promotion.start_date:%b %d, %Y} to {promotion.end_date:%b %d, %Y}</p>
-                    </div>
-                    <p>{promotion.description or "Use this code at checkout to save on your next visit."}</p>
-                    <p style="margin-top: 24px;">Happy viewing,<br/>Cinema E-Booking Team</p>
+    html_message = f"""
+    <html>
+        <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+            <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+                <h2 style="color: #4F46E5;">Exclusive Promotion Just for You!</h2>
+                <p>Hi {GREETING_PLACEHOLDER},</p>
+                <p>We have a special offer waiting: enjoy <strong>{promotion.discount_percent}% off</strong> your next booking.</p>
+                <div style="margin: 20px 0; padding: 15px; background-color: #F3F4F6; border-radius: 8px;">
+                    <p style="margin: 0; font-size: 16px;"><strong>Promo Code:</strong> {promotion.promo_code}</p>
+                    <p style="margin: 8px 0 0 0;">Valid from {promotion.start_date:%b %d, %Y} to {promotion.end_date:%b %d, %Y}</p>
                 </div>
-            </body>
-        </html>
-        """
-        plain_message = strip_tags(html_message)
-
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        count += 1
+                <p>{promotion.description or "Use this code at checkout to save on your next visit."}</p>
+                <p style="margin-top: 24px;">Happy viewing,<br/>Cinema E-Booking Team</p>
+            </div>
+        </body>
+    </html>
+    """
 
-    return count
+    plain_message = strip_tags(html_message)
+    return subject, plain_message, html_message
 
 
-def send_booking_confirmation_email(user, booking):
+def send_booking_confirmation_email(user, booking, tickets=None):
     """Send an email to user when they successfully create a booking."""
     subject = "Your Cinema E-Booking Ticket Confirmation"
 
-    # Grab the first ticket (assume all tickets are for same showtime)
-    first_ticket = booking.tickets.select_related("showtime__movie").first()
-    if not first_ticket:
+    # Use provided tickets or fetch from DB if not provided
+    if tickets is None:
+        tickets = list(booking.tickets.select_related("showtime__movie", "seat"))
+
+    if not tickets:
         print("No tickets found for booking")
         return
 
-    showtime = first_ticket.showtime
+    # Assume all tickets are for the same showtime
+    showtime = tickets[0].showtime
     movie_title = showtime.movie.title
     showtime_str = showtime.starts_at.strftime("%b %d, %Y at %I:%M %p")
-    seats_list = ", ".join([f"{t.seat.row}{t.seat.number}" for t in booking.tickets.all()])
+    seats_list = ", ".join([f"{t.seat.row}{t.seat.number}" for t in tickets])
 
     html_message = f"""
     <html>
@@ -256,13 +237,11 @@ def send_booking_confirmation_email(user, booking):
 
     plain_message = strip_tags(html_message)
 
-    send_mail(
+    queue_email(
         subject,
         plain_message,
-        settings.DEFAULT_FROM_EMAIL,
         [user.email],
         html_message=html_message,
-        fail_silently=False,
     )
 def send_booking_cancellation_email(booking, tickets=None):
     """
@@ -314,14 +293,9 @@ def send_booking_cancellation_email(booking, tickets=None):
 
     plain_message = strip_tags(html_message)
 
-    try:
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-    except Exception as e:
-        print(f"Failed to send booking cancellation email: {e}")
+    queue_email(
+        subject,
+        plain_message,
+        [user.email],
+        html_message=html_message,
+    )
@@ -0,0 +1,207 @@
+# posts/hashing.py
+"""
+Password hashing off the request worker.
+
+PBKDF2 is pure CPU. Run inline, a burst of logins ties up every request
+worker and delays unrelated requests. Hashes and checks here run in one
+bounded thread pool instead: hashlib releases the GIL while it hashes, so
+PASSWORD_HASH_WORKERS hashes proceed in parallel while the rest of the
+process keeps serving. At most PASSWORD_HASH_QUEUE_LIMIT jobs may wait
+behind them; past that, callers get PasswordHashingBusy (a 503) instead of
+an ever-growing queue. Database work stays on the calling thread; only the
+hash runs in the pool.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from rest_framework.exceptions import APIException
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with the iteration count taken from PASSWORD_PBKDF2_ITERATIONS."""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class PasswordHashingBusy(APIException):
+    """The hashing queue is full; DRF views answer 503 and the client retries."""
+    status_code = 503
+    default_detail = "Too many sign-in attempts in progress, please retry shortly."
+    default_code = "password_hashing_busy"
+
+
+class HashingPool:
+    def __init__(self, workers, queue_limit):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "wait_seconds": 0.0,
+            "run_seconds": 0.0,
+        }
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise PasswordHashingBusy()
+
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._stats["in_flight"] += 1
+            self._stats["max_in_flight"] = max(self._stats["max_in_flight"], self._stats["in_flight"])
+        queued_at = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._stats["completed"] += 1
+                    self._stats["in_flight"] -= 1
+                    self._stats["wait_seconds"] += started - queued_at
+                    self._stats["run_seconds"] += finished - started
+                self._slots.release()
+
+        return self._executor.submit(run)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        completed = stats["completed"] or 1
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "submitted": stats["submitted"],
+            "completed": stats["completed"],
+            "rejected": stats["rejected"],
+            "in_flight": stats["in_flight"],
+            "queued": max(0, stats["in_flight"] - self.workers),
+            "max_in_flight": stats["max_in_flight"],
+            "avg_wait_ms": round(stats["wait_seconds"] / completed * 1000, 3),
+            "avg_run_ms": round(stats["run_seconds"] / completed * 1000, 3),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_LIMIT)
+    return _pool
+
+
+def reset_pool():
+    """Drop the pool so the next call picks up changed settings (benchmarks, tests)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def make_password(raw_password):
+    return get_pool().submit(hashers.make_password, raw_password).result()
+
+
+def set_password(user, raw_password):
+    """user.set_password() with the hash computed in the pool."""
+    user.password = make_password(raw_password)
+    user._password = raw_password
+
+
+def _verify(raw_password, encoded):
+    """Return (matches, needs_rehash) for a stored hash."""
+    if not raw_password or encoded is None or not hashers.is_password_usable(encoded):
+        # Keep the timing of unknown users close to that of real ones
+        hashers.make_password(raw_password)
+        return False, False
+    matches = hashers.check_password(raw_password, encoded)
+    return matches, matches and hashers.identify_hasher(encoded).must_update(encoded)
+
+
+def check_password(user, raw_password):
+    """user.check_password() with the hash checked in the pool."""
+    encoded = user.password if user is not None else None
+    matches, needs_rehash = get_pool().submit(_verify, raw_password, encoded).result()
+    if needs_rehash:
+        # Stored with an older cost; upgrade like Django's own setter does
+        set_password(user, raw_password)
+        user.save(update_fields=["password"])
+    return matches
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend with the hash checked in the pool, so django.contrib.auth's
+    authenticate() and aauthenticate() (user_login_failed, other
+    AUTHENTICATION_BACKENDS) work as usual. The sync path still waits for
+    its hash, but the wait is bounded by the queue limit and the CPU work
+    is off the request thread; the async path waits on the event loop.
+
+    The profile is loaded in the same query, since every login reads it.
+    """
+
+    def _users(self, username):
+        return User._default_manager.select_related("profile").filter(**{User.USERNAME_FIELD: username})
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = self._users(username).first()
+        if check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = await self._users(username).afirst()
+        matches, needs_rehash = await averify(user, password)
+        if needs_rehash:
+            user.password = await amake_password(password)
+            await user.asave(update_fields=["password"])
+        if matches and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+async def averify(user, raw_password):
+    """Async check; returns (matches, needs_rehash) without blocking the event loop."""
+    encoded = user.password if user is not None else None
+    future = get_pool().submit(_verify, raw_password, encoded)
+    return await asyncio.wrap_future(future)
+
+
+async def amake_password(raw_password):
+    return await asyncio.wrap_future(get_pool().submit(hashers.make_password, raw_password))
@@ -0,0 +1,170 @@
+# posts/idempotency.py
+"""
+Idempotency-Key support for booking writes.
+
+A client whose booking request timed out retries it with the same
+``Idempotency-Key`` header. The first attempt claims the key by inserting
+an IdempotencyRecord (committed before the view runs, so concurrent
+retries see it). The rendered response and its SHA-256 digest are stored
+on the record in the same transaction as the booking itself, so a crash
+never leaves a committed booking behind an unfinished claim. Later
+attempts are answered from the record with one indexed read: no booking
+transaction, no seat locks. A retry that arrives while the first attempt is still
+running gets 409 with Retry-After rather than queueing for the same locks.
+
+Keys are per user. Reusing one for a different method, path or body is
+refused with 422. Server errors release the key so the retry runs again.
+Records are honoured for IDEMPOTENCY_KEY_TTL_HOURS; `manage.py
+prune_idempotency_keys` deletes expired ones and then the oldest beyond
+IDEMPOTENCY_MAX_KEYS.
+"""
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    data = request.data
+    if hasattr(data, "lists"):
+        # Form posts: keep repeated fields
+        data = dict(data.lists())
+    body = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+def claim(user, key, fingerprint):
+    """
+    ``(record, True)`` when this request now owns ``key``; otherwise
+    ``(record, False)`` with the live record of an earlier attempt (None if
+    it vanished meanwhile). Expired and abandoned records are taken over.
+    """
+    record = None
+    for _ in range(2):
+        # Look first: retries are the common case here, and this is their only query
+        now = timezone.now()
+        record = IdempotencyRecord.objects.filter(user=user, key=key).first()
+        if record is not None:
+            abandoned = not record.completed and record.created_at <= now - timedelta(
+                seconds=settings.IDEMPOTENCY_LOCK_SECONDS
+            )
+            if record.expires_at > now and not abandoned:
+                return record, False
+            # Only the attempt that deletes this exact row gets to claim the key again
+            IdempotencyRecord.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+
+        try:
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(
+                    user=user,
+                    key=key,
+                    fingerprint=fingerprint,
+                    created_at=now,
+                    expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+                )
+            return record, True
+        except IntegrityError:
+            # A concurrent attempt claimed it first; go back and read its record
+            record = None
+    return record, False
+
+
+def replay(record, fingerprint):
+    """The response for a request whose key an earlier attempt already holds."""
+    if record is not None and record.fingerprint != fingerprint:
+        return Response({"error": f"This {HEADER} was already used for a different request"}, status=422)
+    if record is None or not record.completed:
+        return Response(
+            {"error": f"A request with this {HEADER} is still in progress"},
+            status=409,
+            headers={"Retry-After": "1"},
+        )
+    return Response(
+        record.response_body,
+        status=record.status_code,
+        headers={REPLAYED_HEADER: "true", "ETag": f'"{record.response_digest}"'},
+    )
+
+
+def complete(record, response):
+    """
+    Store ``response`` as the answer to every later attempt with the record's key.
+
+    Runs in the view's transaction, so the booking and its stored answer
+    commit together. Returns False when the claim is gone: a retry took it
+    over as abandoned, and the caller must roll its work back.
+    """
+    # Rendered the way the client receives it, so replays match byte for byte
+    content = JSONRenderer().render(response.data)
+    digest = hashlib.sha256(content).hexdigest()
+    updated = IdempotencyRecord.objects.filter(pk=record.pk, status_code__isnull=True).update(
+        status_code=response.status_code,
+        response_body=json.loads(content) if content else None,
+        response_digest=digest,
+    )
+    if not updated:
+        return False
+    response["ETag"] = f'"{digest}"'
+    return True
+
+
+class Superseded(Exception):
+    """The claim was taken over while the view ran; its work is rolled back."""
+
+
+def release(record):
+    """Forget an attempt that failed on our side, so the retry runs again."""
+    IdempotencyRecord.objects.filter(pk=record.pk, status_code__isnull=True).delete()
+
+
+def idempotent(view_method):
+    """
+    Honour the Idempotency-Key header on a viewset write action.
+
+    Requests without the header are handled as before.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view_method(self, request, *args, **kwargs)
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return Response({"error": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters"}, status=400)
+
+        fingerprint = request_fingerprint(request)
+        record, claimed = claim(request.user, key, fingerprint)
+        if not claimed:
+            return replay(record, fingerprint)
+
+        try:
+            # One transaction for the view and the stored answer: a crash in
+            # between leaves neither, so a takeover never repeats a booking
+            with transaction.atomic():
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code < 500 and not complete(record, response):
+                    raise Superseded
+        except Superseded:
+            return replay(None, fingerprint)
+        except Exception:
+            # Validation errors and 404s raised for DRF to render; cheap to run again
+            release(record)
+            raise
+        if response.status_code >= 500:
+            release(record)
+        return response
+
+    return wrapper
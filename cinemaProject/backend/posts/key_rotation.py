@@ -0,0 +1,171 @@
+# posts/key_rotation.py
+"""
+Re-encryption of encrypted model fields after FIELD_ENCRYPTION_KEY rotation.
+
+FIELD_ENCRYPTION_KEY is a list, newest first: new writes use the first key
+and every key still decrypts, so the site keeps working while old rows are
+moved over. ``rotate_model`` streams (pk, ciphertext) pairs in primary-key
+order with ``iterator()``, so only one chunk is ever in memory, and checks
+each token against the primary key first: rows already on it are skipped
+without a write. Each chunk of stale rows is rewritten with one batched
+UPDATE in its own short transaction, together with the job's ``last_pk``
+checkpoint, so an interrupted run resumes after the last committed chunk.
+"""
+import hashlib
+import itertools
+import time
+
+from cryptography.fernet import Fernet, InvalidToken
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from django.utils import timezone
+from encrypted_model_fields import fields as encrypted_fields
+
+from .models import EncryptionRotationJob
+
+
+class KeyRotationError(Exception):
+    """A stored value cannot be decrypted with any configured key."""
+
+
+def configured_keys():
+    keys = settings.FIELD_ENCRYPTION_KEY
+    return list(keys) if isinstance(keys, (list, tuple)) else [keys]
+
+
+def key_fingerprint(key):
+    if isinstance(key, str):
+        key = key.encode()
+    return hashlib.sha256(key).hexdigest()[:16]
+
+
+def encrypted_models():
+    """``(model, [field names])`` for every installed model with encrypted fields."""
+    found = []
+    for model in apps.get_models():
+        names = [
+            field.name
+            for field in model._meta.concrete_fields
+            if isinstance(field, encrypted_fields.EncryptedMixin)
+        ]
+        if names:
+            found.append((model, names))
+    return found
+
+
+def _raw_tokens(model, field_names, after_pk):
+    # Cast to plain text so the ciphertext comes back untouched; the
+    # encrypted field would decrypt it (and hide undecryptable values)
+    raw = {f"raw_{name}": Cast(name, TextField()) for name in field_names}
+    return (
+        model.objects.filter(pk__gt=after_pk)
+        .order_by("pk")
+        .annotate(**raw)
+        .values_list("pk", *raw)
+    )
+
+
+def _stale_rows(model, rows, primary):
+    """``{pk: (tokens, new tokens)}`` for rows with any token not under the primary key."""
+    stale = {}
+    for pk, *tokens in rows:
+        current = True
+        for token in tokens:
+            if token is None:
+                continue
+            try:
+                primary.decrypt(token.encode())
+            except InvalidToken:
+                current = False
+                break
+        if current:
+            continue
+        try:
+            # MultiFernet.rotate decrypts with any key and re-encrypts with the first
+            rotated = [
+                None if token is None else encrypted_fields.CRYPTER.rotate(token.encode()).decode()
+                for token in tokens
+            ]
+        except InvalidToken:
+            raise KeyRotationError(
+                f"{model._meta.label} #{pk} is not readable with any configured key; "
+                "add the key it was written with to FIELD_ENCRYPTION_KEY"
+            ) from None
+        stale[pk] = (tuple(tokens), rotated)
+    return stale
+
+
+def _rewrite(model, field_names, stale, using):
+    """Store the re-encrypted tokens of stale rows; returns how many were written."""
+    # Lock only this chunk, and skip rows a live save changed since they were read:
+    # that save already wrote them under the primary key.
+    locked = _raw_tokens(model, field_names, 0).using(using).filter(pk__in=list(stale)).select_for_update()
+    params = []
+    for pk, *tokens in locked:
+        read_tokens, rotated = stale[pk]
+        if tuple(tokens) == read_tokens:
+            params.append([*rotated, pk])
+
+    # Raw UPDATE: the encrypted fields encrypt whatever they are handed,
+    # including the CASE expression bulk_update() would pass them
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    assignments = ", ".join(f"{quote(model._meta.get_field(name).column)} = %s" for name in field_names)
+    sql = f"UPDATE {quote(model._meta.db_table)} SET {assignments} WHERE {quote(model._meta.pk.column)} = %s"
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+    return len(params)
+
+
+def start_rotation(model, restart=False):
+    """The job for rotating ``model`` to the current primary key."""
+    job, created = EncryptionRotationJob.objects.get_or_create(
+        model_label=model._meta.label,
+        key_fingerprint=key_fingerprint(configured_keys()[0]),
+    )
+    if restart and not created:
+        job.last_pk = job.scanned_count = job.rotated_count = 0
+        job.started_at = timezone.now()
+        job.finished_at = None
+        job.save()
+    return job
+
+
+def rotate_model(model, field_names, chunk_size=None, pause=0.0, progress=None):
+    """
+    Re-encrypt every row of ``model`` under the primary key, resuming its job.
+
+    ``pause`` seconds are slept between chunks to leave room for live
+    traffic; ``progress(job)`` is called after every committed chunk.
+    Returns the finished job.
+    """
+    chunk_size = chunk_size or settings.FIELD_ENCRYPTION_ROTATION_CHUNK_SIZE
+    primary = Fernet(configured_keys()[0])
+    job = start_rotation(model)
+    if job.finished_at:
+        return job
+
+    using = router.db_for_write(model)
+    rows = _raw_tokens(model, field_names, job.last_pk).using(using).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        stale = _stale_rows(model, chunk, primary)
+        with transaction.atomic(using=using):
+            rotated = _rewrite(model, field_names, stale, using) if stale else 0
+            job.last_pk = chunk[-1][0]
+            job.scanned_count += len(chunk)
+            job.rotated_count += rotated
+            job.save(update_fields=["last_pk", "scanned_count", "rotated_count", "updated_at"])
+        if progress:
+            progress(job)
+        if pause:
+            time.sleep(pause)
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=["finished_at", "updated_at"])
+    return job
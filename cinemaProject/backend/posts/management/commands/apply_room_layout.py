@@ -0,0 +1,51 @@
+# posts/management/commands/apply_room_layout.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import room_layouts
+from posts.models import MovieRoom
+
+
+class Command(BaseCommand):
+    help = (
+        "Materialize a declarative layout into a room's seats. Without --file the "
+        "room gets standard rows sized to its capacity. --empty-rooms does that for "
+        "every room that has no seats yet (rooms are no longer seated on first view)."
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--room", help="Room id or name")
+        target.add_argument("--empty-rooms", action="store_true", help="Seat every room without seats")
+        parser.add_argument("--file", help="JSON layout to apply (see posts/room_layouts.py)")
+
+    def handle(self, *args, **options):
+        spec = None
+        if options["file"]:
+            try:
+                with open(options["file"]) as f:
+                    spec = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read layout: {e}")
+
+        if options["empty_rooms"]:
+            rooms = list(MovieRoom.objects.filter(seats__isnull=True).order_by("pk"))
+        else:
+            lookup = {"pk": options["room"]} if options["room"].isdigit() else {"name": options["room"]}
+            try:
+                rooms = [MovieRoom.objects.get(**lookup)]
+            except MovieRoom.DoesNotExist:
+                raise CommandError(f"No room {options['room']!r}")
+
+        for room in rooms:
+            try:
+                changes = room_layouts.apply_layout(room, spec or room_layouts.default_layout(room.capacity))
+            except room_layouts.LayoutError as e:
+                raise CommandError(f"{room.name}: {e}")
+            self.stdout.write(
+                f"{room.name}: {changes['created']} seat(s) created, {changes['updated']} updated, "
+                f"{changes['removed']} removed"
+            )
+        if not rooms:
+            self.stdout.write("Every room already has seats")
@@ -0,0 +1,34 @@
+# posts/management/commands/backfill_user_profiles.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from posts.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the missing UserProfile for users created before profiles were "
+        "made at signup (the login path no longer creates them on the fly). "
+        "Migration 0020 already does this once; rerun it after loading users "
+        "without their profiles, e.g. from a fixture."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Profiles inserted per statement")
+
+    def handle(self, *args, **options):
+        created = 0
+        while True:
+            user_ids = list(
+                User.objects.filter(profile__isnull=True)
+                .order_by("pk")
+                .values_list("pk", flat=True)[: options["batch_size"]]
+            )
+            if not user_ids:
+                break
+            UserProfile.objects.bulk_create(
+                [UserProfile(user_id=user_id) for user_id in user_ids], ignore_conflicts=True
+            )
+            created += len(user_ids)
+
+        self.stdout.write(f"Created {created} missing profile(s)")
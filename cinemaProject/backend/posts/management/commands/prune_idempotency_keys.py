@@ -0,0 +1,52 @@
+# posts/management/commands/prune_idempotency_keys.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from posts.models import IdempotencyRecord
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired booking idempotency keys, then the oldest keys beyond "
+        "IDEMPOTENCY_MAX_KEYS, in small batches so live bookings are not blocked."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per transaction")
+        parser.add_argument(
+            "--max-keys",
+            type=int,
+            default=settings.IDEMPOTENCY_MAX_KEYS,
+            help="Keep at most this many of the newest keys",
+        )
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        max_keys = options["max_keys"]
+        if max_keys < 1:
+            raise CommandError("--max-keys must be at least 1")
+        expired = self.sweep(IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()), options)
+
+        # Keys are claimed in pk order, so everything below the max_keys-th newest pk goes
+        oldest_kept = list(IdempotencyRecord.objects.order_by("-pk").values_list("pk", flat=True)[max_keys - 1 : max_keys])
+        evicted = 0
+        if oldest_kept:
+            evicted = self.sweep(IdempotencyRecord.objects.filter(pk__lt=oldest_kept[0]).order_by("pk"), options)
+
+        self.stdout.write(f"Deleted {expired} expired and {evicted} over-limit idempotency key(s)")
+
+    def sweep(self, queryset, options):
+        deleted = 0
+        while True:
+            ids = list(queryset.values_list("pk", flat=True)[: options["batch_size"]])
+            if not ids:
+                return deleted
+            with transaction.atomic():
+                IdempotencyRecord.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+            if options["pause"]:
+                time.sleep(options["pause"])
@@ -0,0 +1,46 @@
+# posts/management/commands/prune_sent_emails.py
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from posts.models import OutboundEmail
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete outbox emails delivered more than OUTBOX_SENT_RETENTION_DAYS ago, "
+        "in small batches so the email worker is not blocked."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per transaction")
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.OUTBOX_SENT_RETENTION_DAYS,
+            help="Keep emails sent within this many days",
+        )
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        if options["days"] < 0:
+            raise CommandError("--days must not be negative")
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        sent = OutboundEmail.objects.filter(status=OutboundEmail.Status.SENT, sent_at__lt=cutoff).order_by("pk")
+
+        deleted = 0
+        while True:
+            ids = list(sent.values_list("pk", flat=True)[: options["batch_size"]])
+            if not ids:
+                break
+            with transaction.atomic():
+                OutboundEmail.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(f"Deleted {deleted} sent email(s)")
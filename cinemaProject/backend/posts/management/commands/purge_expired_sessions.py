@@ -0,0 +1,36 @@
+# posts/management/commands/purge_expired_sessions.py
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions in small batches, one short transaction each, "
+        "so logins and requests are never blocked behind one large DELETE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Sessions deleted per transaction")
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now()
+        deleted = 0
+        while True:
+            # Cached copies expire on their own at the same time as the row
+            keys = list(
+                Session.objects.filter(expire_date__lt=cutoff)
+                .values_list("session_key", flat=True)[: options["batch_size"]]
+            )
+            if not keys:
+                break
+            with transaction.atomic():
+                deleted += Session.objects.filter(session_key__in=keys, expire_date__lt=cutoff).delete()[0]
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(f"Deleted {deleted} expired session(s)")
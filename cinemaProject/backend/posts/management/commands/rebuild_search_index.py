@@ -0,0 +1,24 @@
+# posts/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = (
+        "Recreate the movie full-text index and its triggers, then reindex every "
+        "movie. `migrate` already does this when the triggers are missing; use it "
+        "to repair an index changed by hand."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if not search.uses_fts(connection):
+            self.stdout.write("Full-text index is SQLite-only; nothing to do")
+            return
+        search.install_index(connection)
+        self.stdout.write("Rebuilt the movie search index")
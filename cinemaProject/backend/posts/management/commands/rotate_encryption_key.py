@@ -0,0 +1,59 @@
+# posts/management/commands/rotate_encryption_key.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import key_rotation
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encrypt every encrypted model field under the first FIELD_ENCRYPTION_KEY, "
+        "in chunks. Progress is checkpointed, so rerunning after a crash resumes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=None, help="Rows per transaction")
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between chunks")
+        parser.add_argument(
+            "--restart", action="store_true", help="Ignore saved checkpoints and scan every row again"
+        )
+
+    def handle(self, *args, **options):
+        keys = key_rotation.configured_keys()
+        self.stdout.write(
+            f"Rotating to key {key_rotation.key_fingerprint(keys[0])} ({len(keys) - 1} older key(s) configured)"
+        )
+
+        for model, field_names in key_rotation.encrypted_models():
+            label = model._meta.label
+            job = key_rotation.start_rotation(model, restart=options["restart"])
+            if job.finished_at:
+                self.stdout.write(f"{label}: already rotated ({job.scanned_count} rows)")
+                continue
+            if job.last_pk:
+                self.stdout.write(f"{label}: resuming after pk {job.last_pk}")
+
+            started = time.perf_counter()
+            scanned_before = job.scanned_count
+
+            def report(job, label=label):
+                elapsed = time.perf_counter() - started
+                rate = (job.scanned_count - scanned_before) / elapsed if elapsed else 0
+                self.stdout.write(
+                    f"{label}: {job.scanned_count} scanned, {job.rotated_count} re-encrypted, "
+                    f"up to pk {job.last_pk} ({rate:.0f} rows/sec)"
+                )
+
+            try:
+                job = key_rotation.rotate_model(
+                    model, field_names, chunk_size=options["chunk_size"], pause=options["pause"], progress=report
+                )
+            except key_rotation.KeyRotationError as e:
+                raise CommandError(str(e))
+
+            elapsed = time.perf_counter() - started
+            rate = (job.scanned_count - scanned_before) / elapsed if elapsed else 0
+            self.stdout.write(self.style.SUCCESS(
+                f"{label}: done, {job.rotated_count} of {job.scanned_count} rows re-encrypted ({rate:.0f} rows/sec)"
+            ))
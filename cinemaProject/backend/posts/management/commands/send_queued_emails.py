@@ -0,0 +1,55 @@
+# posts/management/commands/send_queued_emails.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.outbox import drain_outbox
+from posts.promotion_mailer import advance_promotion_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued outbox emails in batches, one SMTP connection per batch, "
+        "and advance pending promotion blasts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Emails per SMTP connection")
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when idle")
+        parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls with --loop")
+        parser.add_argument(
+            "--promotion-chunks",
+            type=int,
+            default=10,
+            help="Promotion chunks to send per poll with --loop, so transactional mail is not starved",
+        )
+
+    def handle(self, *args, **options):
+        if not options["loop"]:
+            self.poll(options)
+            while advance_promotion_jobs():
+                pass
+            return
+
+        while True:
+            try:
+                chunks = self.poll(options)
+            except Exception as e:
+                # An SMTP or database outage must not kill the worker; try again next poll
+                self.stderr.write(f"Email worker error: {e!r}")
+                chunks = 0
+            if not chunks:
+                time.sleep(options["interval"])
+
+    def poll(self, options):
+        """Drain the outbox once; with --loop, advance promotions a few chunks."""
+        sent, failed = drain_outbox(options["batch_size"])
+        if sent or failed:
+            self.stdout.write(f"Sent {sent} email(s), {failed} failed")
+        if not options["loop"]:
+            return 0
+
+        chunks = advance_promotion_jobs(max_chunks=options["promotion_chunks"])
+        if chunks:
+            self.stdout.write(f"Sent {chunks} promotion chunk(s)")
+        return chunks
@@ -0,0 +1,57 @@
+# posts/management/commands/sweep_account_tokens.py
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from posts.models import AccountToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired verification/reset tokens and accounts that were never "
+        "verified, in small batches so the sweep never holds a long lock."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows deleted per transaction")
+        parser.add_argument(
+            "--unverified-days",
+            type=int,
+            default=7,
+            help="Delete inactive, unverified accounts older than this (0 keeps them)",
+        )
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        tokens = self.sweep(AccountToken.objects.filter(expires_at__lt=now), options)
+
+        accounts = 0
+        if options["unverified_days"] > 0:
+            cutoff = now - timedelta(days=options["unverified_days"])
+            # Admin-deactivated accounts keep is_verified=True and are left alone
+            stale = User.objects.filter(
+                is_active=False,
+                is_staff=False,
+                date_joined__lt=cutoff,
+                profile__is_verified=False,
+            )
+            accounts = self.sweep(stale, options)
+
+        self.stdout.write(f"Deleted {tokens} expired token(s) and {accounts} unverified account(s)")
+
+    def sweep(self, queryset, options):
+        deleted = 0
+        while True:
+            ids = list(queryset.values_list("pk", flat=True)[: options["batch_size"]])
+            if not ids:
+                return deleted
+            with transaction.atomic():
+                queryset.model.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+            if options["pause"]:
+                time.sleep(options["pause"])
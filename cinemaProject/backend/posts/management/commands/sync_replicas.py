@@ -0,0 +1,45 @@
+# posts/management/commands/sync_replicas.py
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto every replica in DATABASE_REPLICAS "
+        "using SQLite's online backup API (readers keep working during the copy)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep copying instead of exiting after one pass")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds between copies with --loop")
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES["default"]
+        targets = [settings.DATABASES[alias] for alias in settings.DATABASE_REPLICAS]
+        if not targets:
+            raise CommandError("No replicas configured; set DJANGO_DB_REPLICAS")
+        for config in [primary, *targets]:
+            if config["ENGINE"] != "django.db.backends.sqlite3":
+                raise CommandError("sync_replicas only copies SQLite files; use the server's own replication")
+
+        while True:
+            started = time.perf_counter()
+            source = sqlite3.connect(str(primary["NAME"]), timeout=20)
+            try:
+                for config in targets:
+                    target = sqlite3.connect(str(config["NAME"]), timeout=20)
+                    try:
+                        source.backup(target)
+                    finally:
+                        target.close()
+            finally:
+                source.close()
+
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stdout.write(f"Synced {len(targets)} replica(s) in {elapsed:.1f} ms")
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_outboundemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PromotionEmailJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('COMPLETED', 'Completed'), ('FAILED', 'Failed')], default='PENDING', max_length=10)),
+                ('total_recipients', models.PositiveIntegerField(default=0)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('last_profile_id', models.BigIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('promotion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='email_jobs', to='posts.promotion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='posts_promo_status_1016e5_idx')],
+            },
+        ),
+    ]
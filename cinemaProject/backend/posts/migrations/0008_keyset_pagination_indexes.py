@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_promotionemailjob'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='showtime',
+            name='posts_showt_starts__2b732f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['customer', '-created_at', 'id'], name='posts_booki_custome_4e2c6a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['title', 'id'], name='posts_movie_title_84e7e4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['category', 'title', 'id'], name='posts_movie_categor_a85c64_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='showtime',
+            index=models.Index(fields=['starts_at', 'id'], name='posts_showt_starts__9e159d_idx'),
+        ),
+    ]
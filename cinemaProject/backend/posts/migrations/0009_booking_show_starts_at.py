@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:33
+
+from django.db import migrations, models
+from django.db.models import Min, OuterRef, Subquery
+
+
+def backfill_show_starts_at(apps, schema_editor):
+    Booking = apps.get_model("posts", "Booking")
+    Ticket = apps.get_model("posts", "Ticket")
+    first_show = (
+        Ticket.objects.filter(booking=OuterRef("pk"))
+        .values("booking")
+        .annotate(first=Min("showtime__starts_at"))
+        .values("first")
+    )
+    Booking.objects.filter(show_starts_at__isnull=True).update(show_starts_at=Subquery(first_show))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='show_starts_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['customer', 'show_starts_at'], name='posts_booki_custome_42b51b_idx'),
+        ),
+        migrations.RunPython(backfill_show_starts_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:44
+
+import hashlib
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def move_tokens(apps, schema_editor):
+    """Hash the plaintext profile tokens into AccountToken, keeping their expiry."""
+    UserProfile = apps.get_model("posts", "UserProfile")
+    AccountToken = apps.get_model("posts", "AccountToken")
+    kinds = [
+        ("verification_token", "verification_token_created", "VERIFY_EMAIL", timedelta(hours=24)),
+        ("reset_token", "reset_token_created", "RESET_PASSWORD", timedelta(hours=1)),
+    ]
+    tokens = []
+    for token_field, created_field, purpose, lifetime in kinds:
+        profiles = UserProfile.objects.exclude(**{f"{token_field}__isnull": True}).exclude(**{token_field: ""})
+        for user_id, raw, created in profiles.values_list("user_id", token_field, created_field).iterator():
+            if created is None:
+                continue
+            tokens.append(AccountToken(
+                user_id=user_id,
+                purpose=purpose,
+                token_hash=hashlib.sha256(raw.encode()).hexdigest(),
+                expires_at=created + lifetime,
+            ))
+    AccountToken.objects.bulk_create(tokens, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_booking_show_starts_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purpose', models.CharField(choices=[('VERIFY_EMAIL', 'Verify email'), ('RESET_PASSWORD', 'Reset password')], max_length=20)),
+                ('token_hash', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='account_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'purpose'], name='posts_accou_user_id_a3b50a_idx')],
+            },
+        ),
+        migrations.RunPython(move_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='reset_token',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='reset_token_created',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='verification_token',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='verification_token_created',
+        ),
+        # auth_user belongs to django.contrib.auth, so its email index is raw SQL
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS posts_auth_user_email_idx ON auth_user (email);",
+            "DROP INDEX IF EXISTS posts_auth_user_email_idx;",
+        ),
+    ]
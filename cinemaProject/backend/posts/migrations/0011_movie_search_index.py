@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:12
+
+from django.db import migrations
+
+# Snapshot of posts.search.SQLITE_SCHEMA at the time of this migration
+SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_movie_fts USING fts5(
+        title, description, genre,
+        content='posts_movie', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_movie_fts_ai AFTER INSERT ON posts_movie BEGIN
+        INSERT INTO posts_movie_fts(rowid, title, description, genre)
+        VALUES (new.id, new.title, new.description, new.genre);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_movie_fts_ad AFTER DELETE ON posts_movie BEGIN
+        INSERT INTO posts_movie_fts(posts_movie_fts, rowid, title, description, genre)
+        VALUES ('delete', old.id, old.title, old.description, old.genre);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_movie_fts_au AFTER UPDATE OF title, description, genre ON posts_movie BEGIN
+        INSERT INTO posts_movie_fts(posts_movie_fts, rowid, title, description, genre)
+        VALUES ('delete', old.id, old.title, old.description, old.genre);
+        INSERT INTO posts_movie_fts(rowid, title, description, genre)
+        VALUES (new.id, new.title, new.description, new.genre);
+    END
+    """,
+    "INSERT INTO posts_movie_fts(posts_movie_fts) VALUES ('rebuild')",
+]
+
+
+def create_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other databases search with plain lookups
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in SCHEMA:
+        schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for trigger in ("ai", "ad", "au"):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS posts_movie_fts_{trigger}")
+    schema_editor.execute("DROP TABLE IF EXISTS posts_movie_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_account_tokens'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:05
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_show_date(apps, schema_editor):
+    Showtime = apps.get_model("posts", "Showtime")
+    batch = []
+    for showtime in Showtime.objects.only("id", "starts_at").iterator(chunk_size=1000):
+        showtime.show_date = timezone.localdate(showtime.starts_at)
+        batch.append(showtime)
+        if len(batch) == 1000:
+            Showtime.objects.bulk_update(batch, ["show_date"])
+            batch = []
+    Showtime.objects.bulk_update(batch, ["show_date"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_movie_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='showtime',
+            name='show_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_show_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='showtime',
+            name='show_date',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='showtime',
+            index=models.Index(fields=['movie', 'starts_at'], name='showtime_movie_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='showtime',
+            index=models.Index(fields=['movie', 'show_date', 'starts_at'], name='showtime_movie_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='showtime',
+            index=models.Index(fields=['movie_room', 'show_date', 'starts_at'], name='showtime_room_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='showtime',
+            index=models.Index(fields=['show_date', 'starts_at'], name='showtime_day_idx'),
+        ),
+    ]
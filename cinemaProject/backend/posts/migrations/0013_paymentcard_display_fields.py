@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+# Snapshot of posts.models.card_brand at the time of this migration
+def card_brand(digits):
+    if digits[:1] == "4":
+        return "visa"
+    if digits[:2] in ("34", "37"):
+        return "amex"
+    if "51" <= digits[:2] <= "55" or "2221" <= digits[:4] <= "2720":
+        return "mastercard"
+    if digits[:4] == "6011" or digits[:2] == "65" or "644" <= digits[:3] <= "649":
+        return "discover"
+    return ""
+
+
+def backfill_display_fields(apps, schema_editor):
+    # Historical models keep the encrypted field class, so card_number decrypts here
+    PaymentCard = apps.get_model("posts", "PaymentCard")
+    cards = []
+    for card in PaymentCard.objects.only("id", "card_number").iterator(chunk_size=500):
+        digits = card.card_number.replace(" ", "").replace("-", "")
+        card.card_last4 = digits[-4:]
+        card.card_brand = card_brand(digits)
+        cards.append(card)
+    PaymentCard.objects.bulk_update(cards, ["card_last4", "card_brand"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_showtime_show_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentcard',
+            name='card_brand',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='paymentcard',
+            name='card_last4',
+            field=models.CharField(blank=True, editable=False, max_length=4),
+        ),
+        migrations.RunPython(backfill_display_fields, migrations.RunPython.noop),
+    ]
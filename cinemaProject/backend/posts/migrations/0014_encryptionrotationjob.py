@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_paymentcard_display_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EncryptionRotationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100)),
+                ('key_fingerprint', models.CharField(max_length=16)),
+                ('last_pk', models.BigIntegerField(default=0)),
+                ('scanned_count', models.PositiveIntegerField(default=0)),
+                ('rotated_count', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('model_label', 'key_fingerprint')},
+            },
+        ),
+    ]
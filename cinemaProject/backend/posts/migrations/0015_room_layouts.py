@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_encryptionrotationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movieroom',
+            name='layout',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='seat',
+            name='column',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='seat',
+            name='seat_class',
+            field=models.CharField(choices=[('STANDARD', 'Standard'), ('PREMIUM', 'Premium'), ('ACCESSIBLE', 'Accessible')], default='STANDARD', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_idempotencyrecord'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movieroom',
+            name='layout_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
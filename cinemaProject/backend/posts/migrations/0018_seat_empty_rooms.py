@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:40
+
+import math
+
+from django.db import migrations
+from django.db.models import F
+
+ROW_NAMES = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+MAX_COLUMNS = 60
+DEFAULT_ROW_WIDTH = 12
+
+
+# Snapshot of posts.room_layouts.default_layout at the time of this migration
+def default_layout(capacity):
+    width = max(DEFAULT_ROW_WIDTH, math.ceil(capacity / len(ROW_NAMES)))
+    if capacity < 1 or width > MAX_COLUMNS - 2:
+        return None
+    rows = []
+    remaining = capacity
+    for name in ROW_NAMES:
+        if not remaining:
+            break
+        count = min(width, remaining)
+        remaining -= count
+        cells = "s" * count
+        if count >= 8:
+            cells = f"ss {'s' * (count - 4)} ss"
+        rows.append({"name": name, "seats": cells})
+    return {"rows": rows}
+
+
+def seat_empty_rooms(apps, schema_editor):
+    # Rooms used to be seated on their first seat-map view; seat the ones never viewed
+    MovieRoom = apps.get_model("posts", "MovieRoom")
+    Seat = apps.get_model("posts", "Seat")
+    for room in MovieRoom.objects.filter(seats__isnull=True).order_by("pk"):
+        spec = default_layout(room.capacity)
+        if spec is None:
+            # Needs an explicit layout: manage.py apply_room_layout --room ... --file ...
+            continue
+        seats = []
+        for row in spec["rows"]:
+            number = 0
+            for column, code in enumerate(row["seats"], start=1):
+                if code == "s":
+                    number += 1
+                    seats.append(Seat(movie_room=room, row=row["name"], number=number, column=column, seat_class="STANDARD"))
+        Seat.objects.bulk_create(seats)
+        MovieRoom.objects.filter(pk=room.pk).update(layout=spec, layout_version=F("layout_version") + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_movieroom_layout_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(seat_empty_rooms, migrations.RunPython.noop),
+    ]
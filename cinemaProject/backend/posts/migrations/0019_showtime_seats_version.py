@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_seat_empty_rooms'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='showtime',
+            name='seats_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:30
+
+from django.db import migrations
+
+
+def backfill_user_profiles(apps, schema_editor):
+    # Profiles used to be created on login; users who never logged in since have none
+    User = apps.get_model("auth", "User")
+    UserProfile = apps.get_model("posts", "UserProfile")
+    while True:
+        user_ids = list(User.objects.filter(profile__isnull=True).order_by("pk").values_list("pk", flat=True)[:1000])
+        if not user_ids:
+            break
+        UserProfile.objects.bulk_create([UserProfile(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('posts', '0019_showtime_seats_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_profiles, migrations.RunPython.noop),
+    ]
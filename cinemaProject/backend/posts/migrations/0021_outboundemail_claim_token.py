@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_backfill_user_profiles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboundemail',
+            name='claim_token',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+    ]
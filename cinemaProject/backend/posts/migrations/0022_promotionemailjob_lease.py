@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    # Racing send_email requests could queue two blasts; keep the newest one per promotion
+    PromotionEmailJob = apps.get_model("posts", "PromotionEmailJob")
+    seen = set()
+    active = PromotionEmailJob.objects.filter(status__in=["PENDING", "RUNNING"]).order_by("-created_at", "-pk")
+    for job in active.only("pk", "promotion_id"):
+        if job.promotion_id in seen:
+            PromotionEmailJob.objects.filter(pk=job.pk).update(
+                status="FAILED", last_error="Duplicate of a newer blast for the same promotion"
+            )
+        seen.add(job.promotion_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_outboundemail_claim_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='promotionemailjob',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='promotionemailjob',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='promotionemailjob',
+            name='claim_token',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(fail_duplicate_active_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='promotionemailjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'RUNNING'])), fields=('promotion',), name='one_active_job_per_promotion'),
+        ),
+    ]
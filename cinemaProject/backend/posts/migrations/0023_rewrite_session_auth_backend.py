@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:30
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY
+from django.core.cache import caches
+from django.db import migrations
+from django.utils import timezone
+
+OLD_BACKEND = "django.contrib.auth.backends.ModelBackend"
+NEW_BACKEND = "posts.hashing.PooledModelBackend"
+BATCH_SIZE = 500
+
+
+def rewrite_backend(apps, old, new):
+    # get_user() drops sessions whose backend is no longer in AUTHENTICATION_BACKENDS
+    from django.contrib.sessions.backends.cached_db import KEY_PREFIX
+    from django.contrib.sessions.backends.db import SessionStore
+
+    Session = apps.get_model("sessions", "Session")
+    store = SessionStore()
+    changed = []
+    for session in Session.objects.filter(expire_date__gt=timezone.now()).iterator(chunk_size=BATCH_SIZE):
+        data = store.decode(session.session_data)
+        if data.get(BACKEND_SESSION_KEY) != old:
+            continue
+        data[BACKEND_SESSION_KEY] = new
+        session.session_data = store.encode(data)
+        changed.append(session)
+    Session.objects.bulk_update(changed, ["session_data"], batch_size=BATCH_SIZE)
+    # cached_db sessions are read from the cache first
+    caches[getattr(settings, "SESSION_CACHE_ALIAS", "default")].delete_many(
+        [KEY_PREFIX + session.session_key for session in changed]
+    )
+
+
+def forwards(apps, schema_editor):
+    rewrite_backend(apps, OLD_BACKEND, NEW_BACKEND)
+
+
+def backwards(apps, schema_editor):
+    rewrite_backend(apps, NEW_BACKEND, OLD_BACKEND)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_promotionemailjob_lease'),
+        ('sessions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
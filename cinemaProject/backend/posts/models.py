@@ -1,10 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils.text import slugify
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from encrypted_model_fields.fields import EncryptedCharField
-import uuid
+import hashlib
+import secrets
 from datetime import timedelta
 
 
@@ -31,6 +32,13 @@ class Movie(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Keyset pagination seeks on (title, id), optionally within a category
+        indexes = [
+            models.Index(fields=["title", "id"]),
+            models.Index(fields=["category", "title", "id"]),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
@@ -58,12 +66,6 @@ class UserProfile(models.Model):
 
     # Verification
     is_verified = models.BooleanField(default=False)
-    verification_token = models.CharField(max_length=100, blank=True, null=True)
-    verification_token_created = models.DateTimeField(null=True, blank=True)
-
-    # Password reset
-    reset_token = models.CharField(max_length=100, blank=True, null=True)
-    reset_token_created = models.DateTimeField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -72,33 +74,88 @@ class UserProfile(models.Model):
         return f"Profile for {self.user.username}"
 
     def generate_verification_token(self):
-        self.verification_token = str(uuid.uuid4())
-        self.verification_token_created = timezone.now()
-        self.save()
-        return self.verification_token
-
-    def is_verification_token_valid(self):
-        if not self.verification_token_created:
-            return False
-        expiry = self.verification_token_created + timedelta(hours=24)
-        return timezone.now() < expiry
+        return AccountToken.issue(self.user, AccountToken.Purpose.VERIFY_EMAIL)
 
     def generate_reset_token(self):
-        self.reset_token = str(uuid.uuid4())
-        self.reset_token_created = timezone.now()
-        self.save()
-        return self.reset_token
+        return AccountToken.issue(self.user, AccountToken.Purpose.RESET_PASSWORD)
+
 
-    def is_reset_token_valid(self):
-        if not self.reset_token_created:
-            return False
-        expiry = self.reset_token_created + timedelta(hours=1)
-        return timezone.now() < expiry
+# ---------------------------------------------------------
+# ACCOUNT TOKENS (email verification, password reset)
+# ---------------------------------------------------------
+class AccountToken(models.Model):
+    """
+    Single-use emailed token. Only the SHA-256 of the token is stored, in a
+    unique index, so a link lookup is one index probe and a leaked table
+    cannot be replayed.
+    """
+    class Purpose(models.TextChoices):
+        VERIFY_EMAIL = "VERIFY_EMAIL", "Verify email"
+        RESET_PASSWORD = "RESET_PASSWORD", "Reset password"
+
+    LIFETIMES = {
+        Purpose.VERIFY_EMAIL: timedelta(hours=24),
+        Purpose.RESET_PASSWORD: timedelta(hours=1),
+    }
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="account_tokens")
+    purpose = models.CharField(max_length=20, choices=Purpose.choices)
+    token_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "purpose"])]
+
+    def __str__(self):
+        return f"{self.get_purpose_display()} token for {self.user_id}"
+
+    @staticmethod
+    def hash(raw_token):
+        return hashlib.sha256(raw_token.encode()).hexdigest()
+
+    @classmethod
+    def issue(cls, user, purpose):
+        """Replace the user's token for ``purpose`` and return the raw value to email."""
+        raw_token = secrets.token_urlsafe(32)
+        cls.objects.filter(user=user, purpose=purpose).delete()
+        cls.objects.create(
+            user=user,
+            purpose=purpose,
+            token_hash=cls.hash(raw_token),
+            expires_at=timezone.now() + cls.LIFETIMES[purpose],
+        )
+        return raw_token
+
+    @classmethod
+    def lookup(cls, raw_token, purpose):
+        return (
+            cls.objects.select_related("user", "user__profile")
+            .filter(token_hash=cls.hash(raw_token), purpose=purpose)
+            .first()
+        )
+
+    def is_expired(self):
+        return timezone.now() >= self.expires_at
 
 
 # ---------------------------------------------------------
 # PAYMENT CARD (encrypted)
 # ---------------------------------------------------------
+def card_brand(card_number):
+    """Card network from the number's leading digits ("" if unknown)."""
+    digits = card_number.replace(" ", "").replace("-", "")
+    if digits[:1] == "4":
+        return "visa"
+    if digits[:2] in ("34", "37"):
+        return "amex"
+    if "51" <= digits[:2] <= "55" or "2221" <= digits[:4] <= "2720":
+        return "mastercard"
+    if digits[:4] == "6011" or digits[:2] == "65" or "644" <= digits[:3] <= "649":
+        return "discover"
+    return ""
+
+
 class PaymentCard(models.Model):
     """Encrypted payment card model (up to 4 per user)."""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="payment_cards")
@@ -110,6 +167,12 @@ class PaymentCard(models.Model):
     expiry_year = models.IntegerField()
     cvv = EncryptedCharField(max_length=4)
 
+    # Display projection of card_number, kept by save(). Reads that only
+    # show the card use these and defer the encrypted columns, which are
+    # decrypted as soon as they are loaded.
+    card_last4 = models.CharField(max_length=4, blank=True, editable=False)
+    card_brand = models.CharField(max_length=20, blank=True, editable=False)
+
     # Billing address
     billing_street = models.CharField(max_length=255, blank=True)
     billing_city = models.CharField(max_length=100, blank=True)
@@ -120,16 +183,29 @@ class PaymentCard(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    SECRET_FIELDS = ("card_number", "cvv")
+
     class Meta:
         ordering = ["-is_default", "-created_at"]
 
     def __str__(self):
-        try:
-            return f"{self.card_holder_name} - ****{self.card_number[-4:]}"
-        except Exception:
-            return f"{self.card_holder_name} - [encrypted]"
+        return f"{self.card_holder_name} - ****{self.card_last4}"
+
+    @classmethod
+    def for_display(cls, user):
+        """A user's cards without loading (and decrypting) the number or CVV."""
+        return cls.objects.filter(user=user).defer(*cls.SECRET_FIELDS)
 
     def save(self, *args, **kwargs):
+        # Deferred means card_number was not loaded, so it cannot have changed
+        if "card_number" not in self.get_deferred_fields():
+            digits = self.card_number.replace(" ", "").replace("-", "")
+            self.card_last4 = digits[-4:]
+            self.card_brand = card_brand(digits)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "card_number" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "card_last4", "card_brand"}
+
         if not self.pk:
             if PaymentCard.objects.filter(user=self.user).count() >= 4:
                 raise ValueError("Cannot add more than 4 payment cards per user")
@@ -164,15 +240,37 @@ class Promotion(models.Model):
 class MovieRoom(models.Model):
     name = models.CharField(max_length=50, unique=True)
     capacity = models.PositiveIntegerField()
+    # Declarative layout last materialized into this room's seats (see posts.room_layouts)
+    layout = models.JSONField(null=True, blank=True)
+    # Bumped in the transaction of every seat change; keys the cached seat grid
+    # so every worker process moves to the new seats once it commits
+    layout_version = models.PositiveIntegerField(default=0, editable=False)
+
+    def save(self, *args, **kwargs):
+        # Never write back a version read before a concurrent seat change
+        if self.pk is not None and not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "layout_version"
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
 
 class Seat(models.Model):
+    class SeatClass(models.TextChoices):
+        STANDARD = "STANDARD", "Standard"
+        PREMIUM = "PREMIUM", "Premium"
+        ACCESSIBLE = "ACCESSIBLE", "Accessible"
+
     movie_room = models.ForeignKey(MovieRoom, on_delete=models.CASCADE, related_name="seats")
     row = models.CharField(max_length=1)
     number = models.IntegerField()
+    # Position in the room grid, counting aisles and gaps; None means the same as number
+    column = models.PositiveSmallIntegerField(null=True, blank=True)
+    seat_class = models.CharField(max_length=10, choices=SeatClass.choices, default=SeatClass.STANDARD)
 
     class Meta:
         unique_together = (("movie_room", "row", "number"),)
@@ -181,6 +279,49 @@ class Seat(models.Model):
         return f"{self.movie_room.name} - {self.row}{self.number}"
 
 
+def local_show_date(starts_at):
+    """Calendar date of a start time in the theatre's TIME_ZONE."""
+    return timezone.localdate(starts_at)
+
+
+def fill_show_dates(showtimes):
+    """Set show_date from starts_at on each showtime; returns them as a list."""
+    showtimes = list(showtimes)
+    # Resolved once: localdate() looks the zone up again on every call
+    local_zone = timezone.get_current_timezone()
+    for showtime in showtimes:
+        showtime.show_date = showtime.starts_at.astimezone(local_zone).date()
+    return showtimes
+
+
+class ShowtimeQuerySet(models.QuerySet):
+    """Keeps show_date in step with starts_at on the writes that bypass save()."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        return super().bulk_create(fill_show_dates(objs), *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if "starts_at" in fields:
+            objs = fill_show_dates(objs)
+            fields = [*fields, "show_date"]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        starts_at = kwargs.get("starts_at")
+        if starts_at is None or "show_date" in kwargs:
+            return super().update(**kwargs)
+        if not hasattr(starts_at, "resolve_expression"):
+            return super().update(show_date=local_show_date(starts_at), **kwargs)
+
+        # An expression (e.g. F("starts_at") + delay): recompute the dates from the result
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list("pk", flat=True))
+            updated = super().update(**kwargs)
+            moved = fill_show_dates(Showtime.objects.using(self.db).filter(pk__in=pks).only("pk", "starts_at"))
+            Showtime.objects.using(self.db).bulk_update(moved, ["show_date"], batch_size=500)
+        return updated
+
+
 class Showtime(models.Model):
     class Format(models.TextChoices):
         TWO_D = "2D", "2D"
@@ -191,13 +332,45 @@ class Showtime(models.Model):
     movie = models.ForeignKey(Movie, on_delete=models.PROTECT, related_name="showtimes")
     movie_room = models.ForeignKey(MovieRoom, on_delete=models.PROTECT, related_name="showtimes")
     starts_at = models.DateTimeField()
+    # Local calendar date of starts_at in the theatre's TIME_ZONE, kept by
+    # save() and ShowtimeQuerySet (bulk_create, bulk_update, update) so
+    # schedules bucket by day without converting every row.
+    show_date = models.DateField(editable=False)
     format = models.CharField(max_length=10, choices=Format.choices, default=Format.TWO_D)
     base_price = models.DecimalField(max_digits=7, decimal_places=2, validators=[MinValueValidator(0)])
+    # Bumped in the transaction of every ticket insert/delete; keys the cached
+    # occupancy bitmap so every worker process sees a booking once it commits
+    seats_version = models.PositiveIntegerField(default=0, editable=False)
+
+    # From BaseManager: as_manager() keeps Manager's own bulk_create/update,
+    # which would bypass the ShowtimeQuerySet overrides
+    objects = models.manager.BaseManager.from_queryset(ShowtimeQuerySet)()
 
     class Meta:
-        indexes = [models.Index(fields=["starts_at"])]
+        indexes = [
+            models.Index(fields=["starts_at", "id"]),
+            # /showtimes/?movie= seeks on (starts_at, id) within one movie
+            models.Index(fields=["movie", "starts_at"], name="showtime_movie_start_idx"),
+            # Schedules: a date range for one movie, one room, or the whole theatre
+            models.Index(fields=["movie", "show_date", "starts_at"], name="showtime_movie_day_idx"),
+            models.Index(fields=["movie_room", "show_date", "starts_at"], name="showtime_room_day_idx"),
+            models.Index(fields=["show_date", "starts_at"], name="showtime_day_idx"),
+        ]
         unique_together = (("movie_room", "starts_at"),)
 
+    def save(self, *args, **kwargs):
+        self.show_date = local_show_date(self.starts_at)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "starts_at" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "show_date"}
+        elif update_fields is None and self.pk is not None and not self._state.adding:
+            # Never write back a version read before a concurrent booking
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "seats_version"
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.movie.title} @ {self.starts_at:%Y-%m-%d %H:%M} ({self.movie_room.name})"
 
@@ -226,6 +399,17 @@ class Booking(models.Model):
     total_amount = models.DecimalField(max_digits=8, decimal_places=2,
                                        default=0, validators=[MinValueValidator(0)])
     promo_code = models.CharField(max_length=30, blank=True)
+    # Start of the booked showtime, copied from the tickets so history
+    # filters need no join (and survive cancellation, which deletes tickets)
+    show_starts_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Booking history is paged newest first per customer
+            models.Index(fields=["customer", "-created_at", "id"]),
+            # "Upcoming only" history filter
+            models.Index(fields=["customer", "show_starts_at"]),
+        ]
 
     def __str__(self):
         return f"Booking #{self.pk} - {self.customer} - {self.status}"
@@ -302,3 +486,158 @@ class Showroom(models.Model):
     
     def __str__(self):
         return self.name
+
+
+# ---------------------------------------------------------
+# EMAIL OUTBOX
+# ---------------------------------------------------------
+class OutboundEmail(models.Model):
+    """Email queued in the same transaction as the change that triggered it."""
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        SENT = "SENT", "Sent"
+        FAILED = "FAILED", "Failed"
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    # Set by the worker whose conditional UPDATE leased the row (posts.outbox.deliver_batch)
+    claim_token = models.CharField(max_length=32, blank=True, db_index=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+class PromotionEmailJob(models.Model):
+    """Progress of a promotion blast; last_profile_id is the resume checkpoint."""
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Running"
+        COMPLETED = "COMPLETED", "Completed"
+        FAILED = "FAILED", "Failed"
+
+    promotion = models.ForeignKey(Promotion, on_delete=models.CASCADE, related_name="email_jobs")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+
+    total_recipients = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    last_profile_id = models.BigIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Consecutive failed runs; the job is FAILED after PROMOTION_EMAIL_MAX_ATTEMPTS
+    attempts = models.PositiveIntegerField(default=0)
+    # Retry time after a failure, or lease expiry while a worker holds claim_token
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True, db_index=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["promotion"],
+                condition=models.Q(status__in=["PENDING", "RUNNING"]),
+                name="one_active_job_per_promotion",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.promotion.promo_code} blast #{self.pk} ({self.status})"
+
+    @property
+    def processed_count(self):
+        return self.sent_count + self.failed_count
+
+    @property
+    def throughput(self):
+        """Emails processed per second since the job started."""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or timezone.now()
+        elapsed = (end - self.started_at).total_seconds()
+        return round(self.processed_count / elapsed, 2) if elapsed > 0 else 0.0
+
+
+# ---------------------------------------------------------
+# ENCRYPTION KEY ROTATION
+# ---------------------------------------------------------
+class EncryptionRotationJob(models.Model):
+    """Re-encryption of one model under one primary key; last_pk is the resume checkpoint."""
+
+    model_label = models.CharField(max_length=100)
+    # Short hash of the primary key being rotated to; the key itself is never stored
+    key_fingerprint = models.CharField(max_length=16)
+
+    last_pk = models.BigIntegerField(default=0)
+    scanned_count = models.PositiveIntegerField(default=0)
+    rotated_count = models.PositiveIntegerField(default=0)
+
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = (("model_label", "key_fingerprint"),)
+
+    def __str__(self):
+        state = "done" if self.finished_at else f"at pk {self.last_pk}"
+        return f"{self.model_label} -> {self.key_fingerprint} ({state})"
+
+    @property
+    def throughput(self):
+        """Rows scanned per second since the job started."""
+        end = self.finished_at or timezone.now()
+        elapsed = (end - self.started_at).total_seconds()
+        return round(self.scanned_count / elapsed, 2) if elapsed > 0 else 0.0
+
+
+# ---------------------------------------------------------
+# IDEMPOTENCY KEYS
+# ---------------------------------------------------------
+class IdempotencyRecord(models.Model):
+    """The outcome of a booking write, replayed to retries sending the same Idempotency-Key."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="idempotency_records")
+    key = models.CharField(max_length=255)
+    # SHA-256 of the method, path and body; a reused key must match it
+    fingerprint = models.CharField(max_length=64)
+
+    # Null until the first attempt finishes
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    # SHA-256 of the rendered response, sent back as its ETag
+    response_digest = models.CharField(max_length=64, blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = (("user", "key"),)
+        indexes = [models.Index(fields=["expires_at"])]
+
+    def __str__(self):
+        state = self.status_code or "in progress"
+        return f"{self.user} {self.key} ({state})"
+
+    @property
+    def completed(self):
+        return self.status_code is not None
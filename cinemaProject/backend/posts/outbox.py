@@ -0,0 +1,153 @@
+# posts/outbox.py
+"""
+Transactional email outbox.
+
+Request handlers only insert OutboundEmail rows, inside whatever transaction
+is already open, so SMTP latency never reaches the request path and an email
+is queued if and only if the business change commits. The
+``send_queued_emails`` management command drains the table in batches;
+``prune_sent_emails`` deletes delivered rows after OUTBOX_SENT_RETENTION_DAYS.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+def queue_email(subject, message, recipient_list, html_message=None, from_email=None):
+    """Queue an email for background delivery (drop-in for ``send_mail``)."""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        html_body=html_message or "",
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base ... capped."""
+    base = getattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 30)
+    cap = getattr(settings, "OUTBOX_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(cap, base * 2 ** max(attempts - 1, 0)))
+
+
+def _build_message(email, connection):
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.to,
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, "text/html")
+    return message
+
+
+def _record_failure(email, error, now, max_attempts):
+    email.last_error = str(error)
+    email.next_attempt_at = now + retry_delay(email.attempts)
+    if email.attempts >= max_attempts:
+        email.status = OutboundEmail.Status.FAILED
+
+
+def lease_expiry():
+    """When a lease taken or renewed now runs out; measured from the clock, not the batch's ``now``."""
+    return timezone.now() + timedelta(seconds=getattr(settings, "OUTBOX_LEASE_SECONDS", 300))
+
+
+def _renew(email, token):
+    """Extend the lease on ``email``; False once another worker has taken it over."""
+    return bool(
+        OutboundEmail.objects.filter(pk=email.pk, claim_token=token).update(next_attempt_at=lease_expiry())
+    )
+
+
+def _write_back(email, token):
+    """Store the outcome of one send, unless the row has been leased by someone else since."""
+    OutboundEmail.objects.filter(pk=email.pk, claim_token=token).update(
+        status=email.status,
+        attempts=email.attempts,
+        next_attempt_at=email.next_attempt_at,
+        last_error=email.last_error,
+        sent_at=email.sent_at,
+        claim_token="",
+    )
+
+
+def deliver_batch(batch_size=None, now=None):
+    """
+    Send up to ``batch_size`` due emails over a single SMTP connection.
+
+    Returns (sent, failed) counts. Rows are leased with one conditional
+    UPDATE that stamps this call's claim token, and only where the row is
+    still pending and due, so concurrent workers never lease the same row.
+    The lease (OUTBOX_LEASE_SECONDS) is renewed, again conditionally, right
+    before each message goes out, and each outcome is written back only
+    while the token still matches. A worker that outlives its lease thus
+    skips the rows another worker took over instead of sending them twice;
+    a crashed worker only delays its rows until the lease runs out.
+    """
+    batch_size = batch_size or getattr(settings, "OUTBOX_BATCH_SIZE", 50)
+    max_attempts = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+    now = now or timezone.now()
+
+    due = OutboundEmail.objects.filter(status=OutboundEmail.Status.PENDING, next_attempt_at__lte=now)
+    candidates = list(due.order_by("next_attempt_at", "id").values_list("pk", flat=True)[:batch_size])
+    if not candidates:
+        return 0, 0
+
+    token = uuid.uuid4().hex
+    claimed = due.filter(pk__in=candidates).update(next_attempt_at=lease_expiry(), claim_token=token)
+    if not claimed:
+        # Another worker leased all of them first
+        return 0, 0
+    batch = list(OutboundEmail.objects.filter(claim_token=token).order_by("id"))
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        for email in batch:
+            email.attempts += 1
+            _record_failure(email, e, now, max_attempts)
+            _write_back(email, token)
+        return 0, len(batch)
+
+    try:
+        for email in batch:
+            if not _renew(email, token):
+                continue
+            email.attempts += 1
+            try:
+                connection.send_messages([_build_message(email, connection)])
+            except Exception as e:
+                _record_failure(email, e, now, max_attempts)
+                failed += 1
+            else:
+                email.status = OutboundEmail.Status.SENT
+                email.sent_at = timezone.now()
+                email.last_error = ""
+                sent += 1
+            _write_back(email, token)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def drain_outbox(batch_size=None):
+    """Deliver batches until nothing is due. Returns (sent, failed) totals."""
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = deliver_batch(batch_size)
+        total_sent += sent
+        total_failed += failed
+        # Stop when the queue is empty or the server is rejecting everything
+        if not sent:
+            return total_sent, total_failed
@@ -0,0 +1,126 @@
+# posts/pagination.py
+"""
+Keyset (seek) pagination.
+
+Pages are selected with a WHERE clause on the last row of the previous page
+instead of an OFFSET, so page 500 costs the same as page 1. The ordering must
+end in a unique column so every row has a distinct position.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    ordering = ("id",)
+    page_size = 20
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def encode_cursor(self, instance):
+        values = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip("-"))
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode("ascii")
+
+    def seek_filter(self, values):
+        """Rows strictly after ``values`` in ``ordering`` (row-value comparison)."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def page_queryset(self, queryset, request):
+        """The unevaluated page: ``page_size + 1`` rows, the extra one flags a next page."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(self.seek_filter(cursor))
+            except (TypeError, ValueError, ValidationError):
+                # Decodes, but holds values the ordering fields cannot take
+                raise NotFound(self.invalid_cursor_message)
+        return queryset[: self.page_size + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.page_rows(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """paginate_queryset() for async views, fetching the page with the async ORM."""
+        return self.page_rows([row async for row in self.page_queryset(queryset, request)])
+
+    def page_rows(self, rows):
+        self.has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return OrderedDict([("next", self.get_next_link()), ("results", data)])
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class MovieCursorPagination(KeysetPagination):
+    ordering = ("title", "id")
+
+
+class ShowtimeCursorPagination(KeysetPagination):
+    ordering = ("starts_at", "id")
+
+
+class BookingCursorPagination(KeysetPagination):
+    ordering = ("-created_at", "id")
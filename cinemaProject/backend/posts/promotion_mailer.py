@@ -0,0 +1,265 @@
+# posts/promotion_mailer.py
+"""
+Chunked promotion blasts.
+
+The admin endpoint only creates a PromotionEmailJob. The email worker
+(``send_queued_emails``) advances jobs chunk by chunk: subscribers are
+streamed in primary-key order with ``iterator()``, each chunk is sent over a
+small pool of persistent SMTP connections, and the job row records the last
+profile id after every chunk so an interrupted run resumes where it stopped.
+
+A worker leases a job with a conditional UPDATE that stamps its claim token,
+as the outbox does, and renews the lease at every checkpoint. If the SMTP
+server goes away, the chunk is not checkpointed: the job stays RUNNING with
+``last_error`` set and is retried with the outbox backoff, until
+PROMOTION_EMAIL_MAX_ATTEMPTS consecutive failed runs mark it FAILED.
+"""
+import itertools
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .email_utils import GREETING_PLACEHOLDER, render_promotion_email
+from .models import PromotionEmailJob, UserProfile
+from .outbox import retry_delay
+
+ACTIVE = [PromotionEmailJob.Status.PENDING, PromotionEmailJob.Status.RUNNING]
+
+
+def subscribers_after(profile_id):
+    return (
+        UserProfile.objects.filter(subscribed_to_promotions=True, pk__gt=profile_id)
+        .exclude(user__email="")
+        .order_by("pk")
+    )
+
+
+def start_promotion_job(promotion):
+    """Create a blast job, or return the one already in flight for this promotion."""
+    active = PromotionEmailJob.objects.filter(promotion=promotion, status__in=ACTIVE)
+    job = active.first()
+    if job:
+        return job
+    total = subscribers_after(0).count()
+    try:
+        with transaction.atomic():
+            return PromotionEmailJob.objects.create(promotion=promotion, total_recipients=total)
+    except IntegrityError:
+        # A concurrent request created it first (one_active_job_per_promotion)
+        return active.get()
+
+
+class SMTPPoolBroken(Exception):
+    """A pooled connection dropped and could not be reopened."""
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class SMTPConnectionPool:
+    """A fixed set of open connections, each driven by its own thread."""
+
+    def __init__(self, size):
+        self.connections = []
+        try:
+            for _ in range(size):
+                connection = get_connection()
+                connection.open()
+                self.connections.append(connection)
+        except Exception:
+            # Do not leak the connections that did open
+            for connection in self.connections:
+                _close_quietly(connection)
+            raise
+        self.executor = ThreadPoolExecutor(max_workers=size)
+
+    def _send_all(self, connection, messages, broken):
+        sent = failed = 0
+        for message in messages:
+            # Another connection found the server gone; the chunk will be resent
+            if broken.is_set():
+                break
+            message.connection = connection
+            try:
+                connection.send_messages([message])
+                sent += 1
+            except Exception:
+                failed += 1
+                # The server may have dropped us; reconnect before the next message
+                _close_quietly(connection)
+                try:
+                    connection.open()
+                except Exception as e:
+                    broken.set()
+                    raise SMTPPoolBroken(str(e)) from e
+        return sent, failed
+
+    def send(self, messages):
+        """
+        Spread messages across the pool; returns (sent, failed).
+
+        Raises SMTPPoolBroken, once every thread has stopped, when a
+        connection could not be reopened.
+        """
+        size = len(self.connections)
+        broken = threading.Event()
+        futures = [
+            self.executor.submit(self._send_all, connection, messages[i::size], broken)
+            for i, connection in enumerate(self.connections)
+        ]
+        errors = [future.exception() for future in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+        results = [future.result() for future in futures]
+        return sum(r[0] for r in results), sum(r[1] for r in results)
+
+    def close(self):
+        self.executor.shutdown()
+        for connection in self.connections:
+            _close_quietly(connection)
+
+
+def _build_messages(rows, subject, plain_template, html_template):
+    messages = []
+    for _, email, first_name, username in rows:
+        name = first_name or username or "Movie Fan"
+        message = EmailMultiAlternatives(
+            subject=subject,
+            body=plain_template.replace(GREETING_PLACEHOLDER, name),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email],
+        )
+        message.attach_alternative(html_template.replace(GREETING_PLACEHOLDER, name), "text/html")
+        messages.append(message)
+    return messages
+
+
+def lease_expiry():
+    return timezone.now() + timedelta(seconds=getattr(settings, "PROMOTION_EMAIL_LEASE_SECONDS", 600))
+
+
+def claim_promotion_job(jobs):
+    """
+    Lease the oldest unfinished job in ``jobs``; returns it, or None.
+
+    Unleased jobs and jobs whose lease has run out can be claimed. The
+    conditional UPDATE guarantees only one worker wins a given job.
+    """
+    claimable = jobs.filter(status__in=ACTIVE).filter(Q(claim_token="") | Q(next_attempt_at__lte=timezone.now()))
+    pk = claimable.order_by("created_at").values_list("pk", flat=True).first()
+    if pk is None:
+        return None
+    token = uuid.uuid4().hex
+    if not claimable.filter(pk=pk).update(claim_token=token, next_attempt_at=lease_expiry()):
+        # Another worker leased it first
+        return None
+    return PromotionEmailJob.objects.select_related("promotion").get(pk=pk)
+
+
+def _record_failure(job, error):
+    """Release the lease and back off; give up after PROMOTION_EMAIL_MAX_ATTEMPTS."""
+    now = timezone.now()
+    job.attempts += 1
+    job.last_error = str(error)
+    job.next_attempt_at = now + retry_delay(job.attempts)
+    fields = {"attempts": job.attempts, "last_error": job.last_error, "next_attempt_at": job.next_attempt_at}
+    if job.attempts >= getattr(settings, "PROMOTION_EMAIL_MAX_ATTEMPTS", 5):
+        job.status, job.finished_at = PromotionEmailJob.Status.FAILED, now
+        fields.update(status=job.status, finished_at=now)
+    PromotionEmailJob.objects.filter(pk=job.pk, claim_token=job.claim_token).update(
+        claim_token="", updated_at=now, **fields
+    )
+    job.claim_token = ""
+
+
+def run_promotion_job(job, max_chunks=None, chunk_size=None, pool_size=None):
+    """
+    Send up to ``max_chunks`` chunks of a job (all remaining when None).
+
+    The job is claimed first; returns 0 if it is finished or another worker
+    holds it. Progress is committed after every chunk, so a crash re-sends
+    at most one chunk. Returns the number of chunks processed.
+    """
+    job = claim_promotion_job(PromotionEmailJob.objects.filter(pk=job.pk))
+    if job is None:
+        return 0
+    return _run_claimed(job, max_chunks, chunk_size, pool_size)
+
+
+def _run_claimed(job, max_chunks=None, chunk_size=None, pool_size=None):
+    chunk_size = chunk_size or getattr(settings, "PROMOTION_EMAIL_CHUNK_SIZE", 500)
+    pool_size = pool_size or getattr(settings, "PROMOTION_EMAIL_POOL_SIZE", 4)
+    mine = PromotionEmailJob.objects.filter(pk=job.pk, claim_token=job.claim_token)
+
+    if job.status == PromotionEmailJob.Status.PENDING:
+        job.status = PromotionEmailJob.Status.RUNNING
+        job.started_at = timezone.now()
+        mine.update(status=job.status, started_at=job.started_at, updated_at=job.started_at)
+
+    subject, plain_template, html_template = render_promotion_email(job.promotion)
+    rows = (
+        subscribers_after(job.last_profile_id)
+        .values_list("pk", "user__email", "user__first_name", "user__username")
+        .iterator(chunk_size=chunk_size)
+    )
+
+    try:
+        pool = SMTPConnectionPool(pool_size)
+    except Exception as e:
+        _record_failure(job, e)
+        return 0
+
+    chunks = 0
+    try:
+        while max_chunks is None or chunks < max_chunks:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                job.status = PromotionEmailJob.Status.COMPLETED
+                job.finished_at = timezone.now()
+                mine.update(status=job.status, finished_at=job.finished_at, claim_token="", updated_at=job.finished_at)
+                break
+
+            try:
+                sent, failed = pool.send(_build_messages(chunk, subject, plain_template, html_template))
+            except SMTPPoolBroken as e:
+                # Not checkpointed: the job stays RUNNING and a later run resends this chunk
+                _record_failure(job, f"SMTP connection lost: {e}")
+                break
+            # Checkpoint and renew the lease; a chunk getting through resets the failure count
+            if not mine.update(
+                sent_count=F("sent_count") + sent,
+                failed_count=F("failed_count") + failed,
+                last_profile_id=chunk[-1][0],
+                attempts=0,
+                next_attempt_at=lease_expiry(),
+                updated_at=timezone.now(),
+            ):
+                # The lease ran out and another worker owns the job now
+                break
+            job.refresh_from_db(fields=["sent_count", "failed_count", "last_profile_id", "attempts", "updated_at"])
+            chunks += 1
+    finally:
+        pool.close()
+        # Hand the job back for the next poll (no-op once completed, failed or lost)
+        mine.update(claim_token="", next_attempt_at=timezone.now())
+    return chunks
+
+
+def advance_promotion_jobs(max_chunks=None):
+    """Advance the oldest job that is due; used by the email worker loop."""
+    job = claim_promotion_job(PromotionEmailJob.objects.filter(next_attempt_at__lte=timezone.now()))
+    if job is None:
+        return 0
+    return _run_claimed(job, max_chunks=max_chunks)
@@ -0,0 +1,150 @@
+# posts/room_layouts.py
+"""
+Declarative room layouts.
+
+A layout lists a room's rows from the screen back. Each row is a string
+with one character per grid column:
+
+    {"rows": [
+        {"name": "A", "seats": "aa ssssssss aa"},
+        {"name": "B", "seats": "ss ssss.sss ss"},
+        {"name": "C", "seats": "pp pppppppp pp"}
+    ]}
+
+``s``, ``p`` and ``a`` are standard, premium and accessible seats; a space
+is an aisle and ``.`` a gap (a missing seat, e.g. behind a pillar). Seats
+are numbered left to right within their row, skipping aisles and gaps.
+
+``apply_layout`` materializes a layout into Seat rows once, from the admin
+API or the ``apply_room_layout`` command. Seat-map reads never write: they
+join occupancy against the seatmap.RoomLayout cached from those rows.
+"""
+import math
+
+from django.db import transaction
+
+from . import seatmap
+from .models import MovieRoom, Seat, Ticket
+
+SEAT_CODES = {
+    "s": Seat.SeatClass.STANDARD,
+    "p": Seat.SeatClass.PREMIUM,
+    "a": Seat.SeatClass.ACCESSIBLE,
+}
+AISLE = " "
+GAP = "."
+ROW_NAMES = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+MAX_COLUMNS = 60
+
+# default_layout: seats per row before rooms get wider than the 26 row letters allow
+DEFAULT_ROW_WIDTH = 12
+
+
+class LayoutError(ValueError):
+    """A layout that cannot be materialized; the message is safe to show admins."""
+
+
+def parse_layout(spec):
+    """Validate a layout; returns ``[(row, number, column, seat_class), ...]``."""
+    rows = spec.get("rows") if isinstance(spec, dict) else None
+    if not isinstance(rows, list) or not rows:
+        raise LayoutError("A layout needs a non-empty list of rows")
+
+    seats = []
+    previous = ""
+    for position, row in enumerate(rows, start=1):
+        name = row.get("name") if isinstance(row, dict) else None
+        cells = row.get("seats") if isinstance(row, dict) else None
+        if not isinstance(name, str) or len(name) != 1 or name not in ROW_NAMES:
+            raise LayoutError(f"Row {position}: name must be a single letter A-Z")
+        # Seat maps list rows alphabetically, so the layout must too
+        if name <= previous:
+            raise LayoutError(f"Row {name}: rows must be listed in alphabetical order without repeats")
+        if not isinstance(cells, str) or not cells.strip(AISLE + GAP):
+            raise LayoutError(f"Row {name}: seats must be a string with at least one seat")
+        if len(cells) > MAX_COLUMNS:
+            raise LayoutError(f"Row {name}: at most {MAX_COLUMNS} columns")
+        unknown = set(cells) - set(SEAT_CODES) - {AISLE, GAP}
+        if unknown:
+            raise LayoutError(f"Row {name}: unknown seat code(s) {''.join(sorted(unknown))!r}")
+
+        number = 0
+        for column, code in enumerate(cells, start=1):
+            if code in SEAT_CODES:
+                number += 1
+                seats.append((name, number, column, SEAT_CODES[code]))
+        previous = name
+    return seats
+
+
+def default_layout(capacity):
+    """Rows of standard seats with two side aisles, holding exactly ``capacity`` seats."""
+    if capacity < 1:
+        raise LayoutError("Capacity must be at least 1")
+    width = max(DEFAULT_ROW_WIDTH, math.ceil(capacity / len(ROW_NAMES)))
+    if width > MAX_COLUMNS - 2:
+        raise LayoutError(f"A capacity of {capacity} needs an explicit layout")
+
+    rows = []
+    remaining = capacity
+    for name in ROW_NAMES:
+        if not remaining:
+            break
+        count = min(width, remaining)
+        remaining -= count
+        cells = "s" * count
+        if count >= 8:
+            cells = f"ss{AISLE}{'s' * (count - 4)}{AISLE}ss"
+        rows.append({"name": name, "seats": cells})
+    return {"rows": rows}
+
+
+def apply_layout(room, spec):
+    """
+    Make ``room``'s seats match ``spec`` and record it on the room.
+
+    Seats keep their ids when their row and number survive, so tickets stay
+    attached; removing a seat that has tickets is refused. Returns counts
+    of created, updated and removed seats.
+    """
+    wanted = {(row, number): (column, seat_class) for row, number, column, seat_class in parse_layout(spec)}
+
+    with transaction.atomic():
+        # Serialises concurrent layout changes to the same room
+        room = MovieRoom.objects.select_for_update().get(pk=room.pk)
+        existing = {(seat.row, seat.number): seat for seat in Seat.objects.filter(movie_room=room)}
+
+        removed = [seat.pk for key, seat in existing.items() if key not in wanted]
+        if removed:
+            booked = Seat.objects.filter(pk__in=Ticket.objects.filter(seat_id__in=removed).values("seat_id"))
+            labels = sorted(f"{row}{number}" for row, number in booked.values_list("row", "number"))
+            if labels:
+                raise LayoutError(f"Seats with tickets cannot be removed: {', '.join(labels)}")
+            # One DELETE without per-seat post_delete signals (no tickets, checked
+            # above); the layout is invalidated once below
+            Seat.objects.filter(pk__in=removed)._raw_delete(Seat.objects.db)
+
+        changed = []
+        for key, seat in existing.items():
+            if key not in wanted:
+                continue
+            column, seat_class = wanted[key]
+            if (seat.column, seat.seat_class) != (column, seat_class):
+                seat.column, seat.seat_class = column, seat_class
+                changed.append(seat)
+        Seat.objects.bulk_update(changed, ["column", "seat_class"])
+
+        created = [
+            Seat(movie_room=room, row=row, number=number, column=column, seat_class=seat_class)
+            for (row, number), (column, seat_class) in wanted.items()
+            if (row, number) not in existing
+        ]
+        Seat.objects.bulk_create(created)
+
+        room.layout = spec
+        room.capacity = len(wanted)
+        room.save(update_fields=["layout", "capacity"])
+        # None of the writes above send signals; move the room to a new layout version once
+        seatmap.invalidate_room_layout(room.pk)
+
+    return {"created": len(created), "updated": len(changed), "removed": len(removed)}
@@ -0,0 +1,131 @@
+# posts/routers.py
+"""
+Read-replica routing.
+
+Views opt in with ``replica_methods`` (class attribute on viewsets, or the
+``reads_from_replica`` decorator on function views). For those requests
+``ReplicaRoutingMiddleware`` points ORM reads at a replica alias; writes,
+``select_for_update`` and ``get_or_create`` always use the primary. A user
+who has just written something (a booking, a cancellation, a profile edit)
+is pinned to the primary for ``REPLICA_STICKY_SECONDS`` so they read their
+own writes while the replicas catch up.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+
+SAFE_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+STICKY_KEY = "db:sticky:{user_id}"
+
+# Alias used for reads in the current request (None means the primary)
+_read_alias = ContextVar("read_alias", default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+@contextmanager
+def use_database(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def use_primary():
+    """Read from the primary inside the block (e.g. when filling a cache)."""
+    return use_database(None)
+
+
+def reads_from_replica(*methods):
+    """Mark a function view as read-only for ``methods`` (default: safe methods)."""
+    allowed = frozenset(m.upper() for m in methods) or SAFE_METHODS
+
+    def decorator(view):
+        view.replica_methods = allowed
+        return view
+
+    return decorator
+
+
+def mark_sticky(user_id):
+    cache.set(STICKY_KEY.format(user_id=user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user_id):
+    return cache.get(STICKY_KEY.format(user_id=user_id)) is not None
+
+
+def is_read_only(request, view_func):
+    methods = getattr(view_func, "replica_methods", None)
+    if methods is None:
+        methods = getattr(getattr(view_func, "cls", None), "replica_methods", ())
+    return request.method in methods
+
+
+def read_alias_for(request, view_func):
+    """Pick the alias this request should read from, or None for the primary."""
+    replicas = replica_aliases()
+    if not replicas or not is_read_only(request, view_func):
+        return None
+
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated and is_sticky(user.pk):
+        return None
+    return random.choice(replicas)
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Sync and async capable (MiddlewareMixin), so async views under ASGI are
+    not forced back onto a thread. In async mode Django runs each hook in a
+    worker thread and carries the context variable back to the request task.
+    """
+
+    def process_request(self, request):
+        request.read_only_view = False
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.read_only_view = is_read_only(request, view_func)
+        alias = read_alias_for(request, view_func)
+        if alias is not None:
+            _read_alias.set(alias)
+        return None
+
+    def process_response(self, request, response):
+        # Not reset(): in async mode the token belongs to another hook's context
+        _read_alias.set(None)
+
+        # DRF assigns the authenticated user back onto the Django request
+        wrote = request.method not in SAFE_METHODS and not getattr(request, "read_only_view", False)
+        if wrote and response.status_code < 400 and replica_aliases():
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                mark_sticky(user.pk)
+        return response
+
+
+class ReplicaRouter:
+    """Send reads to the request's replica alias; everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema with the data (see sync_replicas)
+        return db == "default"
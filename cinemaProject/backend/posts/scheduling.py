@@ -0,0 +1,155 @@
+# posts/scheduling.py
+"""
+Showtime overlap detection.
+
+A showtime occupies its room from ``starts_at`` until the movie ends plus
+SHOWTIME_CLEANING_BUFFER_MINUTES. Each room's occupied intervals are kept
+in a sorted list of disjoint (start, end) blocks. Existing showtimes for
+every room of a schedule are loaded in a single query, and each candidate
+slot is checked by bisecting the list, so validating thousands of slots
+takes milliseconds and no further queries.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Movie, MovieRoom, Showtime
+
+# No screening runs longer than this; showtimes starting this long before a
+# window are the earliest that can still occupy a room inside it.
+LONGEST_SHOWING = timedelta(hours=8)
+
+
+def cleaning_buffer():
+    return timedelta(minutes=settings.SHOWTIME_CLEANING_BUFFER_MINUTES)
+
+
+def occupied_until(starts_at, duration_minutes):
+    """When the room is free again after a showing starting at ``starts_at``."""
+    return starts_at + timedelta(minutes=duration_minutes) + cleaning_buffer()
+
+
+class RoomSchedule:
+    """Disjoint, sorted busy blocks of one room."""
+
+    def __init__(self, intervals=()):
+        self.starts = []
+        self.ends = []
+        # Merge overlapping legacy rows so every block is disjoint
+        for start, end in sorted(intervals):
+            if self.ends and start < self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def conflict(self, start, end):
+        """The busy block overlapping [start, end), or None."""
+        index = bisect_right(self.starts, start)
+        if index and self.ends[index - 1] > start:
+            return self.starts[index - 1], self.ends[index - 1]
+        if index < len(self.starts) and self.starts[index] < end:
+            return self.starts[index], self.ends[index]
+        return None
+
+    def add(self, start, end):
+        """Reserve [start, end); the caller has checked it is free."""
+        index = bisect_left(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+
+
+def load_room_schedules(room_ids, window_start, window_end, exclude_pk=None):
+    """``{room_id: RoomSchedule}`` for every room, from one query."""
+    showtimes = Showtime.objects.filter(
+        movie_room_id__in=room_ids,
+        starts_at__gt=window_start - LONGEST_SHOWING,
+        starts_at__lt=window_end,
+    )
+    if exclude_pk is not None:
+        showtimes = showtimes.exclude(pk=exclude_pk)
+
+    intervals = {room_id: [] for room_id in room_ids}
+    for room_id, starts_at, duration in showtimes.values_list("movie_room_id", "starts_at", "movie__duration"):
+        intervals[room_id].append((starts_at, occupied_until(starts_at, duration)))
+    return {room_id: RoomSchedule(blocks) for room_id, blocks in intervals.items()}
+
+
+def find_conflict(room_id, starts_at, duration_minutes, exclude_pk=None):
+    """The busy block a single new or moved showtime would overlap, or None."""
+    end = occupied_until(starts_at, duration_minutes)
+    schedules = load_room_schedules([room_id], starts_at, end, exclude_pk=exclude_pk)
+    return schedules[room_id].conflict(starts_at, end)
+
+
+def describe_conflict(block):
+    start, end = (timezone.localtime(moment) for moment in block)
+    return f"Overlaps a showing in this room from {start:%Y-%m-%d %H:%M} until {end:%H:%M} (including cleaning)."
+
+
+def lock_rooms(room_ids):
+    """
+    Lock the rooms' rows until the surrounding transaction ends, so a second
+    scheduler for the same rooms waits here instead of passing the same
+    overlap check. Call inside transaction.atomic(), before checking; rows
+    are locked in id order so two batches cannot deadlock.
+    """
+    return list(
+        MovieRoom.objects.select_for_update().filter(pk__in=room_ids).order_by("pk").values_list("pk", flat=True)
+    )
+
+
+def plan_schedule(slots):
+    """
+    Check a batch of validated slots against the rooms' existing showtimes
+    and against each other.
+
+    ``slots`` is a list of ``(index, attrs)`` with movie/movie_room ids.
+    Returns ``(showtimes, rejected)``: unsaved Showtime rows ready for
+    bulk_create (in input order) and ``{"index", "errors"}`` entries. Runs
+    three queries however many slots there are.
+    """
+    if not slots:
+        return [], []
+
+    movies = Movie.objects.only("id", "title", "duration").in_bulk({attrs["movie"] for _, attrs in slots})
+    room_ids = set(
+        MovieRoom.objects.filter(pk__in={attrs["movie_room"] for _, attrs in slots}).values_list("id", flat=True)
+    )
+    starts = [attrs["starts_at"] for _, attrs in slots]
+    schedules = load_room_schedules(room_ids, min(starts), max(starts) + LONGEST_SHOWING)
+
+    showtimes = []
+    rejected = []
+    for index, attrs in slots:
+        errors = {}
+        movie = movies.get(attrs["movie"])
+        if movie is None:
+            errors["movie"] = ["Movie not found."]
+        if attrs["movie_room"] not in room_ids:
+            errors["movie_room"] = ["Showroom not found."]
+        if not errors:
+            start = attrs["starts_at"]
+            end = occupied_until(start, movie.duration)
+            schedule = schedules[attrs["movie_room"]]
+            block = schedule.conflict(start, end)
+            if block is None:
+                # Later slots in the batch must fit around this one too
+                schedule.add(start, end)
+            else:
+                errors["starts_at"] = [describe_conflict(block)]
+        if errors:
+            rejected.append({"index": index, "errors": errors})
+            continue
+        showtimes.append(
+            Showtime(
+                movie=movie,
+                movie_room_id=attrs["movie_room"],
+                starts_at=attrs["starts_at"],
+                format=attrs["format"],
+                base_price=attrs["base_price"],
+            )
+        )
+    return showtimes, rejected
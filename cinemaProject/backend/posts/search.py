@@ -0,0 +1,159 @@
+# posts/search.py
+"""
+Full-text movie search.
+
+On SQLite the catalog is indexed by an FTS5 table (posts_movie_fts) that
+mirrors title, description and genre of posts_movie. Triggers on the movie
+table keep it current on every insert, update and delete, so Movie.save()
+needs no extra code and bulk writes are covered too. Every query term is a
+prefix match (type-ahead: "star wa" finds "Star Wars"), backed by the
+index's prefix tables, and results are ranked with bm25 weighted towards
+the title.
+
+Django rebuilds a SQLite table, dropping its triggers, when a migration
+alters it. A post_migrate handler (ensure_index) checks for them after
+every ``migrate`` and, if any is gone, recreates them and reindexes, since
+writes made meanwhile were not indexed. Other databases fall back to
+case-insensitive substring matching.
+
+Uncached latency (benchmarks/movie_search.py, 30k movies) misses a
+sub-10 ms p95: a two-letter prefix can match thousands of rows and bm25
+scores every one. Title-only: p50 2.9 ms, p95 10.9 ms; full text: p50
+7.4 ms, p95 56 ms. The catalog cache absorbs repeats of those prefixes.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Q
+
+from .models import Movie
+
+FTS_TABLE = "posts_movie_fts"
+
+# bm25 column weights: title, description, genre
+RANK_WEIGHTS = (10.0, 1.0, 3.0)
+
+SQLITE_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, genre,
+        content='posts_movie', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_movie BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, genre)
+        VALUES (new.id, new.title, new.description, new.genre);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_movie BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, genre)
+        VALUES ('delete', old.id, old.title, old.description, old.genre);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description, genre ON posts_movie BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description, genre)
+        VALUES ('delete', old.id, old.title, old.description, old.genre);
+        INSERT INTO {FTS_TABLE}(rowid, title, description, genre)
+        VALUES (new.id, new.title, new.description, new.genre);
+    END
+    """,
+]
+
+TRIGGERS = [f"{FTS_TABLE}_{suffix}" for suffix in ("ai", "ad", "au")]
+
+TERM_RE = re.compile(r"\w+")
+
+
+def uses_fts(using=None):
+    return (using or connection).vendor == "sqlite"
+
+
+def install_index(using=None):
+    """Create the FTS table and triggers if missing, then reindex every movie."""
+    with (using or connection).cursor() as cursor:
+        for statement in SQLITE_SCHEMA:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def missing_index_objects(using=None):
+    """Names of the FTS table and triggers absent from the database."""
+    wanted = [FTS_TABLE, *TRIGGERS]
+    with (using or connection).cursor() as cursor:
+        cursor.execute(
+            f"SELECT name FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(wanted))})", wanted
+        )
+        present = {row[0] for row in cursor.fetchall()}
+    return [name for name in wanted if name not in present]
+
+
+def ensure_index(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    post_migrate handler: reinstall the triggers (and reindex) when a
+    migration that rebuilt posts_movie dropped them. A no-op while
+    everything is in place.
+    """
+    target = connections[using]
+    if not uses_fts(target):
+        return
+    missing = missing_index_objects(target)
+    # No table: migrated back to before 0011, which created it
+    if missing and FTS_TABLE not in missing:
+        install_index(target)
+
+
+def match_expression(terms):
+    """
+    An FTS5 query matching every term as a quoted prefix (quoting defuses
+    FTS syntax). The whole-word alternative matches the same rows but adds
+    to their bm25 score, so "star" ranks "Star Wars" above "Starship".
+    """
+    return " AND ".join(f'("{term}" OR "{term}"*)' for term in terms)
+
+
+def search_movies(query, category=None, genre=None, limit=20, title_only=False):
+    """
+    Movies matching every term of ``query``, best match first.
+
+    ``title_only`` is for type-ahead: matching titles alone keeps short,
+    broad prefixes from scoring thousands of descriptions. Returns an
+    unevaluated (raw) queryset; it is empty when ``query`` has no
+    searchable terms.
+    """
+    terms = TERM_RE.findall(query.lower())
+    if not terms:
+        return Movie.objects.none()
+
+    if not uses_fts():
+        queryset = Movie.objects.all()
+        for term in terms:
+            condition = Q(title__icontains=term)
+            if not title_only:
+                condition |= Q(description__icontains=term) | Q(genre__icontains=term)
+            queryset = queryset.filter(condition)
+        if category:
+            queryset = queryset.filter(category=category)
+        if genre:
+            queryset = queryset.filter(genre__iexact=genre)
+        return queryset.order_by("title", "id")[:limit]
+
+    where = [f"{FTS_TABLE} MATCH %s"]
+    expression = match_expression(terms)
+    params = [f"{{title}} : ({expression})" if title_only else expression]
+    if category:
+        where.append("m.category = %s")
+        params.append(category)
+    if genre:
+        where.append("lower(m.genre) = lower(%s)")
+        params.append(genre)
+    weights = ", ".join(str(weight) for weight in RANK_WEIGHTS)
+    sql = (
+        f"SELECT m.* FROM {FTS_TABLE} JOIN posts_movie m ON m.id = {FTS_TABLE}.rowid "
+        f"WHERE {' AND '.join(where)} "
+        f"ORDER BY bm25({FTS_TABLE}, {weights}), m.id LIMIT %s"
+    )
+    return Movie.objects.raw(sql, params + [limit])
@@ -0,0 +1,172 @@
+# posts/seat_stream.py
+"""
+Live seat availability for open seat pickers (Server-Sent Events over ASGI).
+
+Each process keeps one channel per watched showtime holding that
+showtime's occupancy bitmap. Ticket inserts and deletes are published to
+the channel once their transaction commits (seatmap.record_seat_changes),
+and the channel fans the changed seats out to its subscribers. Nothing in
+the fan-out touches the database, so a change costs the same with one
+open picker or thousands.
+
+Subscribers keep their undelivered changes in a dict keyed by seat, so a
+burst of bookings collapses into one event and a slow client can never
+hold more than one entry per seat in the room.
+
+Changes committed by other worker processes reach a channel through a
+periodic resync against the cached bitmap (one indexed query per showtime
+per process every SEAT_STREAM_RESYNC_SECONDS, not one per subscriber).
+"""
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+
+from . import seatmap
+
+_channels = {}
+_channels_lock = threading.Lock()
+
+
+class Subscriber:
+    """One open stream. ``push`` runs on the subscriber's event loop."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.pending = {}
+        self.reset = False
+        self.ready = asyncio.Event()
+
+    def push(self, changes):
+        if changes is None:
+            # The room layout changed: deltas no longer apply, resend everything
+            self.reset = True
+            self.pending.clear()
+        else:
+            self.pending.update(changes)
+        self.ready.set()
+
+    async def next_batch(self, timeout):
+        """Wait for changes; returns ``(reset, {seat_id: reserved})``, or None on timeout."""
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        # Let the rest of a burst arrive before writing to the client
+        await asyncio.sleep(settings.SEAT_STREAM_COALESCE_SECONDS)
+        self.ready.clear()
+        batch, self.pending = self.pending, {}
+        reset, self.reset = self.reset, False
+        return reset, batch
+
+
+class ShowtimeChannel:
+    def __init__(self, showtime_id, room_id, layout, bitmap):
+        self.showtime_id = showtime_id
+        self.room_id = room_id
+        self.layout = layout
+        self.bitmap = bytearray(bitmap)
+        self.subscribers = set()
+        self.synced_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def snapshot(self):
+        """(layout, bitmap) for a full seat map; call with ``lock`` held."""
+        return self.layout, bytes(self.bitmap)
+
+    def _fan_out(self, changes):
+        """Queue ``changes`` on every subscriber's loop; call with ``lock`` held."""
+        dead = []
+        for subscriber in self.subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.push, changes)
+            except RuntimeError:
+                # Its event loop closed without unsubscribing (worker shutdown, crashed stream)
+                dead.append(subscriber)
+        self.subscribers.difference_update(dead)
+        return bool(dead)
+
+    def apply(self, changes):
+        """Record ``{seat_id: reserved}`` and send the seats that actually changed."""
+        dropped = False
+        with self.lock:
+            delta = {}
+            for seat_id, reserved in changes.items():
+                bit = self.layout.index_by_seat.get(seat_id)
+                if bit is None or seatmap.is_reserved(self.bitmap, bit) == reserved:
+                    continue
+                self.bitmap[bit >> 3] ^= 1 << (bit & 7)
+                delta[seat_id] = reserved
+            if delta:
+                dropped = self._fan_out(delta)
+        if dropped:
+            _forget_if_idle(self)
+
+    def resync(self):
+        """Pick up changes made in other processes from the cached bitmap."""
+        # One indexed read for the versions; grid and bitmap are usually cached
+        current = seatmap.current_occupancy(self.showtime_id)
+        if current is None:
+            return
+        layout, bitmap = current
+        if layout.version != self.layout.version:
+            with self.lock:
+                self.layout, self.bitmap = layout, bytearray(bitmap)
+                dropped = self._fan_out(None)
+            if dropped:
+                _forget_if_idle(self)
+            return
+        self.apply(
+            {seat[0]: seatmap.is_reserved(bitmap, seat[3]) for seat in layout.seats}
+        )
+
+    def resync_due(self):
+        """True for exactly one caller per resync interval."""
+        with self.lock:
+            if time.monotonic() - self.synced_at < settings.SEAT_STREAM_RESYNC_SECONDS:
+                return False
+            self.synced_at = time.monotonic()
+            return True
+
+
+def subscribe(showtime, subscriber):
+    """Register ``subscriber`` and return the channel plus the state it starts from."""
+    with _channels_lock:
+        channel = _channels.get(showtime.pk)
+        if channel is None:
+            layout, bitmap = seatmap.get_occupancy(showtime)
+            channel = _channels[showtime.pk] = ShowtimeChannel(showtime.pk, showtime.movie_room_id, layout, bitmap)
+        with channel.lock:
+            # Under the lock, so no change falls between the snapshot and the first delta
+            channel.subscribers.add(subscriber)
+            return channel, channel.snapshot()
+
+
+def unsubscribe(channel, subscriber):
+    with _channels_lock:
+        with channel.lock:
+            channel.subscribers.discard(subscriber)
+            if not channel.subscribers and _channels.get(channel.showtime_id) is channel:
+                del _channels[channel.showtime_id]
+
+
+def _forget_if_idle(channel):
+    """Drop a channel whose last subscribers were found dead, like unsubscribe() does."""
+    with _channels_lock:
+        with channel.lock:
+            if not channel.subscribers and _channels.get(channel.showtime_id) is channel:
+                del _channels[channel.showtime_id]
+
+
+def publish(showtime_id, seat_ids, reserved):
+    """Send committed ticket changes to this process's open streams, if any."""
+    channel = _channels.get(showtime_id)
+    if channel is not None:
+        channel.apply({seat_id: reserved for seat_id in seat_ids})
+
+
+def subscriber_count(showtime_id=None):
+    with _channels_lock:
+        channels = list(_channels.values()) if showtime_id is None else [_channels.get(showtime_id)]
+        return sum(len(channel.subscribers) for channel in channels if channel is not None)
@@ -0,0 +1,285 @@
+# posts/seatmap.py
+"""
+Seat availability engine.
+
+Every room gets an immutable layout that maps each seat to a bit position
+(row-major over the room grid, so aisles and gaps are unset bits). Layouts
+are only read here; seats are written by posts.room_layouts. A layout is
+cached under the room's ``layout_version``, which every seat change bumps
+in its own transaction, so all worker processes switch to the new grid as
+soon as it commits, whatever cache backend they use. Each showtime keeps
+its occupancy as a bitmap over those positions, cached under the
+showtime's ``seats_version`` the same way: ticket inserts and deletes bump
+it, and the first read of a new version rebuilds the bitmap with one
+query. Cached entries are never modified, so polling a seat map costs no
+queries once it is warm and never shows a booking another process has
+already committed over.
+"""
+import base64
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .routers import use_primary
+
+LAYOUT_KEY = "seatmap:layout:{room_id}:{version}"
+# Superseded versions are never read again; this only bounds their lifetime
+LAYOUT_TIMEOUT = 24 * 60 * 60
+OCCUPANCY_KEY = "seatmap:occupancy:{showtime_id}:{seats_version}:{layout_version}"
+# Likewise: a booking moves readers to a new key, so this only evicts old ones
+OCCUPANCY_TIMEOUT = 300
+
+
+class RoomLayout:
+    """Immutable seat grid for one room."""
+
+    __slots__ = ("room_id", "version", "rows", "cols", "seats", "index_by_seat", "seat_at")
+
+    def __init__(self, room_id, version, seats):
+        # seats: iterable of (seat_id, row, number, column, seat_class); a
+        # None column means the seat sits at its number
+        seats = sorted(
+            ((seat_id, row, number, column or number, seat_class) for seat_id, row, number, column, seat_class in seats),
+            key=lambda s: (s[1], s[3]),
+        )
+        self.room_id = room_id
+        self.version = version
+        self.rows = tuple(sorted({seat[1] for seat in seats}))
+        self.cols = max((seat[3] for seat in seats), default=0)
+
+        row_index = {row: i for i, row in enumerate(self.rows)}
+        self.seats = tuple(
+            (seat_id, row, number, row_index[row] * self.cols + column - 1, seat_class)
+            for seat_id, row, number, column, seat_class in seats
+        )
+        self.index_by_seat = {seat[0]: seat[3] for seat in self.seats}
+        # Grid position -> index into self.seats, -1 for aisles and gaps
+        seat_at = [-1] * self.size
+        for i, seat in enumerate(self.seats):
+            seat_at[seat[3]] = i
+        self.seat_at = tuple(seat_at)
+
+    @property
+    def size(self):
+        return len(self.rows) * self.cols
+
+    def empty_bitmap(self):
+        return bytearray((self.size + 7) // 8)
+
+    def descriptor(self):
+        """Compact description of the grid for clients decoding bitmaps."""
+        present = self.empty_bitmap()
+        for seat in self.seats:
+            bit = seat[3]
+            present[bit >> 3] |= 1 << (bit & 7)
+        return {
+            "room": self.room_id,
+            "rows": list(self.rows),
+            "cols": self.cols,
+            "seats": base64.b64encode(bytes(present)).decode("ascii"),
+            "seat_ids": [seat[0] for seat in self.seats],
+            "seat_classes": [seat[4] for seat in self.seats],
+        }
+
+
+def get_room_layout(room_id, version):
+    """The grid of ``room_id`` as of its ``layout_version``."""
+    key = LAYOUT_KEY.format(room_id=room_id, version=version)
+    layout = cache.get(key)
+    if layout is None:
+        from .models import Seat  # Local import to avoid circular dependencies
+
+        with use_primary():
+            layout = RoomLayout(
+                room_id,
+                version,
+                Seat.objects.filter(movie_room_id=room_id).values_list("id", "row", "number", "column", "seat_class"),
+            )
+        cache.set(key, layout, LAYOUT_TIMEOUT)
+    return layout
+
+
+def invalidate_room_layout(room_id):
+    """
+    Move the room to a new layout version; call inside the transaction that
+    changes its seats, so the new version commits (or rolls back) with them.
+    """
+    from .models import MovieRoom  # Local import to avoid circular dependencies
+
+    MovieRoom.objects.filter(pk=room_id).update(layout_version=F("layout_version") + 1)
+
+
+def current_room_layout(room_id):
+    """get_room_layout() at the version currently committed for the room."""
+    from .models import MovieRoom  # Local import to avoid circular dependencies
+
+    with use_primary():
+        version = MovieRoom.objects.filter(pk=room_id).values_list("layout_version", flat=True).first()
+    return get_room_layout(room_id, version or 0)
+
+
+def get_occupancy(showtime):
+    """
+    Return (layout, bitmap) for a showtime, building the bitmap on a miss.
+
+    ``showtime.movie_room`` should be loaded with it (select_related): its
+    layout_version picks the grid.
+    """
+    layout = get_room_layout(showtime.movie_room_id, showtime.movie_room.layout_version)
+    return layout, cached_bitmap(layout, showtime.pk, showtime.seats_version)
+
+
+def current_occupancy(showtime_id):
+    """get_occupancy() at the versions currently committed, read with one query."""
+    from .models import Showtime  # Local import to avoid circular dependencies
+
+    with use_primary():
+        versions = (
+            Showtime.objects.filter(pk=showtime_id)
+            .values_list("movie_room_id", "movie_room__layout_version", "seats_version")
+            .first()
+        )
+    if versions is None:
+        return None
+    room_id, layout_version, seats_version = versions
+    layout = get_room_layout(room_id, layout_version)
+    return layout, cached_bitmap(layout, showtime_id, seats_version)
+
+
+def cached_bitmap(layout, showtime_id, seats_version):
+    """The showtime's bitmap over ``layout`` at ``seats_version``, built on a miss."""
+    key = OCCUPANCY_KEY.format(showtime_id=showtime_id, seats_version=seats_version, layout_version=layout.version)
+    bitmap = cache.get(key)
+    if bitmap is None:
+        # From the primary: a replica may not have the tickets of this version yet
+        bitmap = _read_bitmap(layout, showtime_id)
+        cache.set(key, bitmap, OCCUPANCY_TIMEOUT)
+    return bitmap
+
+
+def read_occupancy(showtime):
+    """(layout, bitmap) straight from the primary, bypassing both caches' versions."""
+    layout = current_room_layout(showtime.movie_room_id)
+    return layout, _read_bitmap(layout, showtime.pk)
+
+
+def _read_bitmap(layout, showtime_id):
+    from .models import Ticket  # Local import to avoid circular dependencies
+
+    bitmap = layout.empty_bitmap()
+    index = layout.index_by_seat
+    with use_primary():
+        for seat_id in Ticket.objects.filter(showtime_id=showtime_id).values_list("seat_id", flat=True):
+            bit = index.get(seat_id)
+            if bit is not None:
+                bitmap[bit >> 3] |= 1 << (bit & 7)
+    return bytes(bitmap)
+
+
+def record_seat_changes(showtime_id, seat_ids, reserved):
+    """
+    Move the showtime to a new seats version inside the current transaction,
+    and push the change to open seat streams once it commits.
+    """
+    from . import seat_stream  # Local import to avoid circular dependencies
+    from .models import Showtime  # Local import to avoid circular dependencies
+
+    Showtime.objects.filter(pk=showtime_id).update(seats_version=F("seats_version") + 1)
+    seat_ids = list(seat_ids)
+    transaction.on_commit(lambda: seat_stream.publish(showtime_id, seat_ids, reserved))
+
+
+def is_reserved(bitmap, bit):
+    return bool(bitmap[bit >> 3] & (1 << (bit & 7)))
+
+
+def seat_map(showtime):
+    """Seat availability in the verbose per-seat JSON shape."""
+    return format_seat_map(*get_occupancy(showtime))
+
+
+def compact_seat_map(showtime):
+    """Seat availability as a base64 bitset plus the room layout descriptor."""
+    return format_compact_seat_map(showtime.pk, *get_occupancy(showtime))
+
+
+# best_block: the preferred row, as a fraction of the way from the screen to the back
+BEST_ROW_FRACTION = 0.6
+
+
+def best_block(layout, bitmap, count, seat_class=None):
+    """
+    The best free run of ``count`` side-by-side seats, as ``(score, seats)``.
+
+    Each row is scanned once for runs of free seats (aisles, gaps and
+    reserved seats end a run); a long enough run contributes its window
+    nearest the centre line. Windows score by their distance from the
+    preferred row plus their distance from the centre, both relative to
+    the room size, lower being better, so a request costs O(rows x cols).
+    Accessible seats are only offered when asked for by ``seat_class``.
+    Returns None when no row has room.
+    """
+    from .models import Seat  # Local import to avoid circular dependencies
+
+    cols = layout.cols
+    rows = len(layout.rows)
+    if count < 1 or count > cols:
+        return None
+    ideal_row = (rows - 1) * BEST_ROW_FRACTION
+    centre = (cols - 1) / 2
+    seat_at = layout.seat_at
+    seats = layout.seats
+
+    best = None
+    for r in range(rows):
+        base = r * cols
+        row_penalty = abs(r - ideal_row) / rows
+        run_start = None
+        for c in range(cols + 1):
+            free = False
+            if c < cols:
+                bit = base + c
+                i = seat_at[bit]
+                if i >= 0 and not bitmap[bit >> 3] & (1 << (bit & 7)):
+                    if seat_class:
+                        free = seats[i][4] == seat_class
+                    else:
+                        free = seats[i][4] != Seat.SeatClass.ACCESSIBLE
+            if free:
+                if run_start is None:
+                    run_start = c
+                continue
+            if run_start is not None and c - run_start >= count:
+                start = min(max(round(centre - (count - 1) / 2), run_start), c - count)
+                score = row_penalty + abs(start + (count - 1) / 2 - centre) / cols
+                if best is None or score < best[0]:
+                    best = (score, base + start)
+            run_start = None
+
+    if best is None:
+        return None
+    score, first = best
+    return round(score, 4), [seats[seat_at[bit]] for bit in range(first, first + count)]
+
+
+def format_seat_map(layout, bitmap):
+    return [
+        {
+            "id": seat_id,
+            "row": row,
+            "number": number,
+            "column": bit % layout.cols + 1,
+            "seatClass": seat_class,
+            "isReserved": is_reserved(bitmap, bit),
+        }
+        for seat_id, row, number, bit, seat_class in layout.seats
+    ]
+
+
+def format_compact_seat_map(showtime_id, layout, bitmap):
+    return {
+        "showtime": showtime_id,
+        "layout": layout.descriptor(),
+        "reserved": base64.b64encode(bitmap).decode("ascii"),
+    }
@@ -2,12 +2,14 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.utils import timezone
+from . import hashing, scheduling
 from .models import (
     Booking,
     Movie,
     MovieRoom,
     PaymentCard,
     Promotion,
+    PromotionEmailJob,
     Seat,
     Showtime,
     Showroom,
@@ -20,7 +22,13 @@ from .models import (
 # MOVIES
 # ============================
 class MovieSerializer(serializers.ModelSerializer):
-    """Serializer for Movie model."""
+    """
+    Serializer for Movie model.
+
+    Reads upcoming showtimes from the ``upcoming_showtimes`` prefetch when the
+    view provides one; pass ``include_showtimes=False`` in the context to drop
+    the field altogether.
+    """
     poster = serializers.URLField(source="movie_poster_URL")
     trailerId = serializers.CharField(source="trailer_id")
     releaseDate = serializers.DateField(source="release_date", read_only=True)
@@ -33,12 +41,19 @@ class MovieSerializer(serializers.ModelSerializer):
             "genre", "category", "showtimes", "trailerId", "releaseDate", "duration"
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.context.get("include_showtimes") is False:
+            self.fields.pop("showtimes")
+
     def get_showtimes(self, obj):
-        upcoming = (
-            Showtime.objects.filter(movie=obj, starts_at__gte=timezone.now())
-            .select_related("movie_room")
-            .order_by("starts_at")
-        )
+        upcoming = getattr(obj, "upcoming_showtimes", None)
+        if upcoming is None:
+            upcoming = (
+                Showtime.objects.filter(movie=obj, starts_at__gte=timezone.now())
+                .select_related("movie_room")
+                .order_by("starts_at")
+            )
 
         return [
             {
@@ -115,14 +130,16 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         validated_data.pop("password_confirm")
         subscribed = validated_data.pop("subscribed_to_promotions", True)
 
-        user = User.objects.create_user(**validated_data)
-        user.is_active = False
-        user.save()
+        password = validated_data.pop("password")
 
-        # Ensure the UserProfile exists (signals may have already created it)
-        profile, _ = UserProfile.objects.get_or_create(user=user)
-        profile.subscribed_to_promotions = subscribed
-        profile.save()
+        # One INSERT for the user; the ensure_user_profile signal inserts the
+        # profile with these defaults in the same save.
+        user = User(**validated_data, is_active=False)
+        user.username = user.normalize_username(user.username)
+        user.email = User.objects.normalize_email(user.email)
+        hashing.set_password(user, password)
+        user.profile_defaults = {"subscribed_to_promotions": subscribed}
+        user.save()
 
         return user
 
@@ -136,7 +153,7 @@ class PaymentCardSerializer(serializers.ModelSerializer):
     class Meta:
         model = PaymentCard
         fields = [
-            "id", "card_number", "card_number_masked", "card_holder_name",
+            "id", "card_number", "card_number_masked", "card_last4", "card_brand", "card_holder_name",
             "expiry_month", "expiry_year", "cvv",
             "billing_street", "billing_city", "billing_state", "billing_zip",
             "is_default", "created_at"
@@ -147,8 +164,9 @@ class PaymentCardSerializer(serializers.ModelSerializer):
         }
 
     def get_card_number_masked(self, obj):
-        if obj.card_number:
-            return f"****-****-****-{obj.card_number[-4:]}"
+        # From the stored projection: reading card_number would decrypt it
+        if obj.card_last4:
+            return f"****-****-****-{obj.card_last4}"
         return ""
 
     def validate_card_number(self, value):
@@ -227,7 +245,7 @@ class PasswordChangeSerializer(serializers.Serializer):
 
     def validate_current_password(self, value):
         user = self.context["request"].user
-        if not user.check_password(value):
+        if not hashing.check_password(user, value):
             raise serializers.ValidationError("Current password is incorrect")
         return value
 
@@ -238,7 +256,7 @@ class PasswordChangeSerializer(serializers.Serializer):
 
     def save(self):
         user = self.context["request"].user
-        user.set_password(self.validated_data["new_password"])
+        hashing.set_password(user, self.validated_data["new_password"])
         user.save()
         return user
 
@@ -252,6 +270,22 @@ class PromotionSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class PromotionEmailJobSerializer(serializers.ModelSerializer):
+    promo_code = serializers.CharField(source="promotion.promo_code", read_only=True)
+    processed_count = serializers.IntegerField(read_only=True)
+    throughput = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = PromotionEmailJob
+        fields = [
+            "id", "promotion", "promo_code", "status", "total_recipients",
+            "sent_count", "failed_count", "processed_count", "throughput",
+            "last_error", "attempts", "next_attempt_at",
+            "created_at", "started_at", "finished_at", "updated_at",
+        ]
+        read_only_fields = fields
+
+
 # ============================
 # ADMIN PANEL: MOVIE ROOMS
 # ============================
@@ -259,6 +293,8 @@ class MovieRoomSerializer(serializers.ModelSerializer):
     class Meta:
         model = MovieRoom
         fields = "__all__"
+        # Changed through /layout/, which also rewrites the seats
+        read_only_fields = ["layout"]
 
 
 # ============================
@@ -275,18 +311,34 @@ class ShowtimeSerializer(serializers.ModelSerializer):
         movie_room = attrs.get("movie_room") or getattr(self.instance, "movie_room", None)
         starts_at = attrs.get("starts_at") or getattr(self.instance, "starts_at", None)
 
-        if movie_room and starts_at:
-            qs = Showtime.objects.filter(movie_room=movie_room, starts_at=starts_at)
-            if self.instance and self.instance.pk:
-                qs = qs.exclude(pk=self.instance.pk)
-            if qs.exists():
+        movie = attrs.get("movie") or getattr(self.instance, "movie", None)
+
+        if movie_room and starts_at and movie:
+            # The room is busy for the whole running time plus cleaning, not just at starts_at
+            block = scheduling.find_conflict(
+                movie_room.pk,
+                starts_at,
+                movie.duration,
+                exclude_pk=self.instance.pk if self.instance else None,
+            )
+            if block is not None:
                 raise serializers.ValidationError(
-                    "Another movie is already scheduled in this showroom at that time."
+                    "Another movie is already scheduled in this showroom at that time. "
+                    + scheduling.describe_conflict(block)
                 )
 
         return attrs
 
 
+class ScheduleSlotSerializer(serializers.Serializer):
+    """One showtime of a POST /api/admin/showtimes/bulk_schedule/ body."""
+    movie = serializers.IntegerField(min_value=1)
+    movie_room = serializers.IntegerField(min_value=1)
+    starts_at = serializers.DateTimeField()
+    format = serializers.ChoiceField(choices=Showtime.Format.choices, default=Showtime.Format.TWO_D)
+    base_price = serializers.DecimalField(max_digits=7, decimal_places=2, min_value=0)
+
+
 class ShowroomSerializer(serializers.ModelSerializer):
     class Meta:
         model = Showroom
@@ -326,4 +378,58 @@ class BookingSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Booking
-        fields = ["id", "created_at", "status", "total_amount", "promo_code", "tickets"]
+        fields = ["id", "created_at", "status", "total_amount", "promo_code", "show_starts_at", "tickets"]
+
+
+class PlacedBookingSerializer(BookingSerializer):
+    """BookingSerializer for a booking just placed; ``context["tickets"]`` is its serialized tickets."""
+    tickets = serializers.SerializerMethodField()
+
+    def get_tickets(self, booking):
+        return self.context["tickets"]
+
+
+class BookingHistorySerializer(serializers.BaseSerializer):
+    """
+    Read-only booking history in the same shape as BookingSerializer.
+
+    Built in a single to_representation pass over bookings whose tickets were
+    prefetched with their seat, showtime, movie and room (see
+    BookingViewSet.my), so it never touches the database.
+    """
+    _datetime = serializers.DateTimeField()
+    _money = serializers.DecimalField(max_digits=8, decimal_places=2)
+
+    def to_representation(self, booking):
+        datetime_field = self._datetime
+        money = self._money
+        tickets = []
+        for ticket in booking.tickets.all():
+            seat = ticket.seat
+            showtime = ticket.showtime
+            tickets.append({
+                "id": ticket.id,
+                "seat": {"id": seat.id, "row": seat.row, "number": seat.number},
+                "price": money.to_representation(ticket.price),
+                "ticket_type": ticket.ticket_type,
+                "showtime": {
+                    "id": showtime.id,
+                    "starts_at": datetime_field.to_representation(showtime.starts_at),
+                    "format": showtime.format,
+                    "movie_title": showtime.movie.title,
+                    "movie_slug": showtime.movie.slug,
+                    "movie_room_name": showtime.movie_room.name,
+                },
+            })
+
+        return {
+            "id": booking.id,
+            "created_at": datetime_field.to_representation(booking.created_at),
+            "status": booking.status,
+            "total_amount": money.to_representation(booking.total_amount),
+            "promo_code": booking.promo_code,
+            "show_starts_at": (
+                datetime_field.to_representation(booking.show_starts_at) if booking.show_starts_at else None
+            ),
+            "tickets": tickets,
+        }
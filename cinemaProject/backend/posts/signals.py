@@ -1,14 +1,57 @@
 # posts/signals.py
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import UserProfile
+from . import auth_snapshot, catalog_cache, seatmap
+from .models import Movie, MovieRoom, Seat, Showtime, Ticket, UserProfile
 
 @receiver(post_save, sender=User)
 def ensure_user_profile(sender, instance, created, **kwargs):
-    # Create a profile when a user is created
+    # Create the profile exactly once, with the user. Later saves (last_login
+    # on every login, profile edits) cost nothing; users that predate this got
+    # theirs in migration 0020 (or `manage.py backfill_user_profiles`).
     if created:
-        UserProfile.objects.get_or_create(user=instance)
-    else:
-        # Guarantee the relation exists even for legacy users
-        UserProfile.objects.get_or_create(user=instance)
\ No newline at end of file
+        UserProfile.objects.create(user=instance, **getattr(instance, "profile_defaults", {}))
+
+
+# Auth-status snapshots follow user, password and profile changes
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_snapshot(sender, instance, **kwargs):
+    auth_snapshot.invalidate_on_commit(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_snapshot(sender, instance, **kwargs):
+    auth_snapshot.invalidate_on_commit(instance.user_id)
+
+
+# Keep cached seat maps in step with one-off ticket writes (bookings and
+# cancellations call seatmap directly, once per showtime)
+@receiver(post_save, sender=Ticket)
+def reserve_seat_in_seat_map(sender, instance, created, **kwargs):
+    if created:
+        seatmap.record_seat_changes(instance.showtime_id, [instance.seat_id], reserved=True)
+
+
+@receiver(post_delete, sender=Ticket)
+def release_seat_in_seat_map(sender, instance, **kwargs):
+    seatmap.record_seat_changes(instance.showtime_id, [instance.seat_id], reserved=False)
+
+
+@receiver(post_save, sender=Seat)
+@receiver(post_delete, sender=Seat)
+def invalidate_seat_layout(sender, instance, **kwargs):
+    seatmap.invalidate_room_layout(instance.movie_room_id)
+
+
+# Any catalog change moves the catalog cache to a new version
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+@receiver(post_save, sender=Showtime)
+@receiver(post_delete, sender=Showtime)
+@receiver(post_save, sender=MovieRoom)
+@receiver(post_delete, sender=MovieRoom)
+def invalidate_catalog_cache(sender, instance, **kwargs):
+    catalog_cache.bump_version_on_commit()
@@ -1,12 +1,46 @@
-from datetime import timedelta
+import asyncio
+import base64
+import importlib
+import json
+import smtplib
+import tempfile
+import threading
+import uuid
+from io import StringIO
+from unittest import mock
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 
-from django.test import TestCase, override_settings
+from asgiref.sync import async_to_sync, sync_to_async
+from cryptography.fernet import Fernet
+from encrypted_model_fields import fields as encrypted_fields
+from django.apps import apps
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.models import F, TextField
+from django.db.models.functions import Cast
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
-from django.contrib.auth.models import User
+from django.contrib.auth import get_user
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.auth.signals import user_login_failed
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
 from django.core import mail
-from rest_framework.test import APIClient
+from django.core.mail.backends import locmem
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.urls import resolve
+from rest_framework.test import APIClient, APIRequestFactory
 
-from .models import Movie, MovieRoom, Promotion, Showtime, Showroom, UserProfile
+from .models import AccountToken, Booking, Customer, EncryptionRotationJob, IdempotencyRecord, Movie, MovieRoom, OutboundEmail, PaymentCard, Promotion, PromotionEmailJob, Seat, Showtime, Showroom, Ticket, UserProfile
+from . import async_views, key_rotation, room_layouts, scheduling, search, seat_stream, seatmap
+from .hashing import HashingPool, PasswordHashingBusy, amake_password, reset_pool
+from .outbox import deliver_batch, queue_email
+from .promotion_mailer import advance_promotion_jobs, claim_promotion_job, run_promotion_job, start_promotion_job, subscribers_after
+from .routers import ReplicaRouter, is_sticky, read_alias_for, use_database, use_primary
+from .serializers import BookingSerializer
+from .views import BookingViewSet, schedule_showtimes
 
 
 class AdminPortalIntegrationTests(TestCase):
@@ -124,8 +158,1818 @@ class AdminPortalIntegrationTests(TestCase):
 
 		mail.outbox.clear()
 		send_response = self.client.post(f"/api/admin/promotions/{promotion_id}/send_email/")
-		self.assertEqual(send_response.status_code, 200, send_response.data)
+		self.assertEqual(send_response.status_code, 202, send_response.data)
+		self.assertEqual(len(mail.outbox), 0)
+		call_command("send_queued_emails")
 		self.assertEqual(len(mail.outbox), 1)
 		self.assertIn("WINTER25", mail.outbox[0].subject)
 		self.assertEqual(mail.outbox[0].to, ["sub@example.com"])
 
+
+class BookingFlowTests(TestCase):
+	"""Exercise the customer booking pipeline end to end."""
+
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user(username="moviegoer", password="pass", email="goer@example.com")
+		self.client = APIClient()
+		self.client.force_authenticate(self.user)
+
+		self.movie = Movie.objects.create(
+			title="Booking Movie",
+			description="A film worth booking",
+			rating="PG",
+			duration=100,
+			genre="Comedy",
+		)
+		self.movie_room = MovieRoom.objects.create(name="Room 1", capacity=24)
+		self.seats = Seat.objects.bulk_create(
+			[Seat(movie_room=self.movie_room, row=row, number=num) for row in "AB" for num in range(1, 13)]
+		)
+		self.showtime = Showtime.objects.create(
+			movie=self.movie,
+			movie_room=self.movie_room,
+			starts_at=timezone.now() + timedelta(days=2),
+			base_price="12.50",
+		)
+
+	def book(self, seats, **extra):
+		payload = {"showtime": self.showtime.id, "seats": seats, "payment_method": "card", **extra}
+		return self.client.post("/api/bookings/", payload, format="json")
+
+	def test_group_booking_prices_and_inserts_every_ticket(self):
+		seats = [{"seat": seat.id, "ticket_type": "ADULT"} for seat in self.seats[:6]]
+		seats.append({"seat": self.seats[6].id, "ticket_type": "CHILD"})
+		seats.append({"seat": self.seats[7].id, "ticket_type": "SENIOR"})
+
+		response = self.book(seats)
+		self.assertEqual(response.status_code, 201, response.data)
+		self.assertEqual(Ticket.objects.filter(showtime=self.showtime).count(), 8)
+
+		booking = Booking.objects.get(pk=response.data["booking"]["id"])
+		self.assertEqual(booking.status, Booking.Status.CONFIRMED)
+		# 6 x 12.50 + 10.00 (child) + 10.63 (senior)
+		self.assertEqual(str(booking.total_amount), "95.63")
+		self.assertEqual(len(response.data["booking"]["tickets"]), 8)
+		self.assertEqual(response.data["pricing"]["total_after_discount"], "95.63")
+
+	def test_saved_card_booking_records_last4_without_decrypting(self):
+		card = PaymentCard.objects.create(
+			user=self.user, card_number="4242424242424242", card_holder_name="Goer",
+			expiry_month=12, expiry_year=timezone.now().year + 1, cvv="321",
+		)
+		with mock.patch("encrypted_model_fields.fields.decrypt_str") as decrypt:
+			response = self.book([self.seats[0].id], payment_card_id=card.id)
+		self.assertEqual(response.status_code, 201, response.data)
+		decrypt.assert_not_called()
+		self.assertEqual(response.data["payment"]["card_last4"], "4242")
+
+	def test_booking_query_count_does_not_grow_with_seat_count(self):
+		Customer.objects.create(user=self.user)
+		with CaptureQueriesContext(connection) as small:
+			self.assertEqual(self.book([self.seats[0].id]).status_code, 201)
+		with CaptureQueriesContext(connection) as large:
+			self.assertEqual(self.book([seat.id for seat in self.seats[1:13]]).status_code, 201)
+		self.assertEqual(len(small), len(large))
+
+	def test_rejects_seats_that_are_already_booked(self):
+		self.assertEqual(self.book([self.seats[0].id, self.seats[1].id]).status_code, 201)
+		response = self.book([self.seats[1].id, self.seats[2].id])
+		self.assertEqual(response.status_code, 409, response.data)
+		self.assertEqual(Ticket.objects.filter(showtime=self.showtime).count(), 2)
+
+	def test_seat_map_tracks_bookings_and_cancellations_without_queries(self):
+		url = f"/api/showtimes/{self.showtime.id}/seats/"
+		self.assertFalse(any(seat["isReserved"] for seat in self.client.get(url).data))
+
+		with self.captureOnCommitCallbacks(execute=True):
+			response = self.book([self.seats[0].id, self.seats[13].id])
+		booking_id = response.data["booking"]["id"]
+
+		# The booking moved the showtime to a new seats version: one rebuild...
+		with self.assertNumQueries(2):
+			seats = self.client.get(url).data
+		reserved = {seat["id"] for seat in seats if seat["isReserved"]}
+		self.assertSetEqual(reserved, {self.seats[0].id, self.seats[13].id})
+		# ...then only the showtime lookup hits the database
+		with self.assertNumQueries(1):
+			self.assertEqual(self.client.get(url).data, seats)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client.post(f"/api/bookings/{booking_id}/cancel/")
+		self.assertFalse(any(seat["isReserved"] for seat in self.client.get(url).data))
+
+	def test_cancel_query_count_does_not_grow_with_ticket_count(self):
+		Customer.objects.create(user=self.user)
+		small = self.book([self.seats[0].id]).data["booking"]["id"]
+		large = self.book([seat.id for seat in self.seats[1:13]]).data["booking"]["id"]
+		with CaptureQueriesContext(connection) as one:
+			self.assertEqual(self.client.post(f"/api/bookings/{small}/cancel/").status_code, 200)
+		with CaptureQueriesContext(connection) as twelve:
+			self.assertEqual(self.client.post(f"/api/bookings/{large}/cancel/").status_code, 200)
+		self.assertEqual(len(one), len(twelve))
+		self.assertFalse(Ticket.objects.exists())
+		self.showtime.refresh_from_db()
+		# Two bookings, two cancellations
+		self.assertEqual(self.showtime.seats_version, 4)
+
+	def test_seat_map_shows_bookings_committed_by_other_processes(self):
+		url = f"/api/showtimes/{self.showtime.id}/seats/"
+		self.assertFalse(any(seat["isReserved"] for seat in self.client.get(url).data))
+
+		# What another worker's booking leaves behind: tickets and a new version, no local callbacks
+		booking = Booking.objects.create(customer=Customer.objects.create(user=self.user))
+		Ticket.objects.bulk_create([Ticket(booking=booking, showtime=self.showtime, seat=self.seats[2], price="10.00")])
+		Showtime.objects.filter(pk=self.showtime.pk).update(seats_version=F("seats_version") + 1)
+
+		reserved = [seat["id"] for seat in self.client.get(url).data if seat["isReserved"]]
+		self.assertEqual(reserved, [self.seats[2].id])
+
+	def test_seat_map_bitmap_encoding(self):
+		Ticket.objects.create(
+			booking=Booking.objects.create(customer=Customer.objects.create(user=self.user)),
+			showtime=self.showtime,
+			seat=self.seats[13],
+			price="12.50",
+		)
+		response = self.client.get(f"/api/showtimes/{self.showtime.id}/seats/", {"encoding": "bitmap"})
+		self.assertEqual(response.status_code, 200)
+
+		layout = response.data["layout"]
+		self.assertEqual(layout["rows"], ["A", "B"])
+		self.assertEqual(layout["cols"], 12)
+		reserved = base64.b64decode(response.data["reserved"])
+		# B2 sits at row 1, column 1 of the 12-wide grid
+		bits = [i for i in range(24) if reserved[i >> 3] & (1 << (i & 7))]
+		self.assertEqual(bits, [13])
+
+	def test_booking_history_query_count_is_constant(self):
+		Customer.objects.create(user=self.user)
+		self.assertEqual(self.book([self.seats[0].id]).status_code, 201)
+		with CaptureQueriesContext(connection) as short:
+			first = self.client.get("/api/bookings/my/")
+		for seat in self.seats[1:10]:
+			self.assertEqual(self.book([seat.id]).status_code, 201)
+		with CaptureQueriesContext(connection) as long:
+			response = self.client.get("/api/bookings/my/")
+
+		self.assertEqual(len(short), len(long))
+		self.assertEqual(len(response.data["results"]), 10)
+		# Same JSON shape as the booking returned from create
+		booking = Booking.objects.get(pk=first.data["results"][0]["id"])
+		self.assertEqual(first.data["results"][0], BookingSerializer(booking).data)
+
+	def test_booking_history_upcoming_filter(self):
+		self.assertEqual(self.book([self.seats[0].id]).status_code, 201)
+		past = Booking.objects.create(
+			customer=Customer.objects.get(user=self.user),
+			status=Booking.Status.CONFIRMED,
+			show_starts_at=timezone.now() - timedelta(days=1),
+		)
+
+		everything = self.client.get("/api/bookings/my/").data["results"]
+		upcoming = self.client.get("/api/bookings/my/", {"upcoming": "true"}).data["results"]
+		self.assertIn(past.id, [booking["id"] for booking in everything])
+		self.assertNotIn(past.id, [booking["id"] for booking in upcoming])
+		self.assertEqual(len(upcoming), 1)
+
+
+class FlakySMTPBackend(locmem.EmailBackend):
+	"""Local SMTP stand-in that counts connections and rejects flagged recipients."""
+
+	opened = 0
+
+	def open(self):
+		FlakySMTPBackend.opened += 1
+		return super().open()
+
+	def send_messages(self, messages):
+		for message in messages:
+			if any(address.startswith("bounce") for address in message.to):
+				raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b"mailbox unavailable")})
+		return super().send_messages(messages)
+
+
+@override_settings(
+	EMAIL_BACKEND="posts.tests.FlakySMTPBackend",
+	OUTBOX_RETRY_BASE_SECONDS=60,
+	OUTBOX_MAX_ATTEMPTS=2,
+)
+class EmailOutboxTests(TestCase):
+	"""Emails are queued with the business change and delivered by the worker."""
+
+	def setUp(self):
+		FlakySMTPBackend.opened = 0
+		mail.outbox = []
+
+	def test_registration_queues_email_without_sending(self):
+		payload = {
+			"username": "newbie",
+			"email": "newbie@example.com",
+			"password": "Sup3r-secret-pw",
+			"password_confirm": "Sup3r-secret-pw",
+			"first_name": "New",
+			"last_name": "User",
+		}
+		response = APIClient().post("/api/auth/register/", payload, format="json")
+		self.assertEqual(response.status_code, 201, response.data)
+		self.assertEqual(len(mail.outbox), 0)
+		self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.Status.PENDING).count(), 1)
+
+		call_command("send_queued_emails")
+		self.assertEqual(len(mail.outbox), 1)
+		self.assertEqual(mail.outbox[0].to, ["newbie@example.com"])
+		self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.Status.SENT)
+
+	def test_worker_reuses_one_connection_per_batch_and_backs_off(self):
+		for address in ["a@example.com", "bounce@example.com", "b@example.com"]:
+			queue_email("Hello", "Body", [address])
+
+		sent, failed = deliver_batch()
+		self.assertEqual((sent, failed), (2, 1))
+		self.assertEqual(FlakySMTPBackend.opened, 1)
+
+		bounced = OutboundEmail.objects.get(to=["bounce@example.com"])
+		self.assertEqual(bounced.status, OutboundEmail.Status.PENDING)
+		self.assertEqual(bounced.attempts, 1)
+		self.assertIn("mailbox unavailable", bounced.last_error)
+
+		# Not due again until the backoff elapses, then gives up at the attempt limit
+		self.assertEqual(deliver_batch(), (0, 0))
+		self.assertEqual(deliver_batch(now=timezone.now() + timedelta(minutes=5)), (0, 1))
+		bounced.refresh_from_db()
+		self.assertEqual(bounced.status, OutboundEmail.Status.FAILED)
+
+	def test_rows_leased_by_another_worker_are_not_sent_twice(self):
+		first, second = queue_email("One", "Body", ["one@example.com"]), queue_email("Two", "Body", ["two@example.com"])
+		real_uuid4 = uuid.uuid4
+
+		def rival_claims_first():
+			# Another worker's conditional UPDATE lands between our SELECT and ours
+			OutboundEmail.objects.filter(pk=first.pk).update(next_attempt_at=timezone.now() + timedelta(seconds=30))
+			return real_uuid4()
+
+		with mock.patch("posts.outbox.uuid.uuid4", side_effect=rival_claims_first):
+			self.assertEqual(deliver_batch(), (1, 0))
+		self.assertEqual([message.to for message in mail.outbox], [["two@example.com"]])
+		first.refresh_from_db()
+		self.assertEqual((first.status, first.attempts), (OutboundEmail.Status.PENDING, 0))
+		self.assertEqual(OutboundEmail.objects.get(pk=second.pk).claim_token, "")
+
+	def test_overlapping_batches_never_send_the_same_row_twice(self):
+		for n in range(3):
+			queue_email(f"Mail {n}", "Body", [f"user{n}@example.com"])
+		clock = [timezone.now()]
+		rival = []
+		real_send = FlakySMTPBackend.send_messages
+
+		def slow_send(backend, messages):
+			# Every send takes 200s, so the last row's original 300s lease runs out mid-batch
+			clock[0] += timedelta(seconds=200)
+			if len(mail.outbox) == 1 and not rival:
+				rival.append(None)
+				rival[0] = deliver_batch()
+			return real_send(backend, messages)
+
+		with (
+			override_settings(OUTBOX_LEASE_SECONDS=300),
+			mock.patch("django.utils.timezone.now", side_effect=lambda: clock[0]),
+			mock.patch.object(FlakySMTPBackend, "send_messages", slow_send),
+		):
+			first = deliver_batch()
+
+		self.assertEqual((first, rival[0]), ((2, 0), (1, 0)))
+		self.assertEqual(sorted(message.to[0] for message in mail.outbox), ["user0@example.com", "user1@example.com", "user2@example.com"])
+		self.assertEqual(set(OutboundEmail.objects.values_list("status", "attempts", "claim_token")), {(OutboundEmail.Status.SENT, 1, "")})
+
+	def test_prune_deletes_only_old_sent_emails(self):
+		old, recent, pending = (queue_email(subject, "Body", ["x@example.com"]) for subject in ("Old", "Recent", "Pending"))
+		OutboundEmail.objects.filter(pk=old.pk).update(status=OutboundEmail.Status.SENT, sent_at=timezone.now() - timedelta(days=30))
+		OutboundEmail.objects.filter(pk=recent.pk).update(status=OutboundEmail.Status.SENT, sent_at=timezone.now())
+
+		out = StringIO()
+		call_command("prune_sent_emails", days=14, batch_size=1, stdout=out)
+		self.assertIn("Deleted 1 sent email(s)", out.getvalue())
+		self.assertEqual(set(OutboundEmail.objects.values_list("pk", flat=True)), {recent.pk, pending.pk})
+
+
+class VanishingSMTPBackend(locmem.EmailBackend):
+	"""Local SMTP stand-in whose server goes away after ``accepts`` messages or ``opens`` connections."""
+
+	accepts = opens = 10 ** 6
+	closed = 0
+
+	def open(self):
+		if VanishingSMTPBackend.opens <= 0:
+			raise ConnectionRefusedError("Connection refused")
+		VanishingSMTPBackend.opens -= 1
+		return super().open()
+
+	def close(self):
+		VanishingSMTPBackend.closed += 1
+		return super().close()
+
+	def send_messages(self, messages):
+		if VanishingSMTPBackend.accepts <= 0:
+			VanishingSMTPBackend.opens = 0
+			raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+		VanishingSMTPBackend.accepts -= len(messages)
+		return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND="posts.tests.FlakySMTPBackend", PROMOTION_EMAIL_POOL_SIZE=2)
+class PromotionBlastTests(TestCase):
+	"""Promotion emails go out as a resumable, chunked background job."""
+
+	def setUp(self):
+		FlakySMTPBackend.opened = 0
+		mail.outbox = []
+		self.admin = User.objects.create_superuser(username="boss", password="pass", email="")
+		self.client = APIClient()
+		self.client.force_authenticate(self.admin)
+		self.subscribers = [
+			User.objects.create_user(username=f"fan{i}", password="pass", email=f"fan{i}@example.com")
+			for i in range(7)
+		]
+		self.promotion = Promotion.objects.create(
+			promo_code="BLAST10",
+			discount_percent="10.00",
+			start_date=timezone.now().date(),
+			end_date=(timezone.now() + timedelta(days=7)).date(),
+		)
+
+	def test_endpoint_returns_job_and_progress_is_exposed(self):
+		response = self.client.post(f"/api/admin/promotions/{self.promotion.id}/send_email/")
+		self.assertEqual(response.status_code, 202, response.data)
+		job_id = response.data["job_id"]
+		self.assertEqual(response.data["job"]["total_recipients"], 7)
+		self.assertEqual(len(mail.outbox), 0)
+
+		# Re-sending while the job is queued does not start a second blast
+		again = self.client.post(f"/api/admin/promotions/{self.promotion.id}/send_email/")
+		self.assertEqual(again.data["job_id"], job_id)
+
+		job = PromotionEmailJob.objects.get(pk=job_id)
+		self.assertEqual(run_promotion_job(job, chunk_size=3), 3)
+		self.assertEqual(len(mail.outbox), 7)
+		self.assertEqual(FlakySMTPBackend.opened, 2)
+		# Pool threads deliver in any order
+		first = next(message for message in mail.outbox if message.to == ["fan0@example.com"])
+		self.assertIn("Hi fan0,", first.body)
+
+		progress = self.client.get(f"/api/admin/promotion-email-jobs/{job_id}/").data
+		self.assertEqual(progress["status"], PromotionEmailJob.Status.COMPLETED)
+		self.assertEqual(progress["sent_count"], 7)
+		self.assertIn("throughput", progress)
+
+	def test_interrupted_job_resumes_after_checkpoint(self):
+		job = start_promotion_job(self.promotion)
+		self.assertEqual(run_promotion_job(job, max_chunks=1, chunk_size=4), 1)
+		self.assertEqual(len(mail.outbox), 4)
+		job.refresh_from_db()
+		self.assertEqual(job.status, PromotionEmailJob.Status.RUNNING)
+
+		# A fresh worker picks the job up from the stored last_profile_id
+		call_command("send_queued_emails")
+		recipients = sorted(message.to[0] for message in mail.outbox)
+		self.assertEqual(recipients, sorted(user.email for user in self.subscribers))
+		job.refresh_from_db()
+		self.assertEqual((job.status, job.sent_count), (PromotionEmailJob.Status.COMPLETED, 7))
+
+
+	@override_settings(EMAIL_BACKEND="posts.tests.VanishingSMTPBackend")
+	def test_smtp_outage_leaves_the_job_resumable(self):
+		VanishingSMTPBackend.accepts, VanishingSMTPBackend.opens, VanishingSMTPBackend.closed = 5, 10 ** 6, 0
+		job = start_promotion_job(self.promotion)
+		# The server vanishes one message into the second chunk
+		self.assertEqual(run_promotion_job(job, chunk_size=4), 1)
+		job.refresh_from_db()
+		self.assertEqual(job.status, PromotionEmailJob.Status.RUNNING)
+		self.assertIn("SMTP connection lost", job.last_error)
+		self.assertEqual((job.sent_count, job.last_profile_id), (4, self.subscribers[3].profile.pk))
+
+		# Still down: the pool cannot open, and the connection that did is closed again
+		VanishingSMTPBackend.opens, VanishingSMTPBackend.closed = 1, 0
+		self.assertEqual(run_promotion_job(job, chunk_size=4), 0)
+		self.assertEqual(VanishingSMTPBackend.closed, 1)
+
+		# Back up: the unfinished chunk is resent and the job completes
+		VanishingSMTPBackend.accepts = VanishingSMTPBackend.opens = 10 ** 6
+		run_promotion_job(job, chunk_size=4)
+		job.refresh_from_db()
+		self.assertEqual((job.status, job.sent_count), (PromotionEmailJob.Status.COMPLETED, 7))
+		self.assertEqual({message.to[0] for message in mail.outbox}, {user.email for user in self.subscribers})
+
+	@override_settings(EMAIL_BACKEND="posts.tests.VanishingSMTPBackend", PROMOTION_EMAIL_MAX_ATTEMPTS=2)
+	def test_job_backs_off_and_fails_after_max_attempts(self):
+		VanishingSMTPBackend.accepts, VanishingSMTPBackend.opens = 10 ** 6, 0
+		job = start_promotion_job(self.promotion)
+		self.assertEqual(advance_promotion_jobs(), 0)
+		job.refresh_from_db()
+		self.assertEqual((job.status, job.attempts, job.claim_token), (PromotionEmailJob.Status.RUNNING, 1, ""))
+		self.assertGreater(job.next_attempt_at, timezone.now())
+
+		# Backing off: the worker loop leaves it alone until next_attempt_at
+		with mock.patch("posts.promotion_mailer.SMTPConnectionPool") as pool:
+			self.assertEqual(advance_promotion_jobs(), 0)
+		pool.assert_not_called()
+
+		PromotionEmailJob.objects.filter(pk=job.pk).update(next_attempt_at=timezone.now())
+		advance_promotion_jobs()
+		job.refresh_from_db()
+		self.assertEqual((job.status, job.attempts), (PromotionEmailJob.Status.FAILED, 2))
+		self.assertIsNotNone(job.finished_at)
+		self.assertEqual(len(mail.outbox), 0)
+
+	def test_leased_job_is_not_picked_up_by_another_worker(self):
+		job = claim_promotion_job(PromotionEmailJob.objects.filter(pk=start_promotion_job(self.promotion).pk))
+		self.assertEqual(advance_promotion_jobs(), 0)
+		self.assertEqual(run_promotion_job(PromotionEmailJob.objects.get(pk=job.pk)), 0)
+		self.assertEqual(len(mail.outbox), 0)
+
+		# Once the lease runs out, another worker takes over
+		PromotionEmailJob.objects.filter(pk=job.pk).update(next_attempt_at=timezone.now())
+		self.assertEqual(advance_promotion_jobs(), 1)
+		self.assertEqual(len(mail.outbox), 7)
+
+	def test_concurrent_send_email_requests_start_one_job(self):
+		rival = []
+
+		def count_then_race(profile_id):
+			# Another request creates its job between our check and our insert
+			if not rival:
+				rival.append(PromotionEmailJob.objects.create(promotion=self.promotion))
+			return subscribers_after(profile_id)
+
+		with mock.patch("posts.promotion_mailer.subscribers_after", side_effect=count_then_race):
+			job = start_promotion_job(self.promotion)
+		self.assertEqual(job.pk, rival[0].pk)
+		self.assertEqual(PromotionEmailJob.objects.filter(promotion=self.promotion).count(), 1)
+
+	def test_worker_loop_survives_errors(self):
+		class Stop(BaseException):
+			pass
+
+		with mock.patch("posts.management.commands.send_queued_emails.drain_outbox", side_effect=RuntimeError("db gone")), \
+				mock.patch("posts.management.commands.send_queued_emails.time.sleep", side_effect=[None, Stop]) as sleep:
+			stderr = StringIO()
+			with self.assertRaises(Stop):
+				call_command("send_queued_emails", "--loop", stderr=stderr, stdout=StringIO())
+		self.assertEqual(sleep.call_count, 2)
+		self.assertIn("db gone", stderr.getvalue())
+
+
+class MovieCatalogTests(TestCase):
+	"""The public catalog loads showtimes with a constant number of queries."""
+
+	def setUp(self):
+		cache.clear()
+		self.client = APIClient()
+		self.rooms = [MovieRoom.objects.create(name=f"Hall {i}", capacity=50) for i in range(2)]
+		now = timezone.now()
+		for i in range(6):
+			movie = Movie.objects.create(
+				title=f"Catalog Movie {i}", description="", rating="PG", duration=90, genre="Drama"
+			)
+			Showtime.objects.create(movie=movie, movie_room=self.rooms[0], starts_at=now - timedelta(days=1, minutes=i), base_price="10.00")
+			for room in self.rooms:
+				Showtime.objects.create(movie=movie, movie_room=room, starts_at=now + timedelta(days=1, minutes=i), base_price="10.00")
+
+	def test_movie_list_query_count_is_constant(self):
+		# Movies, prefetched showtimes, and the cache-expiry lookup on a miss
+		with self.assertNumQueries(3):
+			response = self.client.get("/api/movies/")
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(len(response.json()["results"]), 6)
+		for movie in response.json()["results"]:
+			self.assertEqual(len(movie["showtimes"]), 2)
+			self.assertTrue(all(showtime["movie_room_name"] for showtime in movie["showtimes"]))
+
+		with self.captureOnCommitCallbacks(execute=True):
+			Movie.objects.create(title="One More", description="", rating="R", duration=90, genre="Horror")
+		with self.assertNumQueries(3):
+			self.client.get("/api/movies/")
+
+	def test_movie_detail_uses_the_same_prefetch(self):
+		with self.assertNumQueries(3):
+			response = self.client.get("/api/movies/catalog-movie-3/")
+		self.assertEqual(len(response.json()["showtimes"]), 2)
+
+	def test_showtimes_can_be_skipped(self):
+		with self.assertNumQueries(1):
+			response = self.client.get("/api/movies/", {"include_showtimes": "false"})
+		self.assertNotIn("showtimes", response.json()["results"][0])
+
+	def test_catalog_is_served_from_cache_until_it_changes(self):
+		first = self.client.get("/api/movies/")
+		self.assertEqual(first["X-Catalog-Cache"], "MISS")
+		with self.assertNumQueries(0):
+			second = self.client.get("/api/movies/")
+		self.assertEqual(second["X-Catalog-Cache"], "HIT")
+		self.assertEqual(first.content, second.content)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			Showtime.objects.create(
+				movie=Movie.objects.get(slug="catalog-movie-0"),
+				movie_room=self.rooms[1],
+				starts_at=timezone.now() + timedelta(days=3),
+				base_price="11.00",
+			)
+		third = self.client.get("/api/movies/")
+		self.assertEqual(third["X-Catalog-Cache"], "MISS")
+		self.assertEqual(len(third.json()["results"][0]["showtimes"]), 3)
+
+		admin = User.objects.create_superuser(username="root", password="pass", email="root@example.com")
+		self.client.force_authenticate(admin)
+		stats = self.client.get("/api/admin/catalog-cache/").data
+		self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+	def test_catalog_cache_works_with_file_based_backend(self):
+		with tempfile.TemporaryDirectory() as location:
+			file_cache = {"default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": location}}
+			with override_settings(CACHES=file_cache):
+				self.assertEqual(self.client.get("/api/movies/catalog-movie-1/")["X-Catalog-Cache"], "MISS")
+				self.assertEqual(self.client.get("/api/movies/catalog-movie-1/")["X-Catalog-Cache"], "HIT")
+
+
+class MovieSearchTests(TestCase):
+	"""Full-text search ranks, prefix-matches and follows catalog edits."""
+
+	def setUp(self):
+		cache.clear()
+		self.client = APIClient()
+		for title, description, genre, category in [
+			("Star Wars", "A galaxy far away", "Sci-Fi", "currently-running"),
+			("Starship Troopers", "Bugs in space", "Sci-Fi", "coming-soon"),
+			("Moon", "A lonely star miner on the moon", "Drama", "currently-running"),
+			("Jaws", "A shark", "Thriller", "currently-running"),
+		]:
+			Movie.objects.create(title=title, description=description, rating="PG", duration=100, genre=genre, category=category)
+
+	def titles(self, **params):
+		response = self.client.get("/api/movies/search/", {"include_showtimes": "false", **params})
+		self.assertEqual(response.status_code, 200, response.content)
+		return [movie["title"] for movie in response.json()["results"]]
+
+	def test_ranking_prefixes_and_filters(self):
+		self.assertEqual(self.titles(q="star"), ["Star Wars", "Starship Troopers", "Moon"])
+		self.assertEqual(self.titles(q="star wa"), ["Star Wars"])
+		self.assertEqual(self.titles(q="sta", category="coming-soon"), ["Starship Troopers"])
+		self.assertEqual(self.titles(q="star", genre="drama"), ["Moon"])
+		self.assertEqual(self.titles(q="star", limit=1), ["Star Wars"])
+		self.assertEqual(self.titles(q="star", title_only="true"), ["Star Wars", "Starship Troopers"])
+		# FTS5 operators in user input are matched as plain words
+		self.assertEqual(self.titles(q='star" OR (jaws'), [])
+		self.assertEqual(self.client.get("/api/movies/search/", {"q": " "}).status_code, 400)
+
+	def test_index_follows_saves_and_deletes(self):
+		movie = Movie.objects.get(title="Jaws")
+		movie.title = "Jaws Returns"
+		movie.save()
+		Movie.objects.filter(title="Moon").delete()
+		cache.clear()
+		self.assertEqual(self.titles(q="returns"), ["Jaws Returns"])
+		self.assertEqual(self.titles(q="lonely"), [])
+
+		call_command("rebuild_search_index", stdout=StringIO())
+		self.assertEqual(self.titles(q="jaw"), ["Jaws Returns"])
+
+	def test_migrate_restores_triggers_a_table_rebuild_dropped(self):
+		# What Django's SQLite table rebuild does to posts_movie
+		with connection.cursor() as cursor:
+			for trigger in search.TRIGGERS:
+				cursor.execute(f"DROP TRIGGER {trigger}")
+		Movie.objects.create(title="Jaws 2", description="Another shark", rating="PG", duration=100, genre="Thriller")
+		self.assertEqual(search.missing_index_objects(), search.TRIGGERS)
+
+		search.ensure_index()
+		self.assertEqual(search.missing_index_objects(), [])
+		self.assertEqual(self.titles(q="another"), ["Jaws 2"])
+
+	def test_async_view_matches_drf(self):
+		params = {"q": "star", "include_showtimes": "false"}
+		expected = self.client.get("/api/movies/search/", params).content
+		cache.clear()
+		response = async_to_sync(async_views.movie_search)(AsyncRequestFactory().get("/api/movies/search/", params))
+		self.assertEqual(response.content, expected)
+
+
+class KeysetPaginationTests(TestCase):
+	"""List endpoints page with cursors on stable orderings and filter server-side."""
+
+	def setUp(self):
+		cache.clear()
+		self.client = APIClient()
+		self.room = MovieRoom.objects.create(name="Hall", capacity=50)
+		self.other_room = MovieRoom.objects.create(name="Annex", capacity=50)
+		self.movie = Movie.objects.create(title="Paged", description="", rating="PG", duration=90, genre="Drama")
+		Movie.objects.create(title="Soon", description="", rating="PG", duration=90, genre="Horror", category="coming-soon")
+		self.start = timezone.now() + timedelta(days=1)
+		for i in range(5):
+			# Pairs of showtimes share a start time, so the id tiebreaker matters
+			starts_at = self.start + timedelta(hours=i // 2)
+			room = self.room if i % 2 == 0 else self.other_room
+			Showtime.objects.create(movie=self.movie, movie_room=room, starts_at=starts_at, base_price="9.00")
+
+	def collect(self, url, params):
+		ids, pages = [], 0
+		response = self.client.get(url, params)
+		while True:
+			self.assertEqual(response.status_code, 200, response.data)
+			ids.extend(item["id"] for item in response.data["results"])
+			pages += 1
+			if not response.data["next"]:
+				return ids, pages
+			response = self.client.get(response.data["next"])
+
+	def test_showtime_pages_cover_every_row_once_in_order(self):
+		ids, pages = self.collect("/api/showtimes/", {"page_size": 2})
+		expected = list(Showtime.objects.order_by("starts_at", "id").values_list("id", flat=True))
+		self.assertEqual(ids, expected)
+		self.assertEqual(pages, 3)
+
+	def test_showtime_filters(self):
+		response = self.client.get("/api/showtimes/", {"room": self.other_room.id})
+		self.assertEqual(len(response.data["results"]), 2)
+
+		local_day = timezone.localtime(self.start).date()
+		response = self.client.get("/api/showtimes/", {"date_from": local_day.isoformat(), "date_to": local_day.isoformat()})
+		self.assertTrue(response.data["results"])
+
+		self.assertEqual(self.client.get("/api/showtimes/", {"date_from": "tomorrow"}).status_code, 400)
+
+	def test_movie_filters_and_invalid_cursor(self):
+		response = self.client.get("/api/movies/", {"category": "coming-soon"})
+		self.assertEqual([movie["title"] for movie in response.json()["results"]], ["Soon"])
+		self.assertEqual(self.client.get("/api/movies/", {"cursor": "garbage"}).status_code, 404)
+		# Well-formed cursors holding values the ordering fields cannot take
+		for values, path in ((["a", "abc"], "/api/movies/"), (["not a date", 1], "/api/showtimes/")):
+			cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+			self.assertEqual(self.client.get(path, {"cursor": cursor}).status_code, 404)
+
+	def test_booking_history_pages_newest_first(self):
+		user = User.objects.create_user(username="pager", password="pass", email="pager@example.com")
+		customer = Customer.objects.create(user=user)
+		bookings = [Booking.objects.create(customer=customer, status=Booking.Status.CONFIRMED) for _ in range(3)]
+		bookings[0].status = Booking.Status.CANCELLED
+		bookings[0].save()
+		self.client.force_authenticate(user)
+
+		ids, _ = self.collect("/api/bookings/my/", {"page_size": 1})
+		expected = list(Booking.objects.order_by("-created_at", "id").values_list("id", flat=True))
+		self.assertEqual(ids, expected)
+
+		cancelled = self.client.get("/api/bookings/my/", {"status": "cancelled"}).data["results"]
+		self.assertEqual([booking["id"] for booking in cancelled], [bookings[0].id])
+
+
+class ShowtimeScheduleTests(TestCase):
+	"""Schedules bucket by the stored local show date and stay on the indexes."""
+
+	def setUp(self):
+		self.client = APIClient()
+		self.rooms = [MovieRoom.objects.create(name=f"Schedule {i}", capacity=50) for i in range(2)]
+		self.movies = [
+			Movie.objects.create(title=f"Scheduled {i}", description="", rating="PG", duration=90, genre="Drama")
+			for i in range(2)
+		]
+		# 23:30 in New York on March 9 is already March 10 in UTC
+		self.late = Showtime.objects.create(
+			movie=self.movies[0], movie_room=self.rooms[0], base_price="10.00",
+			starts_at=datetime(2030, 3, 10, 4, 30, tzinfo=dt_timezone.utc),
+		)
+		for day in (10, 11):
+			for hour, room, movie, fmt in ((14, 0, 0, "2D"), (15, 1, 1, "IMAX"), (18, 0, 1, "2D")):
+				Showtime.objects.create(
+					movie=self.movies[movie], movie_room=self.rooms[room], format=fmt, base_price="10.00",
+					starts_at=timezone.make_aware(datetime(2030, 3, day, hour)),
+				)
+
+	def schedule(self, **params):
+		response = self.client.get("/api/showtimes/schedule/", params)
+		self.assertEqual(response.status_code, 200, response.data)
+		return [(day["date"], [show["id"] for show in day["showtimes"]]) for day in response.json()["days"]]
+
+	def test_show_date_is_the_local_date(self):
+		self.assertEqual(self.late.show_date, date(2030, 3, 9))
+		self.late.starts_at += timedelta(hours=1)
+		self.late.save(update_fields=["starts_at"])
+		self.late.refresh_from_db()
+		self.assertEqual(self.late.show_date, date(2030, 3, 10))
+
+	def test_writes_that_bypass_save_keep_show_date(self):
+		def show_date(pk):
+			return Showtime.objects.values_list("show_date", flat=True).get(pk=pk)
+
+		late = datetime(2030, 3, 12, 3, 30, tzinfo=dt_timezone.utc)
+		[created] = Showtime.objects.bulk_create([
+			Showtime(movie=self.movies[0], movie_room=self.rooms[1], base_price="10.00", starts_at=late),
+		])
+		self.assertEqual(show_date(created.pk), date(2030, 3, 11))
+
+		Showtime.objects.filter(pk=created.pk).update(starts_at=late + timedelta(days=1))
+		self.assertEqual(show_date(created.pk), date(2030, 3, 12))
+
+		# Expressions are resolved by the database; the dates are recomputed afterwards
+		Showtime.objects.filter(pk__in=[created.pk, self.late.pk]).update(starts_at=F("starts_at") + timedelta(hours=1))
+		self.assertEqual((show_date(created.pk), show_date(self.late.pk)), (date(2030, 3, 13), date(2030, 3, 10)))
+
+		created.starts_at = late - timedelta(days=1)
+		Showtime.objects.bulk_update([created], ["starts_at"])
+		self.assertEqual(show_date(created.pk), date(2030, 3, 10))
+
+	def test_schedule_groups_and_filters(self):
+		days = self.schedule(date_from="2030-03-09", date_to="2030-03-11")
+		self.assertEqual([day for day, _ in days], ["2030-03-09", "2030-03-10", "2030-03-11"])
+		self.assertEqual(days[0][1], [self.late.pk])
+		self.assertEqual(len(days[1][1]), 3)
+
+		imax = Showtime.objects.filter(format="IMAX").order_by("starts_at").values_list("pk", flat=True)
+		self.assertEqual(self.schedule(date_from="2030-03-10", date_to="2030-03-11", format="imax"), [
+			("2030-03-10", [imax[0]]), ("2030-03-11", [imax[1]]),
+		])
+		room = self.schedule(date_from="2030-03-11", room=self.rooms[0].pk, movie=self.movies[1].pk)
+		self.assertEqual(len(room), 1)
+		self.assertEqual(len(room[0][1]), 1)
+
+		response = self.client.get("/api/showtimes/schedule/", {"date_from": "2030-03-11", "date_to": "2030-03-10"})
+		self.assertEqual(response.status_code, 400)
+		response = self.client.get("/api/showtimes/schedule/", {"date_from": "2030-03-01", "date_to": "2030-05-01"})
+		self.assertEqual(response.status_code, 400)
+
+	def test_schedule_queries_use_composite_indexes(self):
+		cases = [
+			({"movie": str(self.movies[0].pk)}, "showtime_movie_day_idx"),
+			({"room": str(self.rooms[1].pk), "format": "2D"}, "showtime_room_day_idx"),
+			({"format": "IMAX"}, "showtime_day_idx"),
+		]
+		for params, index in cases:
+			_, _, queryset = schedule_showtimes({"date_from": "2030-03-10", **params})
+			plan = queryset.explain()
+			self.assertIn(index, plan)
+			# The index order is the schedule order: no sort step
+			self.assertNotIn("TEMP B-TREE", plan)
+
+		plan = Showtime.objects.filter(movie=self.movies[0]).order_by("starts_at", "id").explain()
+		self.assertIn("showtime_movie_start_idx", plan)
+
+
+@override_settings(SHOWTIME_CLEANING_BUFFER_MINUTES=15)
+class BulkSchedulingTests(TestCase):
+	"""A room is busy for the running time plus cleaning; batches are checked in memory."""
+
+	def setUp(self):
+		admin = User.objects.create_superuser(username="scheduler", password="password123", email="s@example.com")
+		self.client = APIClient()
+		self.client.force_authenticate(admin)
+		self.rooms = [MovieRoom.objects.create(name=f"Bulk {i}", capacity=50) for i in range(2)]
+		self.movie = Movie.objects.create(title="Long One", description="", rating="PG", duration=120, genre="Drama")
+		self.noon = timezone.make_aware(datetime(2030, 6, 3, 12))
+		self.existing = Showtime.objects.create(
+			movie=self.movie, movie_room=self.rooms[0], starts_at=self.noon, base_price="10.00",
+		)
+
+	def slot(self, room, starts_at, **extra):
+		return {
+			"movie": self.movie.pk, "movie_room": room.pk, "starts_at": starts_at.isoformat(),
+			"base_price": "11.00", **extra,
+		}
+
+	def test_single_showtime_overlap_includes_duration_and_buffer(self):
+		# 14:10 is after the movie ends but inside the cleaning buffer
+		response = self.client.post(
+			"/api/admin/showtimes/", self.slot(self.rooms[0], self.noon + timedelta(minutes=130)), format="json"
+		)
+		self.assertEqual(response.status_code, 400, response.data)
+		self.assertIn("non_field_errors", response.data)
+
+		response = self.client.post(
+			"/api/admin/showtimes/", self.slot(self.rooms[0], self.noon + timedelta(minutes=135)), format="json"
+		)
+		self.assertEqual(response.status_code, 201, response.data)
+
+		# Moving a showtime does not conflict with itself
+		response = self.client.patch(
+			f"/api/admin/showtimes/{self.existing.pk}/",
+			{"starts_at": (self.noon - timedelta(minutes=30)).isoformat()},
+			format="json",
+		)
+		self.assertEqual(response.status_code, 200, response.data)
+
+	def test_bulk_schedule_rejects_overlaps_and_inserts_the_rest(self):
+		slots = [
+			self.slot(self.rooms[0], self.noon + timedelta(hours=1)),  # overlaps the existing showing
+			self.slot(self.rooms[1], self.noon, format="IMAX"),
+			self.slot(self.rooms[1], self.noon + timedelta(hours=2)),  # overlaps slot 1 of this batch
+			self.slot(self.rooms[1], self.noon + timedelta(minutes=135)),
+			{"movie": 999999, "movie_room": self.rooms[1].pk, "starts_at": self.noon.isoformat(), "base_price": "1"},
+			{"movie": self.movie.pk},
+		]
+		with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+			response = self.client.post("/api/admin/showtimes/bulk_schedule/", {"showtimes": slots}, format="json")
+		self.assertEqual(response.status_code, 201, response.data)
+
+		self.assertEqual([entry["index"] for entry in response.data["rejected"]], [0, 2, 4, 5])
+		self.assertIn("starts_at", response.data["rejected"][0]["errors"])
+		self.assertIn("movie", response.data["rejected"][2]["errors"])
+		self.assertIn("movie_room", response.data["rejected"][3]["errors"])
+
+		created = response.data["created"]
+		self.assertEqual([show["format"] for show in created], ["IMAX", "2D"])
+		self.assertEqual(created[0]["movie_title"], "Long One")
+		self.assertEqual(Showtime.objects.filter(movie_room=self.rooms[1]).count(), 2)
+		self.assertEqual(Showtime.objects.get(pk=created[0]["id"]).show_date, date(2030, 6, 3))
+		# movies, rooms and existing showtimes are one query each, however big the batch
+		selects = [query for query in queries.captured_queries if query["sql"].startswith("SELECT")]
+		self.assertLessEqual(len(selects), 5)
+
+	def test_bulk_schedule_locks_rooms_before_checking_overlaps(self):
+		later = self.noon + timedelta(hours=3)
+		lock_rooms = scheduling.lock_rooms
+
+		def rival_commits_while_we_wait(room_ids):
+			# Another admin's batch for this room commits just before our lock is granted
+			Showtime.objects.create(movie=self.movie, movie_room=self.rooms[0], starts_at=later, base_price="10.00")
+			return lock_rooms(room_ids)
+
+		calls = mock.Mock()
+		with mock.patch("posts.scheduling.lock_rooms", side_effect=rival_commits_while_we_wait) as locked, \
+				mock.patch("posts.scheduling.plan_schedule", wraps=scheduling.plan_schedule) as planned:
+			calls.attach_mock(locked, "lock_rooms")
+			calls.attach_mock(planned, "plan_schedule")
+			response = self.client.post(
+				"/api/admin/showtimes/bulk_schedule/",
+				{"showtimes": [self.slot(self.rooms[0], later + timedelta(minutes=30))]},
+				format="json",
+			)
+		self.assertEqual([call[0] for call in calls.mock_calls], ["lock_rooms", "plan_schedule"])
+		self.assertEqual(calls.mock_calls[0].args, ({self.rooms[0].pk},))
+		# The overlap check saw the rival's showing instead of double-booking the room
+		self.assertEqual(response.status_code, 400, response.data)
+		self.assertIn("starts_at", response.data["rejected"][0]["errors"])
+		self.assertEqual(Showtime.objects.filter(movie_room=self.rooms[0]).count(), 2)
+
+	def test_bulk_schedule_with_nothing_accepted_is_a_bad_request(self):
+		response = self.client.post(
+			"/api/admin/showtimes/bulk_schedule/", {"showtimes": [self.slot(self.rooms[0], self.noon)]}, format="json"
+		)
+		self.assertEqual(response.status_code, 400)
+		self.assertEqual(response.data["created"], [])
+
+		response = self.client.post("/api/admin/showtimes/bulk_schedule/", {"showtimes": []}, format="json")
+		self.assertEqual(response.status_code, 400)
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class ReplicaRoutingTests(TestCase):
+	"""Read-only views read from a replica; writers read their own writes."""
+
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user(username="reader", password="pass", email="reader@example.com")
+		self.factory = APIRequestFactory()
+
+	def alias_for(self, method, path, **data):
+		request = getattr(self.factory, method)(path, data, format="json")
+		request.user = self.user
+		return read_alias_for(request, resolve(path).func)
+
+	def test_only_marked_read_paths_use_a_replica(self):
+		self.assertEqual(self.alias_for("get", "/api/movies/"), "replica1")
+		self.assertEqual(self.alias_for("get", "/api/showtimes/"), "replica1")
+		self.assertEqual(self.alias_for("post", "/api/promotions/validate/", promo_code="X"), "replica1")
+		self.assertEqual(self.alias_for("get", "/api/bookings/my/"), "replica1")
+
+		self.assertIsNone(self.alias_for("post", "/api/bookings/"))
+		self.assertIsNone(self.alias_for("post", "/api/movies/"))
+		self.assertIsNone(self.alias_for("get", "/api/admin/movies/"))
+
+	def test_writer_is_pinned_to_primary_after_booking(self):
+		movie = Movie.objects.create(title="Sticky", description="", rating="PG", duration=90, genre="Drama")
+		room = MovieRoom.objects.create(name="Sticky Room", capacity=1)
+		seat = Seat.objects.create(movie_room=room, row="A", number=1)
+		showtime = Showtime.objects.create(
+			movie=movie, movie_room=room, starts_at=timezone.now() + timedelta(days=1), base_price="10.00"
+		)
+		client = APIClient()
+		self.assertTrue(client.login(username="reader", password="pass"))
+
+		self.assertEqual(self.alias_for("get", "/api/bookings/my/"), "replica1")
+
+		payload = {"showtime": showtime.id, "seats": [seat.id], "payment_method": "card"}
+		self.assertEqual(client.post("/api/bookings/", payload, format="json").status_code, 201)
+		self.assertIsNone(self.alias_for("get", "/api/bookings/my/"))
+		self.assertTrue(is_sticky(self.user.pk))
+
+	def test_router_follows_the_request_alias(self):
+		self.assertIsNone(ReplicaRouter().db_for_read(Movie))
+		with use_database("replica1"):
+			self.assertEqual(ReplicaRouter().db_for_read(Movie), "replica1")
+			self.assertEqual(ReplicaRouter().db_for_write(Movie), "default")
+			with use_primary():
+				self.assertIsNone(ReplicaRouter().db_for_read(Movie))
+
+
+@override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db")
+class AuthStatusTests(TestCase):
+	"""Auth status is answered from a cached snapshot that tracks account changes."""
+
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user(username="status", password="pass1234", email="status@example.com")
+		self.client = APIClient()
+		self.assertTrue(self.client.login(username="status", password="pass1234"))
+
+	def test_warm_auth_status_costs_no_queries(self):
+		self.client.get("/api/auth/status/")
+		with self.assertNumQueries(0):
+			response = self.client.get("/api/auth/status/")
+		self.assertTrue(response.data["isAuthenticated"])
+		self.assertEqual(response.data["user"]["username"], "status")
+		self.assertIn("profile", response.data["user"])
+
+	def test_snapshot_follows_profile_and_password_changes(self):
+		self.client.get("/api/auth/status/")
+		profile = UserProfile.objects.get(user=self.user)
+		profile.city = "Athens"
+		with self.captureOnCommitCallbacks(execute=True):
+			profile.save()
+		self.assertEqual(self.client.get("/api/auth/status/").data["user"]["profile"]["city"], "Athens")
+
+		self.user.set_password("changed5678")
+		with self.captureOnCommitCallbacks(execute=True):
+			self.user.save()
+		self.assertFalse(self.client.get("/api/auth/status/").data["isAuthenticated"])
+
+	def test_anonymous_and_logged_out(self):
+		self.assertFalse(APIClient().get("/api/auth/status/").data["isAuthenticated"])
+		self.client.post("/api/auth/logout/")
+		self.assertFalse(self.client.get("/api/auth/status/").data["isAuthenticated"])
+
+	def test_purge_expired_sessions_in_batches(self):
+		for age in (-1, -2, -3, 1):
+			session = SessionStore()
+			session["n"] = age
+			session.set_expiry(timedelta(days=age))
+			session.create()
+		call_command("purge_expired_sessions", batch_size=2, stdout=StringIO())
+		self.assertFalse(Session.objects.filter(expire_date__lt=timezone.now()).exists())
+		self.assertTrue(Session.objects.filter(expire_date__gt=timezone.now()).exists())
+
+
+class AccountTokenTests(TestCase):
+	"""Login and emailed-link lookups are index probes on hashed, expiring tokens."""
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="tokens", password="pass1234", email="tokens@example.com")
+		self.client = APIClient()
+
+	def assertUsesIndex(self, queryset, index):
+		plan = queryset.explain()
+		self.assertIn(f"USING INDEX {index}", plan)
+		self.assertNotIn("SCAN", plan)
+
+	def test_lookups_use_indexes(self):
+		if connection.vendor != "sqlite":
+			self.skipTest("EXPLAIN QUERY PLAN output is SQLite-specific")
+		self.assertUsesIndex(User.objects.filter(email="tokens@example.com"), "posts_auth_user_email_idx")
+		self.assertUsesIndex(
+			AccountToken.objects.filter(token_hash=AccountToken.hash("x"), purpose=AccountToken.Purpose.VERIFY_EMAIL),
+			"sqlite_autoindex_posts_accounttoken",
+		)
+
+	def test_tokens_are_hashed_single_use_and_expire(self):
+		raw = self.user.profile.generate_verification_token()
+		self.assertFalse(AccountToken.objects.filter(token_hash=raw).exists())
+
+		self.assertEqual(self.client.get(f"/api/auth/verify-email/{raw}/").status_code, 200)
+		self.assertTrue(UserProfile.objects.get(user=self.user).is_verified)
+		self.assertEqual(self.client.get(f"/api/auth/verify-email/{raw}/").status_code, 400)
+
+		raw = self.user.profile.generate_reset_token()
+		AccountToken.objects.filter(user=self.user).update(expires_at=timezone.now() - timedelta(minutes=1))
+		payload = {"new_password": "N3w-passw0rd!", "new_password_confirm": "N3w-passw0rd!"}
+		response = self.client.post(f"/api/auth/password-reset/{raw}/", payload, format="json")
+		self.assertEqual(response.status_code, 400)
+		self.assertIn("expired", response.data["error"])
+
+	def test_sweeper_removes_expired_tokens_and_stale_unverified_accounts(self):
+		self.user.profile.generate_reset_token()
+		AccountToken.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+		live = User.objects.create_user(username="fresh", password="pass1234", email="fresh@example.com")
+		live.profile.generate_verification_token()
+
+		stale = User.objects.create_user(username="stale", password="pass1234", email="stale@example.com", is_active=False)
+		User.objects.filter(pk=stale.pk).update(date_joined=timezone.now() - timedelta(days=30))
+		banned = User.objects.create_user(username="banned", password="pass1234", email="banned@example.com", is_active=False)
+		UserProfile.objects.filter(user=banned).update(is_verified=True)
+		User.objects.filter(pk=banned.pk).update(date_joined=timezone.now() - timedelta(days=30))
+
+		call_command("sweep_account_tokens", batch_size=1, stdout=StringIO())
+		self.assertEqual(list(AccountToken.objects.values_list("user__username", flat=True)), ["fresh"])
+		self.assertFalse(User.objects.filter(username="stale").exists())
+		self.assertTrue(User.objects.filter(username="banned").exists())
+
+
+class UserProfileLifecycleTests(TestCase):
+	"""Profiles are created once, with the user; login does not touch them."""
+
+	def test_login_stays_within_query_budget(self):
+		user = User.objects.create_user(username="budget", password="pass1234", email="budget@example.com")
+		UserProfile.objects.filter(user=user).update(is_verified=True)
+		client = APIClient()
+
+		# user + profile, new session (exists + insert), last_login, session
+		# save; the two session writes run inside savepoints (4 more statements)
+		with self.assertNumQueries(9):
+			response = client.post("/api/auth/login/", {"username": "budget", "password": "pass1234"}, format="json")
+		self.assertEqual(response.status_code, 200, response.data)
+
+		client = APIClient()
+		# + the email -> username lookup
+		with self.assertNumQueries(10):
+			response = client.post("/api/auth/login/", {"email": "budget@example.com", "password": "pass1234"}, format="json")
+		self.assertEqual(response.status_code, 200, response.data)
+
+	def test_registration_creates_user_and_profile_once(self):
+		payload = {
+			"username": "once",
+			"email": "once@example.com",
+			"password": "Sup3r-secret-pw",
+			"password_confirm": "Sup3r-secret-pw",
+			"first_name": "Only",
+			"last_name": "Once",
+			"subscribed_to_promotions": False,
+		}
+		with CaptureQueriesContext(connection) as queries:
+			response = APIClient().post("/api/auth/register/", payload, format="json")
+		self.assertEqual(response.status_code, 201, response.data)
+
+		inserts = [q["sql"] for q in queries if q["sql"].startswith("INSERT")]
+		self.assertEqual(sum('"auth_user"' in sql for sql in inserts), 1)
+		self.assertEqual(sum('"posts_userprofile"' in sql for sql in inserts), 1)
+		self.assertFalse(any(q["sql"].startswith('UPDATE "posts_userprofile"') for q in queries))
+
+		user = User.objects.get(username="once")
+		self.assertFalse(user.is_active)
+		self.assertTrue(user.check_password("Sup3r-secret-pw"))
+		self.assertFalse(user.profile.subscribed_to_promotions)
+
+	def test_backfill_creates_missing_profiles(self):
+		legacy = User.objects.create_user(username="legacy", password="pass1234", email="legacy@example.com")
+		UserProfile.objects.filter(user=legacy).delete()
+		call_command("backfill_user_profiles", batch_size=1, stdout=StringIO())
+		self.assertTrue(UserProfile.objects.filter(user=legacy).exists())
+
+		# The same backfill ships as a data migration, so deploys cannot skip it
+		UserProfile.objects.filter(user=legacy).delete()
+		importlib.import_module("posts.migrations.0020_backfill_user_profiles").backfill_user_profiles(apps, None)
+		self.assertTrue(User.objects.get(pk=legacy.pk).profile.subscribed_to_promotions)
+
+
+class PaymentCardDisplayTests(TestCase):
+	"""Card listings read the stored last4/brand projection and never decrypt."""
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="cardholder", password="pass", email="cards@example.com")
+		self.client = APIClient()
+		self.client.force_authenticate(self.user)
+		response = self.client.post("/api/auth/payment-cards/", {
+			"card_number": "4111 1111 1111 1234", "card_holder_name": "Card Holder",
+			"expiry_month": 4, "expiry_year": timezone.now().year + 2, "cvv": "123",
+		}, format="json")
+		self.assertEqual(response.status_code, 201, response.data)
+		self.card_id = response.data["card"]["id"]
+
+	def decryptions(self):
+		return mock.patch("encrypted_model_fields.fields.decrypt_str", wraps=encrypted_fields.decrypt_str)
+
+	def test_listing_cards_decrypts_nothing(self):
+		PaymentCard.objects.create(
+			user=self.user, card_number="5500000000000004", card_holder_name="Card Holder",
+			expiry_month=1, expiry_year=timezone.now().year + 1, cvv="999",
+		)
+		with self.decryptions() as decrypt:
+			profile = self.client.get("/api/auth/profile/")
+			cards = self.client.get("/api/auth/payment-cards/")
+		self.assertEqual(decrypt.call_count, 0)
+
+		self.assertEqual(profile.data["payment_cards"], cards.data)
+		shown = {card["card_number_masked"]: card["card_brand"] for card in cards.data}
+		self.assertEqual(shown, {"****-****-****-1234": "visa", "****-****-****-0004": "mastercard"})
+		self.assertNotIn("card_number", cards.data[0])
+
+	def test_updates_keep_the_projection_in_step(self):
+		url = f"/api/auth/payment-cards/{self.card_id}/"
+		with self.decryptions() as decrypt:
+			response = self.client.put(url, {"card_holder_name": "New Name"}, format="json")
+		self.assertEqual(response.status_code, 200, response.data)
+		self.assertEqual(decrypt.call_count, 0)
+		card = PaymentCard.objects.get(pk=self.card_id)
+		self.assertEqual((card.card_holder_name, card.card_number, card.cvv), ("New Name", "4111 1111 1111 1234", "123"))
+
+		response = self.client.put(url, {"card_number": "378282246310005"}, format="json")
+		self.assertEqual(response.status_code, 200, response.data)
+		self.assertEqual(response.data["card"]["card_number_masked"], "****-****-****-0005")
+		card.refresh_from_db()
+		self.assertEqual((card.card_last4, card.card_brand, card.cvv), ("0005", "amex", "123"))
+		self.assertEqual(str(card), "New Name - ****0005")
+
+
+class EncryptionKeyRotationTests(TestCase):
+	"""Rotation moves encrypted columns to the newest key in checkpointed chunks."""
+
+	OLD_KEY = settings.FIELD_ENCRYPTION_KEY[0]
+	NEW_KEY = Fernet.generate_key().decode()
+
+	def setUp(self):
+		self.user = User.objects.create_user(username="rotator", password="pass")
+		self.cards = [
+			PaymentCard(
+				user=self.user, card_number=f"4111111111111{index:03d}", card_holder_name=f"Holder {index}",
+				expiry_month=1, expiry_year=2035, cvv=f"{index:03d}", card_last4=f"1{index:03d}",
+			)
+			for index in range(7)
+		]
+		# bulk_create skips the four-card limit in save()
+		PaymentCard.objects.bulk_create(self.cards)
+
+	def rotated_keys(self):
+		# The field library builds its crypter at import; rebuild it for the new key list
+		keys = override_settings(FIELD_ENCRYPTION_KEY=[self.NEW_KEY, self.OLD_KEY])
+		keys.enable()
+		self.addCleanup(keys.disable)
+		crypter = mock.patch.object(encrypted_fields, "CRYPTER", encrypted_fields.get_crypter())
+		crypter.start()
+		self.addCleanup(crypter.stop)
+
+	def raw_tokens(self):
+		return list(
+			PaymentCard.objects.order_by("pk")
+			.annotate(raw_number=Cast("card_number", TextField()), raw_cvv=Cast("cvv", TextField()))
+			.values_list("raw_number", "raw_cvv")
+		)
+
+	def rotate(self, **options):
+		out = StringIO()
+		call_command("rotate_encryption_key", chunk_size=3, stdout=out, **options)
+		return out.getvalue()
+
+	def test_rotation_rewrites_old_rows_under_the_new_key(self):
+		self.rotated_keys()
+		# Written after the key change: already current, so not rewritten
+		fresh = PaymentCard.objects.create(
+			user=User.objects.create_user(username="fresh"), card_number="5500000000000004",
+			card_holder_name="Fresh", expiry_month=2, expiry_year=2035, cvv="555",
+		)
+		output = self.rotate()
+		self.assertIn("7 of 8 rows re-encrypted", output)
+		self.assertIn("rows/sec", output)
+
+		new_only = Fernet(self.NEW_KEY.encode())
+		for number, cvv in self.raw_tokens():
+			new_only.decrypt(number.encode())
+			new_only.decrypt(cvv.encode())
+		card = PaymentCard.objects.get(pk=self.cards[4].pk)
+		self.assertEqual((card.card_number, card.cvv), ("4111111111111004", "004"))
+		self.assertEqual(PaymentCard.objects.get(pk=fresh.pk).cvv, "555")
+
+		self.assertIn("already rotated", self.rotate())
+
+	def test_interrupted_rotation_resumes_from_its_checkpoint(self):
+		self.rotated_keys()
+		calls = []
+		rewrite = key_rotation._rewrite
+
+		def crash_on_second_chunk(*args):
+			calls.append(args)
+			if len(calls) == 2:
+				raise RuntimeError("worker killed")
+			return rewrite(*args)
+
+		with mock.patch.object(key_rotation, "_rewrite", crash_on_second_chunk):
+			with self.assertRaises(RuntimeError):
+				self.rotate()
+		job = EncryptionRotationJob.objects.get()
+		self.assertEqual((job.last_pk, job.rotated_count, job.finished_at), (self.cards[2].pk, 3, None))
+
+		with mock.patch.object(key_rotation, "_rewrite", wraps=rewrite) as resumed:
+			output = self.rotate()
+		self.assertIn(f"resuming after pk {self.cards[2].pk}", output)
+		# Only the four rows after the checkpoint are read and written again
+		self.assertEqual(sum(len(call.args[2]) for call in resumed.call_args_list), 4)
+		job.refresh_from_db()
+		self.assertEqual((job.scanned_count, job.rotated_count), (7, 7))
+		self.assertIsNotNone(job.finished_at)
+
+	def test_rows_under_an_unknown_key_stop_the_rotation(self):
+		with override_settings(FIELD_ENCRYPTION_KEY=[self.NEW_KEY]):
+			with mock.patch.object(encrypted_fields, "CRYPTER", encrypted_fields.get_crypter()):
+				with self.assertRaisesMessage(CommandError, f"#{self.cards[0].pk} is not readable"):
+					self.rotate()
+
+
+class RoomLayoutTests(TestCase):
+	"""Layouts are materialized once; seat-map reads only read them."""
+
+	LAYOUT = {"rows": [
+		{"name": "A", "seats": "aa ssss ss"},
+		{"name": "B", "seats": "ss ss.s ss"},
+		{"name": "C", "seats": "pp pppp pp"},
+	]}
+
+	def setUp(self):
+		cache.clear()
+		admin = User.objects.create_superuser(username="layouts", password="pass", email="l@example.com")
+		self.client = APIClient()
+		self.client.force_authenticate(admin)
+		self.room = MovieRoom.objects.create(name="Layout Hall", capacity=10)
+		movie = Movie.objects.create(title="Laid Out", description="", rating="PG", duration=90, genre="Drama")
+		self.showtime = Showtime.objects.create(
+			movie=movie, movie_room=self.room, starts_at=timezone.now() + timedelta(days=1), base_price="10.00",
+		)
+
+	def test_parse_numbers_seats_around_aisles_and_gaps(self):
+		seats = room_layouts.parse_layout(self.LAYOUT)
+		self.assertEqual(len(seats), 23)
+		row_b = [(number, column) for row, number, column, _ in seats if row == "B"]
+		self.assertEqual(row_b, [(1, 1), (2, 2), (3, 4), (4, 5), (5, 7), (6, 9), (7, 10)])
+		self.assertEqual(seats[0][3], Seat.SeatClass.ACCESSIBLE)
+
+		for bad in ({}, {"rows": [{"name": "a", "seats": "ss"}]}, {"rows": [{"name": "B", "seats": "s"}, {"name": "A", "seats": "s"}]},
+				{"rows": [{"name": "A", "seats": " . "}]}, {"rows": [{"name": "A", "seats": "sx"}]}):
+			with self.assertRaises(room_layouts.LayoutError):
+				room_layouts.parse_layout(bad)
+
+		for capacity in (1, 96, 100, 400):
+			self.assertEqual(len(room_layouts.parse_layout(room_layouts.default_layout(capacity))), capacity)
+		self.assertEqual(len(room_layouts.default_layout(96)["rows"]), 8)
+
+	def test_seat_map_of_an_unseated_room_is_empty_and_writes_nothing(self):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(f"/api/showtimes/{self.showtime.pk}/seats/")
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.data, [])
+		self.assertFalse([q for q in queries.captured_queries if not q["sql"].startswith("SELECT")])
+		self.assertFalse(Seat.objects.exists())
+
+	def test_layout_endpoint_materializes_and_reshapes_seats(self):
+		url = f"/api/admin/movie-rooms/{self.room.pk}/layout/"
+		response = self.client.put(url, self.LAYOUT, format="json")
+		self.assertEqual(response.status_code, 200, response.data)
+		self.assertEqual(response.data["changes"], {"created": 23, "updated": 0, "removed": 0})
+		self.assertEqual((response.data["capacity"], response.data["grid"]["cols"]), (23, 10))
+
+		seats = self.client.get(f"/api/showtimes/{self.showtime.pk}/seats/").data
+		b5 = next(seat for seat in seats if seat["row"] == "B" and seat["number"] == 5)
+		self.assertEqual((b5["column"], b5["seatClass"]), (7, "STANDARD"))
+		self.assertEqual({seat["seatClass"] for seat in seats if seat["row"] == "C"}, {"PREMIUM"})
+
+		# Seats keep their ids when they survive a relayout; booked seats cannot be dropped
+		a1 = Seat.objects.get(movie_room=self.room, row="A", number=1)
+		c8 = Seat.objects.get(movie_room=self.room, row="C", number=8)
+		Ticket.objects.create(
+			booking=Booking.objects.create(customer=Customer.objects.create(user=User.objects.create_user("t"))),
+			showtime=self.showtime, seat=c8, price="10.00",
+		)
+		smaller = {"rows": self.LAYOUT["rows"][:2]}
+		response = self.client.put(url, smaller, format="json")
+		self.assertEqual(response.status_code, 400)
+		self.assertIn("C8", response.data["error"])
+
+		wider = {"rows": [{"name": "A", "seats": "ss ssss ss"}, *self.LAYOUT["rows"][1:], {"name": "D", "seats": "ss"}]}
+		response = self.client.put(url, wider, format="json")
+		self.assertEqual(response.data["changes"], {"created": 2, "updated": 2, "removed": 0})
+		a1.refresh_from_db()
+		self.assertEqual(a1.seat_class, Seat.SeatClass.STANDARD)
+		self.assertEqual(self.client.get(url).data["layout"], wider)
+
+	def test_cached_grid_follows_the_layout_version_committed_with_the_seats(self):
+		url = f"/api/showtimes/{self.showtime.pk}/seats/"
+		self.assertEqual(self.client.get(url).data, [])
+		stale_room = MovieRoom.objects.get(pk=self.room.pk)
+
+		# Relaid out elsewhere: nothing here is told, and the old grid stays cached
+		room_layouts.apply_layout(MovieRoom.objects.get(pk=self.room.pk), self.LAYOUT)
+		self.assertEqual(len(self.client.get(url).data), 23)
+
+		# Saving a room loaded before the change keeps the newer version
+		stale_room.name = "Renamed Hall"
+		stale_room.save()
+		self.room.refresh_from_db()
+		self.assertEqual((self.room.name, self.room.layout_version), ("Renamed Hall", 1))
+		self.assertEqual(len(self.client.get(url).data), 23)
+
+	def test_relayout_cost_does_not_grow_with_the_seats_removed(self):
+		full = {"rows": [{"name": name, "seats": "s" * 40} for name in "ABCDE"]}
+
+		def relayout(spec):
+			room_layouts.apply_layout(self.room, full)
+			self.room.refresh_from_db()
+			version = self.room.layout_version
+			with CaptureQueriesContext(connection) as queries:
+				changes = room_layouts.apply_layout(self.room, spec)
+			self.room.refresh_from_db()
+			self.assertEqual(self.room.layout_version, version + 1)
+			return changes["removed"], len(queries)
+
+		few = relayout({"rows": [*full["rows"][:4], {"name": "E", "seats": "s" * 38}]})
+		many = relayout({"rows": [{"name": "A", "seats": "s"}]})
+		self.assertEqual((few[0], many[0]), (2, 199))
+		self.assertEqual(few[1], many[1])
+		self.assertEqual(self.room.seats.count(), 1)
+
+	def test_migration_seats_rooms_never_viewed(self):
+		migration = importlib.import_module("posts.migrations.0018_seat_empty_rooms")
+		for capacity in (1, 10, 96, 400, 2000):
+			self.assertEqual(migration.default_layout(capacity), room_layouts.default_layout(capacity) if capacity < 2000 else None)
+		seated = MovieRoom.objects.create(name="Seated Hall", capacity=2)
+		room_layouts.apply_layout(seated, room_layouts.default_layout(2))
+
+		migration.seat_empty_rooms(apps, None)
+		self.room.refresh_from_db()
+		self.assertEqual(self.room.seats.count(), 10)
+		self.assertEqual((self.room.layout, self.room.layout_version), (room_layouts.default_layout(10), 1))
+		self.assertEqual(seated.seats.count(), 2)
+		self.assertEqual(len(self.client.get(f"/api/showtimes/{self.showtime.pk}/seats/").data), 10)
+
+	def test_new_rooms_and_command_seat_rooms_by_capacity(self):
+		response = self.client.post("/api/admin/movie-rooms/", {"name": "Fresh Hall", "capacity": 30}, format="json")
+		self.assertEqual(response.status_code, 201, response.data)
+		self.assertEqual(Seat.objects.filter(movie_room_id=response.data["id"]).count(), 30)
+		self.assertEqual(len(response.data["layout"]["rows"]), 3)
+
+		out = StringIO()
+		call_command("apply_room_layout", empty_rooms=True, stdout=out)
+		self.assertIn("Layout Hall: 10 seat(s) created", out.getvalue())
+		self.assertEqual(self.room.seats.count(), 10)
+
+
+class BestAvailableSeatTests(TestCase):
+	"""Adjacent blocks come from the occupancy grid, closest to the preferred row and the centre."""
+
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user(username="group", password="pass", email="group@example.com")
+		self.client = APIClient()
+		self.client.force_authenticate(self.user)
+		room = MovieRoom.objects.create(name="Best Hall", capacity=1)
+		rows = [{"name": name, "seats": "sss sssss sss"} for name in "ABCDE"]
+		rows[0]["seats"] = "aaa sssss aaa"
+		room_layouts.apply_layout(room, {"rows": rows})
+		movie = Movie.objects.create(title="Group Night", description="", rating="PG", duration=90, genre="Drama")
+		self.showtime = Showtime.objects.create(
+			movie=movie, movie_room=room, starts_at=timezone.now() + timedelta(days=1), base_price="10.00",
+		)
+		self.seat = {f"{seat.row}{seat.number}": seat for seat in room.seats.all()}
+		self.customer = Customer.objects.create(user=User.objects.create_user(username="other"))
+
+	def take(self, *labels, publish=True):
+		with self.captureOnCommitCallbacks(execute=publish):
+			booking = Booking.objects.create(customer=self.customer)
+			for label in labels:
+				Ticket.objects.create(booking=booking, showtime=self.showtime, seat=self.seat[label], price="10.00")
+
+	def best(self, **params):
+		return self.client.get(f"/api/showtimes/{self.showtime.pk}/best_available/", params)
+
+	def labels(self, seats):
+		return [f"{seat['row']}{seat['number']}" for seat in seats]
+
+	def test_prefers_the_centre_of_the_preferred_row(self):
+		self.assertEqual(self.labels(self.best(count=3).data["seats"]), ["C5", "C6", "C7"])
+
+		self.take("C6")
+		# Row C only has blocks off to the side now; the centre of D beats them
+		self.assertEqual(self.labels(self.best(count=3).data["seats"]), ["D5", "D6", "D7"])
+
+		# Aisles split rows: no run is longer than five seats
+		self.assertEqual(self.best(count=5).status_code, 200)
+		self.assertEqual(self.best(count=6).status_code, 409)
+		self.assertEqual(self.best(count=0).status_code, 400)
+
+		accessible = self.best(count=2, seat_class="accessible").data["seats"]
+		self.assertEqual({seat["seatClass"] for seat in accessible}, {"ACCESSIBLE"})
+
+	def test_lookup_and_booking_see_tickets_committed_elsewhere(self):
+		self.assertEqual(self.labels(self.best(count=3).data["seats"]), ["C5", "C6", "C7"])
+		# Committed by another process: its on-commit callbacks never run here
+		self.take("C7", publish=False)
+		self.assertEqual(self.labels(self.best(count=3).data["seats"]), ["D5", "D6", "D7"])
+
+		response = self.client.post(
+			"/api/bookings/best_available/",
+			{"showtime": self.showtime.pk, "count": 3, "payment_method": "card"},
+			format="json",
+		)
+		self.assertEqual(response.status_code, 201, response.data)
+		booked = sorted(f"{t['seat']['row']}{t['seat']['number']}" for t in response.data["tickets"])
+		self.assertNotIn("C7", booked)
+		self.assertEqual(len(booked), 3)
+		self.assertEqual(Ticket.objects.filter(showtime=self.showtime).count(), 4)
+
+	def test_locked_database_answers_409_and_keeps_the_key_usable(self):
+		url = "/api/bookings/best_available/"
+		payload = {"showtime": self.showtime.pk, "count": 2, "payment_method": "card"}
+		with mock.patch.object(seatmap, "read_occupancy", side_effect=OperationalError("database is locked")):
+			response = self.client.post(url, payload, format="json", HTTP_IDEMPOTENCY_KEY="group-1")
+		self.assertEqual(response.status_code, 409)
+		self.assertEqual(response["Retry-After"], "1")
+		self.assertFalse(IdempotencyRecord.objects.exists())
+
+		response = self.client.post(url, payload, format="json", HTTP_IDEMPOTENCY_KEY="group-1")
+		self.assertEqual(response.status_code, 201, response.data)
+
+
+class IdempotencyKeyTests(TestCase):
+	"""Booking retries carrying the same Idempotency-Key get the first response back."""
+
+	def setUp(self):
+		cache.clear()
+		self.user = User.objects.create_user(username="retrier", password="pass", email="retry@example.com")
+		self.client = APIClient()
+		self.client.force_authenticate(self.user)
+		room = MovieRoom.objects.create(name="Retry Hall", capacity=4)
+		self.seats = Seat.objects.bulk_create([Seat(movie_room=room, row="A", number=n) for n in range(1, 5)])
+		movie = Movie.objects.create(title="Timeout", description="", rating="PG", duration=90, genre="Drama")
+		self.showtime = Showtime.objects.create(
+			movie=movie, movie_room=room, starts_at=timezone.now() + timedelta(days=1), base_price="10.00",
+		)
+
+	def book(self, seats, key="attempt-1"):
+		payload = {"showtime": self.showtime.id, "seats": [seat.id for seat in seats], "payment_method": "card"}
+		return self.client.post("/api/bookings/", payload, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+	def test_retry_replays_the_first_booking_without_touching_seats(self):
+		first = self.book(self.seats[:2])
+		self.assertEqual(first.status_code, 201, first.data)
+		self.assertNotIn("Idempotent-Replayed", first)
+
+		with CaptureQueriesContext(connection) as queries:
+			retry = self.book(self.seats[:2])
+		self.assertEqual((retry.status_code, retry.content), (first.status_code, first.content))
+		self.assertEqual(retry["Idempotent-Replayed"], "true")
+		self.assertEqual(retry["ETag"], first["ETag"])
+		self.assertFalse([q["sql"] for q in queries if "posts_ticket" in q["sql"] or "posts_seat" in q["sql"]])
+		self.assertEqual(Booking.objects.count(), 1)
+
+		# Same key, different request: refused rather than silently replayed
+		self.assertEqual(self.book(self.seats[2:]).status_code, 422)
+		# Without a key a retry still runs, and finds its own seats taken
+		self.assertEqual(self.book(self.seats[:2], key=None).status_code, 409)
+
+	def test_unfinished_attempts_block_retries_until_abandoned(self):
+		retries = []
+		place = BookingViewSet._place_booking
+
+		def place_and_retry(view, *args):
+			# The client times out and retries while the first attempt is still running
+			retries.append(self.book(self.seats[:1]))
+			return place(view, *args)
+
+		with mock.patch.object(BookingViewSet, "_place_booking", place_and_retry):
+			self.assertEqual(self.book(self.seats[:1]).status_code, 201)
+		self.assertEqual((retries[0].status_code, retries[0]["Retry-After"]), (409, "1"))
+
+		# A failure on our side releases the key for the next attempt
+		with mock.patch.object(BookingViewSet, "_place_booking", side_effect=RuntimeError("db down")):
+			with self.assertRaises(RuntimeError):
+				self.book(self.seats[1:2], key="attempt-2")
+		self.assertFalse(IdempotencyRecord.objects.filter(key="attempt-2").exists())
+
+		# An attempt that never finished (a killed worker) is taken over once the lock times out
+		IdempotencyRecord.objects.create(
+			user=self.user,
+			key="attempt-3",
+			fingerprint="",
+			created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS + 1),
+			expires_at=timezone.now() + timedelta(hours=1),
+		)
+		self.assertEqual(self.book(self.seats[1:2], key="attempt-3").status_code, 201)
+
+	def test_a_taken_over_attempt_rolls_its_booking_back(self):
+		place = BookingViewSet._place_booking
+
+		def slow_place(view, *args):
+			# Ran past IDEMPOTENCY_LOCK_SECONDS: a retry deleted the claim to take the key over
+			IdempotencyRecord.objects.filter(key="attempt-1").delete()
+			return place(view, *args)
+
+		with mock.patch.object(BookingViewSet, "_place_booking", slow_place):
+			first = self.book(self.seats[:1])
+		self.assertEqual((first.status_code, first["Retry-After"]), (409, "1"))
+		self.assertFalse(Booking.objects.exists())
+		self.assertFalse(Ticket.objects.exists())
+
+	def test_cancel_replays_and_prune_bounds_the_table(self):
+		booking_id = self.book(self.seats[:1]).data["booking"]["id"]
+		url = f"/api/bookings/{booking_id}/cancel/"
+		first = self.client.post(url, HTTP_IDEMPOTENCY_KEY="cancel-1")
+		retry = self.client.post(url, HTTP_IDEMPOTENCY_KEY="cancel-1")
+		self.assertEqual(first.data, {"message": "Booking cancelled successfully."})
+		self.assertEqual((retry.content, retry["Idempotent-Replayed"]), (first.content, "true"))
+
+		now = timezone.now()
+		IdempotencyRecord.objects.filter(key="attempt-1").update(expires_at=now - timedelta(minutes=1))
+		for i in range(4):
+			IdempotencyRecord.objects.create(user=self.user, key=f"old-{i}", fingerprint="", expires_at=now + timedelta(hours=1))
+		call_command("prune_idempotency_keys", max_keys=3, batch_size=2, stdout=StringIO())
+		self.assertEqual(list(IdempotencyRecord.objects.order_by("key").values_list("key", flat=True)), ["old-1", "old-2", "old-3"])
+
+
+class AsyncReadViewTests(TestCase):
+	"""The ASGI read views answer byte-for-byte like their DRF counterparts."""
+
+	def setUp(self):
+		cache.clear()
+		self.client = APIClient()
+		self.factory = AsyncRequestFactory()
+		room = MovieRoom.objects.create(name="Hall A", capacity=4)
+		Seat.objects.bulk_create([Seat(movie_room=room, row="A", number=n) for n in range(1, 5)])
+		for i in range(3):
+			movie = Movie.objects.create(title=f"Async Movie {i}", description="", rating="PG", duration=90, genre="Drama")
+			self.showtime = Showtime.objects.create(
+				movie=movie, movie_room=room, starts_at=timezone.now() + timedelta(days=1, minutes=i), base_price="9.50"
+			)
+
+	def fetch(self, view, path, params=None, **kwargs):
+		return async_to_sync(view)(self.factory.get(path, params or {}), **kwargs)
+
+	def test_catalog_views_match_drf(self):
+		expected = self.client.get("/api/movies/", {"page_size": 2}).content
+		cache.clear()
+		response = self.fetch(async_views.movie_list, "/api/movies/", {"page_size": 2})
+		self.assertEqual(response.content, expected)
+		self.assertEqual(response["X-Catalog-Cache"], "MISS")
+		self.assertEqual(self.fetch(async_views.movie_list, "/api/movies/", {"page_size": 2})["X-Catalog-Cache"], "HIT")
+
+		expected = self.client.get("/api/movies/async-movie-1/").content
+		cache.clear()
+		self.assertEqual(self.fetch(async_views.movie_detail, "/api/movies/async-movie-1/", slug="async-movie-1").content, expected)
+
+		missing = self.fetch(async_views.movie_detail, "/api/movies/nope/", slug="nope")
+		expected = self.client.get("/api/movies/nope/")
+		self.assertEqual((missing.status_code, missing.content), (expected.status_code, expected.content))
+
+	def test_showtime_views_match_drf(self):
+		for params in ({"page_size": 2}, {"movie": self.showtime.movie_id}, {"movie": "x"}):
+			expected = self.client.get("/api/showtimes/", params)
+			response = self.fetch(async_views.showtime_list, "/api/showtimes/", params)
+			self.assertEqual((response.status_code, response.content), (expected.status_code, expected.content))
+
+		path = f"/api/showtimes/{self.showtime.pk}/seats/"
+		for params in ({}, {"encoding": "bitmap"}):
+			expected = self.client.get(path, params).content
+			self.assertEqual(self.fetch(async_views.showtime_seats, path, params, pk=str(self.showtime.pk)).content, expected)
+		self.assertEqual(self.fetch(async_views.showtime_seats, "/api/showtimes/x/seats/", pk="x").status_code, 404)
+
+	def test_writes_fall_through_to_the_drf_view(self):
+		request = self.factory.post("/api/movies/", {"title": "Sneaky"}, content_type="application/json")
+		self.assertEqual(async_to_sync(async_views.movie_list)(request).status_code, 403)
+		self.assertFalse(Movie.objects.filter(title="Sneaky").exists())
+
+	def test_promo_validation(self):
+		today = timezone.now().date()
+		Promotion.objects.create(
+			promo_code="ASYNC10", discount_percent="10.00", start_date=today, end_date=today + timedelta(days=3)
+		)
+		user = User.objects.create_user(username="promo", password="pass1234", email="promo@example.com")
+
+		def post(code, as_user):
+			request = self.factory.post("/api/promotions/validate/", {"promo_code": code}, content_type="application/json")
+
+			async def auser():
+				return as_user
+
+			request.auser = auser
+			return async_to_sync(async_views.validate_promo_code)(request)
+
+		anonymous = post("ASYNC10", AnonymousUser())
+		expected = self.client.post("/api/promotions/validate/", {"promo_code": "ASYNC10"}, format="json")
+		self.assertEqual((anonymous.status_code, anonymous.content), (403, expected.content))
+		self.client.force_authenticate(user)
+		for code in ("async10", "MISSING", ""):
+			expected = self.client.post("/api/promotions/validate/", {"promo_code": code}, format="json")
+			response = post(code, user)
+			self.assertEqual((response.status_code, response.content), (expected.status_code, expected.content))
+
+
+@override_settings(SEAT_STREAM_COALESCE_SECONDS=0)
+class SeatStreamTests(TestCase):
+	"""Committed ticket changes fan out to open seat streams without queries."""
+
+	def setUp(self):
+		cache.clear()
+		self.room = MovieRoom.objects.create(name="Stream Hall", capacity=6)
+		self.seats = Seat.objects.bulk_create([Seat(movie_room=self.room, row="A", number=n) for n in range(1, 7)])
+		movie = Movie.objects.create(title="Streamed", description="", rating="PG", duration=90, genre="Drama")
+		self.showtime = Showtime.objects.create(
+			movie=movie, movie_room=self.room, starts_at=timezone.now() + timedelta(days=1), base_price="10.00"
+		)
+		user = User.objects.create_user(username="streamer", password="pass1234", email="streamer@example.com")
+		self.booking = Booking.objects.create(customer=Customer.objects.create(user=user))
+
+	def test_bursts_are_coalesced_per_subscriber(self):
+		loop = asyncio.new_event_loop()
+		self.addCleanup(loop.close)
+		subscribers = [seat_stream.Subscriber(loop) for _ in range(50)]
+		channels = {seat_stream.subscribe(self.showtime, subscriber)[0] for subscriber in subscribers}
+		self.assertEqual(len(channels), 1)
+		channel = channels.pop()
+		for subscriber in subscribers:
+			self.addCleanup(seat_stream.unsubscribe, channel, subscriber)
+
+		async def next_batches(timeout):
+			return await asyncio.gather(*(subscriber.next_batch(timeout) for subscriber in subscribers))
+
+		with self.captureOnCommitCallbacks() as callbacks:
+			tickets = [
+				Ticket.objects.create(booking=self.booking, showtime=self.showtime, seat=seat, price="10.00")
+				for seat in self.seats[:3]
+			]
+			tickets[2].delete()
+		# Fanning out to every subscriber costs no queries
+		with self.assertNumQueries(0):
+			for callback in callbacks:
+				callback()
+
+		expected = {self.seats[0].pk: True, self.seats[1].pk: True, self.seats[2].pk: False}
+		self.assertEqual(loop.run_until_complete(next_batches(1)), [(False, expected)] * 50)
+		self.assertEqual(loop.run_until_complete(next_batches(0.01)), [None] * 50)
+		self.assertEqual(seat_stream.subscriber_count(self.showtime.pk), 50)
+
+		# A booking committed in another worker process only shows up as a new seats version
+		Ticket.objects.bulk_create([Ticket(booking=self.booking, showtime=self.showtime, seat=self.seats[5], price="10.00")])
+		Showtime.objects.filter(pk=self.showtime.pk).update(seats_version=F("seats_version") + 1)
+		# The versions, then the bitmap of the new one; the grid comes from the cache
+		with self.assertNumQueries(2):
+			channel.resync()
+		self.assertEqual(loop.run_until_complete(next_batches(1))[0], (False, {self.seats[5].pk: True}))
+
+	def test_cancelling_a_booking_publishes_once(self):
+		Ticket.objects.bulk_create(
+			[Ticket(booking=self.booking, showtime=self.showtime, seat=seat, price="10.00") for seat in self.seats[:3]]
+		)
+		client = APIClient()
+		client.force_authenticate(self.booking.customer.user)
+		with mock.patch("posts.seat_stream.publish") as publish, self.captureOnCommitCallbacks(execute=True):
+			self.assertEqual(client.post(f"/api/bookings/{self.booking.pk}/cancel/").status_code, 200)
+		publish.assert_called_once()
+		showtime_id, seat_ids, reserved = publish.call_args.args
+		self.assertEqual((showtime_id, sorted(seat_ids), reserved), (self.showtime.pk, [seat.pk for seat in self.seats[:3]], False))
+
+	def test_subscribers_on_closed_loops_are_dropped(self):
+		live_loop, dead_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+		self.addCleanup(live_loop.close)
+		live, dead = seat_stream.Subscriber(live_loop), seat_stream.Subscriber(dead_loop)
+		channel, _ = seat_stream.subscribe(self.showtime, live)
+		seat_stream.subscribe(self.showtime, dead)
+		self.addCleanup(seat_stream.unsubscribe, channel, live)
+		dead_loop.close()
+
+		seat_stream.publish(self.showtime.pk, [self.seats[0].pk], True)
+		self.assertEqual(live_loop.run_until_complete(live.next_batch(1)), (False, {self.seats[0].pk: True}))
+		self.assertEqual(seat_stream.subscriber_count(self.showtime.pk), 1)
+
+		# A channel left with only dead subscribers is forgotten
+		seat_stream.unsubscribe(channel, live)
+		channel, _ = seat_stream.subscribe(self.showtime, dead)
+		seat_stream.publish(self.showtime.pk, [self.seats[1].pk], True)
+		self.assertNotIn(self.showtime.pk, seat_stream._channels)
+
+	def test_stream_sends_snapshot_then_deltas(self):
+		request = AsyncRequestFactory().get(f"/api/showtimes/{self.showtime.pk}/seats/stream/")
+		seat = self.seats[4]
+
+		async def scenario():
+			response = await async_views.showtime_seat_stream(request, pk=str(self.showtime.pk))
+			chunks = asyncio.Queue()
+
+			async def consume():
+				async for chunk in response:
+					await chunks.put(chunk)
+
+			task = asyncio.create_task(consume())
+			snapshot = await asyncio.wait_for(chunks.get(), 5)
+			await sync_to_async(seat_stream.publish)(self.showtime.pk, [seat.pk], True)
+			delta = await asyncio.wait_for(chunks.get(), 5)
+			# A client disconnect cancels the response task
+			task.cancel()
+			await asyncio.gather(task, return_exceptions=True)
+			return response, snapshot, delta
+
+		response, snapshot, delta = async_to_sync(scenario)()
+		self.assertEqual(response["Content-Type"], "text/event-stream")
+		event, data = snapshot.decode().strip().split("\n")
+		self.assertEqual(event, "event: snapshot")
+		self.assertEqual(len(json.loads(data[len("data: "):])), 6)
+		self.assertEqual(delta, f'event: seats\ndata: {{"reserved":[{seat.pk}],"released":[]}}\n\n'.encode())
+		self.assertEqual(seat_stream.subscriber_count(self.showtime.pk), 0)
+
+
+class PasswordHashingTests(TestCase):
+	"""PBKDF2 runs in a bounded pool with a configurable cost."""
+
+	def tearDown(self):
+		reset_pool()
+
+	def test_pool_rejects_work_beyond_its_queue_limit(self):
+		pool = HashingPool(workers=1, queue_limit=1)
+		release = threading.Event()
+		try:
+			running = pool.submit(release.wait)
+			queued = pool.submit(lambda: "queued")
+			with self.assertRaises(PasswordHashingBusy):
+				pool.submit(lambda: "rejected")
+			self.assertEqual(pool.stats()["queued"], 1)
+		finally:
+			release.set()
+		self.assertTrue(running.result())
+		self.assertEqual(queued.result(), "queued")
+		stats = pool.stats()
+		self.assertEqual((stats["completed"], stats["rejected"], stats["in_flight"]), (2, 1, 0))
+
+	def test_login_rehashes_when_the_configured_cost_changes(self):
+		with self.settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+			user = User.objects.create_user(username="cost", password="pass1234", email="cost@example.com")
+		UserProfile.objects.filter(user=user).update(is_verified=True)
+		self.assertIn("$1000$", user.password)
+
+		with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+			response = APIClient().post("/api/auth/login/", {"username": "cost", "password": "pass1234"}, format="json")
+			self.assertEqual(response.status_code, 200, response.data)
+			self.assertIn("$2000$", User.objects.get(pk=user.pk).password)
+			self.assertEqual(
+				APIClient().post("/api/auth/login/", {"username": "cost", "password": "wrong"}, format="json").status_code,
+				400,
+			)
+
+	def test_login_goes_through_the_configured_backends(self):
+		user = User.objects.create_user(username="signals", password="pass1234", email="signals@example.com")
+		UserProfile.objects.filter(user=user).update(is_verified=True)
+		failures = []
+		handler = lambda sender, credentials, **kwargs: failures.append(credentials["username"])
+		user_login_failed.connect(handler)
+		self.addCleanup(user_login_failed.disconnect, handler)
+
+		body = {"username": "signals", "password": "wrong"}
+		self.assertEqual(APIClient().post("/api/auth/login/", body, format="json").status_code, 400)
+		self.assertEqual(failures, ["signals"])
+
+		client = APIClient()
+		self.assertEqual(client.post("/api/auth/login/", {**body, "password": "pass1234"}, format="json").status_code, 200)
+		self.assertEqual(client.session["_auth_user_backend"], "posts.hashing.PooledModelBackend")
+
+		# Deployments that swap the backend list are obeyed
+		with self.settings(AUTHENTICATION_BACKENDS=["django.contrib.auth.backends.RemoteUserBackend"]):
+			self.assertEqual(client.post("/api/auth/login/", {**body, "password": "pass1234"}, format="json").status_code, 400)
+
+	def test_registration_reports_a_full_hashing_queue(self):
+		body = {
+			"username": "queued",
+			"email": "queued@example.com",
+			"password": "Sup3r-secret-pw",
+			"password_confirm": "Sup3r-secret-pw",
+			"first_name": "Queued",
+			"last_name": "User",
+		}
+		with mock.patch("posts.hashing.set_password", side_effect=PasswordHashingBusy()):
+			response = APIClient().post("/api/auth/register/", body, format="json")
+		self.assertEqual(response.status_code, 503)
+		self.assertEqual(response.data["error"], PasswordHashingBusy.default_detail)
+		self.assertFalse(User.objects.filter(username="queued").exists())
+
+	def test_sessions_from_the_old_backend_survive_the_switch(self):
+		user = User.objects.create_user(username="returning", password="pass1234", email="returning@example.com")
+		session = SessionStore()
+		session.update({
+			"_auth_user_id": str(user.pk),
+			"_auth_user_backend": "django.contrib.auth.backends.ModelBackend",
+			"_auth_user_hash": user.get_session_auth_hash(),
+		})
+		session.create()
+		request = mock.Mock(session=SessionStore(session.session_key))
+		self.assertFalse(get_user(request).is_authenticated)
+
+		importlib.import_module("posts.migrations.0023_rewrite_session_auth_backend").forwards(apps, None)
+		request = mock.Mock(session=SessionStore(session.session_key))
+		self.assertEqual(get_user(request), user)
+
+	async def test_async_login_view(self):
+		user = await User.objects.acreate(username="async", email="async@example.com")
+		user.password = await amake_password("pass1234")
+		await user.asave()
+		await UserProfile.objects.filter(user=user).aupdate(is_verified=True)
+
+		factory = AsyncRequestFactory()
+		body = {"email": "async@example.com", "password": "pass1234"}
+		request = factory.post("/api/auth/login/", body, content_type="application/json")
+		request.session = SessionStore()
+		response = await async_views.login_user(request)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(json.loads(response.content)["user"]["username"], "async")
+		self.assertEqual(request.session["_auth_user_id"], str(user.pk))
+
+		request = factory.post("/api/auth/login/", {**body, "password": "nope"}, content_type="application/json")
+		request.session = SessionStore()
+		self.assertEqual((await async_views.login_user(request)).status_code, 400)
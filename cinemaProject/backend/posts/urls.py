@@ -1,7 +1,9 @@
 # posts/urls.py
-from django.urls import path, include
+from django.conf import settings
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
+from . import async_views
 from .views import (
     MovieViewSet,
     register_user,
@@ -18,6 +20,7 @@ from .views import (
     payment_card_detail,
     MovieAdminViewSet,
     PromotionAdminViewSet,
+    PromotionEmailJobAdminViewSet,
     ShowroomAdminViewSet,
     ShowtimeAdminViewSet,
     UserAdminViewSet,
@@ -25,6 +28,8 @@ from .views import (
     ShowtimeViewSet,
     BookingViewSet,
     validate_promo_code,
+    catalog_cache_stats,
+    password_hashing_stats,
 )
 
 router = DefaultRouter()
@@ -33,19 +38,36 @@ router.register(r"showtimes", ShowtimeViewSet, basename="showtime")
 router.register(r"bookings", BookingViewSet, basename="booking")
 router.register(r"admin/movies", MovieAdminViewSet, basename="admin-movie")
 router.register(r"admin/promotions", PromotionAdminViewSet, basename="admin-promotion")
+router.register(
+    r"admin/promotion-email-jobs", PromotionEmailJobAdminViewSet, basename="admin-promotion-email-job"
+)
 router.register(r"admin/showrooms", ShowroomAdminViewSet, basename="admin-showroom")
 router.register(r"admin/showtimes", ShowtimeAdminViewSet, basename="admin-showtime")
 router.register(r"admin/movie-rooms", MovieRoomAdminViewSet, basename="admin-movie-room")
 router.register(r"admin/users", UserAdminViewSet, basename="admin-user")
 
-urlpatterns = [
+# Under ASGI the public reads are served by native async views; they take
+# the router's URL names and precede it, so they win the match.
+async_read_urlpatterns = [
+    path("movies/", async_views.movie_list, name="movie-list"),
+    path("movies/search/", async_views.movie_search, name="movie-search"),
+    re_path(r"^movies/(?P<slug>[^/.]+)/$", async_views.movie_detail, name="movie-detail"),
+    path("showtimes/", async_views.showtime_list, name="showtime-list"),
+    re_path(r"^showtimes/(?P<pk>[^/.]+)/seats/$", async_views.showtime_seats, name="showtime-seats"),
+    # Long-lived streams only make sense on an event loop, never a WSGI thread
+    re_path(
+        r"^showtimes/(?P<pk>[^/.]+)/seats/stream/$", async_views.showtime_seat_stream, name="showtime-seat-stream"
+    ),
+]
+
+urlpatterns = (async_read_urlpatterns if settings.ASYNC_VIEWS else []) + [
     path("", include(router.urls)),
 
     # ---------------------------------------------------------
     # Authentication
     # ---------------------------------------------------------
     path("auth/register/", register_user, name="register"),
-    path("auth/login/", login_user, name="login"),
+    path("auth/login/", async_views.login_user if settings.ASYNC_VIEWS else login_user, name="login"),
     path("auth/logout/", logout_user, name="logout"),
     path("auth/status/", check_auth_status, name="auth_status"),
 
@@ -76,5 +98,15 @@ urlpatterns = [
     # ---------------------------------------------------------
     # Promotions (public checkout validation)
     # ---------------------------------------------------------
-    path("promotions/validate/", validate_promo_code, name="validate_promo_code"),
+    path(
+        "promotions/validate/",
+        async_views.validate_promo_code if settings.ASYNC_VIEWS else validate_promo_code,
+        name="validate_promo_code",
+    ),
+
+    # ---------------------------------------------------------
+    # Admin diagnostics
+    # ---------------------------------------------------------
+    path("admin/catalog-cache/", catalog_cache_stats, name="catalog_cache_stats"),
+    path("admin/password-hashing/", password_hashing_stats, name="password_hashing_stats"),
 ]
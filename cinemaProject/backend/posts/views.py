@@ -1,30 +1,37 @@
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
 from django.contrib.auth.models import User
-from django.db import transaction
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import datetime, time, timedelta
 from decimal import Decimal, ROUND_HALF_UP
 from rest_framework import permissions, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
+from rest_framework.exceptions import APIException, ValidationError
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from . import auth_snapshot, catalog_cache, hashing, room_layouts, scheduling, search, seatmap
 from .email_utils import (
     send_password_reset_email,
     send_profile_change_notification,
-    send_promotion_email_to_subscribers,
     send_verification_email,
     send_welcome_email,
     send_booking_confirmation_email,
     send_booking_cancellation_email
 )
 from .models import (
+    AccountToken,
     Booking,
     Customer,
     Movie,
     MovieRoom,
     PaymentCard,
     Promotion,
+    PromotionEmailJob,
     Seat,
     Showtime,
     Showroom,
@@ -32,13 +39,17 @@ from .models import (
     UserProfile,
 )
 from .serializers import (
+    BookingHistorySerializer,
     BookingSerializer,
     MovieRoomSerializer,
     MovieSerializer,
     PasswordChangeSerializer,
     PaymentCardSerializer,
+    PlacedBookingSerializer,
     ProfileUpdateSerializer,
+    PromotionEmailJobSerializer,
     PromotionSerializer,
+    ScheduleSlotSerializer,
     SeatSerializer,
     ShowtimeSerializer,
     ShowroomSerializer,
@@ -46,16 +57,168 @@ from .serializers import (
     UserRegistrationSerializer,
     UserSerializer,
 )
+from .pagination import BookingCursorPagination, MovieCursorPagination, ShowtimeCursorPagination
+from .idempotency import idempotent
+from .promotion_mailer import start_promotion_job
+from .routers import SAFE_METHODS, reads_from_replica
 
 
 # ---------------------------------------------------------
 # Movie Views (Public)
 # ---------------------------------------------------------
-class MovieViewSet(viewsets.ModelViewSet):
-    """Public API for browsing movies"""
+SEARCH_RESULT_LIMIT = 20
+SEARCH_MAX_RESULT_LIMIT = 50
+
+
+def with_upcoming_showtimes(queryset):
+    """Load every movie's upcoming showtimes (and room names) in one extra query."""
+    upcoming = (
+        Showtime.objects.filter(starts_at__gte=timezone.now())
+        .select_related("movie_room")
+        .order_by("starts_at")
+    )
+    return queryset.prefetch_related(Prefetch("showtimes", queryset=upcoming, to_attr="upcoming_showtimes"))
+
+
+def wants_showtimes(params):
+    return params.get("include_showtimes", "true").lower() not in ("false", "0", "no")
+
+
+class MovieShowtimesMixin:
+    """Prefetch showtimes for MovieSerializer unless ?include_showtimes=false."""
+
+    def include_showtimes(self):
+        return wants_showtimes(self.request.query_params)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.include_showtimes():
+            queryset = with_upcoming_showtimes(queryset)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["include_showtimes"] = self.include_showtimes()
+        return context
+
+
+def filter_movies(queryset, params):
+    """Apply ?category= and ?genre= (case-insensitive)."""
+    if params.get("category"):
+        queryset = queryset.filter(category=params["category"])
+    if params.get("genre"):
+        queryset = queryset.filter(genre__iexact=params["genre"])
+    return queryset
+
+
+def query_int(params, name):
+    raw = params.get(name)
+    if raw in (None, ""):
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValidationError({name: "Must be an integer."})
+
+
+def search_results(params, include_showtimes):
+    """
+    Movies for /movies/search/: ?q= plus optional ?category=, ?genre=,
+    ?limit= and ?title_only=true (type-ahead).
+    """
+    query = params.get("q", "").strip()
+    if not query:
+        raise ValidationError({"q": "This query parameter is required."})
+    limit = max(1, min(query_int(params, "limit") or SEARCH_RESULT_LIMIT, SEARCH_MAX_RESULT_LIMIT))
+    movies = search.search_movies(
+        query,
+        category=params.get("category"),
+        genre=params.get("genre"),
+        limit=limit,
+        title_only=params.get("title_only", "").lower() in ("true", "1", "yes"),
+    )
+    return with_upcoming_showtimes(movies) if include_showtimes else movies
+
+
+def query_local_date(params, name):
+    raw = params.get(name)
+    if not raw:
+        return None
+    try:
+        value = parse_date(raw)
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({name: "Use the YYYY-MM-DD format."})
+    return value
+
+
+def local_day_start(day):
+    """Midnight of ``day`` in the theatre's TIME_ZONE."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_showtimes(queryset, params):
+    """Apply ?movie=, ?room=, ?format=, ?date_from= and ?date_to= (local dates, inclusive)."""
+    movie_id = query_int(params, "movie")
+    if movie_id is not None:
+        queryset = queryset.filter(movie_id=movie_id)
+
+    room_id = query_int(params, "room")
+    if room_id is not None:
+        queryset = queryset.filter(movie_room_id=room_id)
+
+    if params.get("format"):
+        queryset = queryset.filter(format=params["format"].upper())
+
+    date_from = query_local_date(params, "date_from")
+    if date_from:
+        queryset = queryset.filter(starts_at__gte=local_day_start(date_from))
+
+    date_to = query_local_date(params, "date_to")
+    if date_to:
+        queryset = queryset.filter(starts_at__lt=local_day_start(date_to + timedelta(days=1)))
+
+    return queryset
+
+
+class MovieViewSet(MovieShowtimesMixin, viewsets.ModelViewSet):
+    """Public API for browsing movies, filterable by ?category= and ?genre="""
     queryset = Movie.objects.all()
     serializer_class = MovieSerializer
+    pagination_class = MovieCursorPagination
     lookup_field = "slug"
+    replica_methods = SAFE_METHODS
+
+    def get_queryset(self):
+        return filter_movies(super().get_queryset(), self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        return catalog_cache.cached_response(
+            request,
+            lambda: super(MovieViewSet, self).list(request, *args, **kwargs),
+            time_sensitive=self.include_showtimes(),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return catalog_cache.cached_response(
+            request,
+            lambda: super(MovieViewSet, self).retrieve(request, *args, **kwargs),
+            time_sensitive=self.include_showtimes(),
+        )
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Ranked full-text search; every word of ?q= is prefix-matched, so it
+        serves type-ahead (with title_only=true&include_showtimes=false).
+        """
+
+        def build():
+            movies = search_results(request.query_params, self.include_showtimes())
+            return Response({"results": self.get_serializer(movies, many=True).data})
+
+        return catalog_cache.cached_response(request, build, time_sensitive=self.include_showtimes())
 
 
 # ---------------------------------------------------------
@@ -81,6 +244,8 @@ def register_user(request):
             },
             status=status.HTTP_201_CREATED,
         )
+    except hashing.PasswordHashingBusy as exc:
+        return Response({"error": str(exc.detail)}, status=exc.status_code)
     except Exception as e:
         print(f"Registration exception: {e}")
         return Response(
@@ -98,23 +263,20 @@ def login_user(request):
     remember_me = request.data.get("remember_me", False)
 
     if email and not username:
-        try:
-            user = User.objects.get(email=email)
-            username = user.username
-        except User.DoesNotExist:
+        username = User.objects.filter(email=email).values_list("username", flat=True).first()
+        if username is None:
             return Response({"error": "Invalid email or password"}, status=status.HTTP_400_BAD_REQUEST)
 
+    # PBKDF2 runs in the bounded hashing pool (posts.hashing.PooledModelBackend)
     user = authenticate(request, username=username, password=password)
     if user is None:
         return Response({"error": "Invalid credentials"}, status=status.HTTP_400_BAD_REQUEST)
 
-    profile, _ = UserProfile.objects.get_or_create(user=user)
-
     if not user.is_active:
         return Response({"error": "Account is not activated. Please check your email to verify your account."},
                         status=status.HTTP_403_FORBIDDEN)
 
-    if not profile.is_verified:
+    if not user.profile.is_verified:
         return Response({"error": "Email not verified. Please check your inbox for the verification link."},
                         status=status.HTTP_403_FORBIDDEN)
 
@@ -131,6 +293,7 @@ def logout_user(request):
     return Response({"message": "Logout successful"}, status=status.HTTP_200_OK)
 
 
+@reads_from_replica("POST")
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def validate_promo_code(request):
@@ -166,7 +329,7 @@ def validate_promo_code(request):
 @permission_classes([IsAuthenticated])
 def user_profile(request):
     if request.method == "GET":
-        cards = PaymentCard.objects.filter(user=request.user)
+        cards = PaymentCard.for_display(request.user)
         return Response(
             {
                 "user": UserSerializer(request.user).data,
@@ -192,13 +355,18 @@ def user_profile(request):
 
 
 @api_view(["GET"])
+@authentication_classes([])
 @permission_classes([AllowAny])
 def check_auth_status(request):
-    if request.user.is_authenticated:
-        return Response(
-            {"isAuthenticated": True, "user": UserSerializer(request.user).data},
-            status=status.HTTP_200_OK,
-        )
+    """
+    Report the session's user from a cached snapshot.
+
+    Skips DRF authentication entirely; with the cached session profile a warm
+    call costs no queries (see posts/auth_snapshot.py).
+    """
+    user = auth_snapshot.session_user(request.session)
+    if user is not None:
+        return Response({"isAuthenticated": True, "user": user}, status=status.HTTP_200_OK)
     return Response({"isAuthenticated": False}, status=status.HTTP_200_OK)
 
 
@@ -208,23 +376,22 @@ def check_auth_status(request):
 @api_view(["GET", "POST"])
 @permission_classes([AllowAny])
 def verify_email(request, token):
-    try:
-        profile = UserProfile.objects.get(verification_token=token)
-    except UserProfile.DoesNotExist:
+    account_token = AccountToken.lookup(token, AccountToken.Purpose.VERIFY_EMAIL)
+    if account_token is None:
         return Response({"error": "Invalid verification token"}, status=status.HTTP_400_BAD_REQUEST)
 
-    if not profile.is_verification_token_valid():
+    if account_token.is_expired():
         return Response({"error": "Verification link has expired. Please request a new one."},
                         status=status.HTTP_400_BAD_REQUEST)
 
-    user = profile.user
+    user = account_token.user
     user.is_active = True
     user.save()
 
+    profile = user.profile
     profile.is_verified = True
-    profile.verification_token = None
-    profile.verification_token_created = None
     profile.save()
+    account_token.delete()
 
     try:
         send_welcome_email(user)
@@ -285,22 +452,18 @@ def reset_password(request, token):
     if new_password != new_password_confirm:
         return Response({"error": "Passwords do not match"}, status=status.HTTP_400_BAD_REQUEST)
 
-    try:
-        profile = UserProfile.objects.get(reset_token=token)
-    except UserProfile.DoesNotExist:
+    account_token = AccountToken.lookup(token, AccountToken.Purpose.RESET_PASSWORD)
+    if account_token is None:
         return Response({"error": "Invalid reset token"}, status=status.HTTP_400_BAD_REQUEST)
 
-    if not profile.is_reset_token_valid():
+    if account_token.is_expired():
         return Response({"error": "Reset link has expired. Please request a new one."},
                         status=status.HTTP_400_BAD_REQUEST)
 
-    user = profile.user
-    user.set_password(new_password)
+    user = account_token.user
+    hashing.set_password(user, new_password)
     user.save()
-
-    profile.reset_token = None
-    profile.reset_token_created = None
-    profile.save()
+    account_token.delete()
 
     return Response({"message": "Password reset successfully. You can now log in with your new password."},
                     status=status.HTTP_200_OK)
@@ -331,7 +494,7 @@ def change_password(request):
 @permission_classes([IsAuthenticated])
 def payment_cards(request):
     if request.method == "GET":
-        cards = PaymentCard.objects.filter(user=request.user)
+        cards = PaymentCard.for_display(request.user)
         return Response(PaymentCardSerializer(cards, many=True).data, status=status.HTTP_200_OK)
 
     existing_count = PaymentCard.objects.filter(user=request.user).count()
@@ -350,7 +513,8 @@ def payment_cards(request):
 @permission_classes([IsAuthenticated])
 def payment_card_detail(request, card_id):
     try:
-        card = PaymentCard.objects.get(id=card_id, user=request.user)
+        # An update that leaves the number alone never loads it; save() writes only loaded fields
+        card = PaymentCard.for_display(request.user).get(id=card_id)
     except PaymentCard.DoesNotExist:
         return Response({"error": "Payment card not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -368,7 +532,7 @@ def payment_card_detail(request, card_id):
 # ---------------------------------------------------------
 # ------------------ Admin Panel Views -------------------
 # ---------------------------------------------------------
-class MovieAdminViewSet(viewsets.ModelViewSet):
+class MovieAdminViewSet(MovieShowtimesMixin, viewsets.ModelViewSet):
     queryset = Movie.objects.all()
     serializer_class = MovieSerializer
     permission_classes = [IsAdminUser]
@@ -388,9 +552,38 @@ class PromotionAdminViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"])
     def send_email(self, request, pk=None):
+        """Queue a promotion blast; the email worker sends it in chunks."""
         promotion = self.get_object()
-        sent_count = send_promotion_email_to_subscribers(promotion)
-        return Response({"status": f"Promotion email sent to {sent_count} subscriber(s)"})
+        job = start_promotion_job(promotion)
+        return Response(
+            {
+                "status": f"Promotion email queued for {job.total_recipients} subscriber(s)",
+                "job_id": job.id,
+                "job": PromotionEmailJobSerializer(job).data,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def catalog_cache_stats(request):
+    """Hit/miss counters for the public movie catalog cache."""
+    return Response(catalog_cache.stats(), status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def password_hashing_stats(request):
+    """Queue depth and timings of the password hashing pool."""
+    return Response(hashing.get_pool().stats(), status=status.HTTP_200_OK)
+
+
+class PromotionEmailJobAdminViewSet(viewsets.ReadOnlyModelViewSet):
+    """Progress and throughput of promotion blasts."""
+    queryset = PromotionEmailJob.objects.select_related("promotion").order_by("-created_at")
+    serializer_class = PromotionEmailJobSerializer
+    permission_classes = [IsAdminUser]
 
 
 class ShowroomAdminViewSet(viewsets.ModelViewSet):
@@ -404,17 +597,107 @@ class MovieRoomAdminViewSet(viewsets.ModelViewSet):
     serializer_class = MovieRoomSerializer
     permission_classes = [IsAdminUser]
 
+    def create(self, request, *args, **kwargs):
+        """Create a room and materialize its seats: the posted layout, or rows sized to capacity."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                room = serializer.save()
+                spec = request.data.get("layout") or room_layouts.default_layout(room.capacity)
+                room_layouts.apply_layout(room, spec)
+        except room_layouts.LayoutError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        room.refresh_from_db()
+        return Response(self.get_serializer(room).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get", "put"])
+    def layout(self, request, pk=None):
+        """
+        GET: the room's layout and its seat grid descriptor.
+        PUT: materialize a new layout (see posts.room_layouts for the format).
+        """
+        room = self.get_object()
+        changes = None
+        if request.method == "PUT":
+            try:
+                changes = room_layouts.apply_layout(room, request.data)
+            except room_layouts.LayoutError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            room.refresh_from_db()
+
+        body = {
+            "room": room.pk,
+            "capacity": room.capacity,
+            "layout": room.layout,
+            "grid": seatmap.get_room_layout(room.pk, room.layout_version).descriptor(),
+        }
+        if changes is not None:
+            body["changes"] = changes
+        return Response(body, status=status.HTTP_200_OK)
+
 
 class ShowtimeAdminViewSet(viewsets.ModelViewSet):
-    queryset = Showtime.objects.all()
+    queryset = Showtime.objects.all().select_related("movie")
     serializer_class = ShowtimeSerializer
     permission_classes = [IsAdminUser]
 
     @action(detail=False, methods=["get"])
     def upcoming(self, request):
-        upcoming_showtimes = Showtime.objects.filter(starts_at__gte=timezone.now())
-        serializer = self.get_serializer(upcoming_showtimes, many=True)
-        return Response(serializer.data)
+        """Upcoming showtimes, keyset-paginated on (starts_at, id) and filterable like /showtimes/."""
+        upcoming_showtimes = filter_showtimes(
+            self.get_queryset().filter(starts_at__gte=timezone.now()), request.query_params
+        )
+        paginator = ShowtimeCursorPagination()
+        page = paginator.paginate_queryset(upcoming_showtimes, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["post"])
+    def bulk_schedule(self, request):
+        """
+        Schedule many showtimes at once, e.g. a week for every room.
+
+        Body: ``{"showtimes": [{movie, movie_room, starts_at, format, base_price}, ...]}``.
+        Slots that overlap an existing showtime or an earlier slot of the
+        batch (running time plus cleaning buffer) are rejected by index; the
+        rest are inserted with one bulk write. The rooms stay locked from the
+        check to the insert, so concurrent batches for a room run one by one.
+        """
+        slots = request.data.get("showtimes") if isinstance(request.data, dict) else None
+        if not isinstance(slots, list) or not slots:
+            return Response({"error": "showtimes must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(slots) > settings.SHOWTIME_BULK_SCHEDULE_LIMIT:
+            return Response(
+                {"error": f"At most {settings.SHOWTIME_BULK_SCHEDULE_LIMIT} showtimes per request"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # One serializer for every slot: building one per slot deep-copies its fields each time
+        slot_serializer = ScheduleSlotSerializer()
+        valid = []
+        rejected = []
+        for index, slot in enumerate(slots):
+            try:
+                valid.append((index, slot_serializer.run_validation(slot)))
+            except ValidationError as exc:
+                rejected.append({"index": index, "errors": exc.detail})
+
+        try:
+            with transaction.atomic():
+                scheduling.lock_rooms({attrs["movie_room"] for _, attrs in valid})
+                showtimes, conflicts = scheduling.plan_schedule(valid)
+                Showtime.objects.bulk_create(showtimes)
+                # bulk_create sends no post_save, so invalidate the catalog here
+                if showtimes:
+                    catalog_cache.bump_version_on_commit()
+        except IntegrityError:
+            # Another admin scheduled one of these rooms between the check and the insert
+            return Response({"error": "The schedule changed while saving; please retry"}, status=409)
+
+        rejected = sorted(rejected + conflicts, key=lambda entry: entry["index"])
+        body = {"created": self.get_serializer(showtimes, many=True).data, "rejected": rejected}
+        return Response(body, status=status.HTTP_201_CREATED if showtimes else status.HTTP_400_BAD_REQUEST)
 
 
 class UserAdminViewSet(viewsets.ModelViewSet):
@@ -436,52 +719,171 @@ class UserAdminViewSet(viewsets.ModelViewSet):
 # ---------------------------------------------------------
 # Showtime viewset
 # ---------------------------------------------------------
+# Schedule windows, in local days: the default span and the largest allowed
+SCHEDULE_DEFAULT_DAYS = 7
+SCHEDULE_MAX_DAYS = 31
+
+
+def schedule_showtimes(params):
+    """
+    Showtimes for /showtimes/schedule/ ordered by (show_date, starts_at).
+
+    Returns ``(date_from, date_to, queryset)``. Filtering on the stored local
+    show_date lets the (movie|room, show_date, starts_at) indexes answer
+    both the range and the ordering.
+    """
+    date_from = query_local_date(params, "date_from") or timezone.localdate()
+    date_to = query_local_date(params, "date_to") or date_from + timedelta(days=SCHEDULE_DEFAULT_DAYS - 1)
+    if date_to < date_from:
+        raise ValidationError({"date_to": "Must not be before date_from."})
+    if (date_to - date_from).days >= SCHEDULE_MAX_DAYS:
+        raise ValidationError({"date_to": f"A schedule spans at most {SCHEDULE_MAX_DAYS} days."})
+
+    queryset = Showtime.objects.filter(show_date__range=(date_from, date_to))
+    movie_id = query_int(params, "movie")
+    if movie_id is not None:
+        queryset = queryset.filter(movie_id=movie_id)
+    room_id = query_int(params, "room")
+    if room_id is not None:
+        queryset = queryset.filter(movie_room_id=room_id)
+    if params.get("format"):
+        queryset = queryset.filter(format=params["format"].upper())
+    return date_from, date_to, queryset.order_by("show_date", "starts_at", "id")
+
+
 class ShowtimeViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Showtime.objects.all().select_related("movie", "movie_room")
     serializer_class = ShowtimeSerializer
+    pagination_class = ShowtimeCursorPagination
+    replica_methods = SAFE_METHODS
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list":
+            queryset = filter_showtimes(queryset, self.request.query_params)
+        return queryset
+
+    @action(detail=False, methods=["get"])
+    def schedule(self, request):
+        """
+        Showtimes grouped by local date (theatre TIME_ZONE) between ?date_from=
+        (default today) and ?date_to= (default six days later), filterable
+        by ?movie=, ?room= and ?format=.
+        """
+        date_from, date_to, showtimes = schedule_showtimes(request.query_params)
+        days = []
+        for showtime in showtimes.select_related("movie", "movie_room"):
+            if not days or days[-1][0] != showtime.show_date:
+                days.append((showtime.show_date, []))
+            days[-1][1].append(showtime)
+
+        return Response(
+            {
+                "date_from": date_from,
+                "date_to": date_to,
+                "days": [
+                    {"date": day, "showtimes": self.get_serializer(group, many=True).data}
+                    for day, group in days
+                ],
+            }
+        )
 
     @action(detail=True, methods=["get"])
     def seats(self, request, pk=None):
         """
         Returns seat availability for the showtime:
         available, reserved, etc.
+
+        Pass ?encoding=bitmap for a base64 occupancy bitset plus the room
+        layout descriptor instead of one object per seat.
         """
         showtime = self.get_object()
-        seats_qs = Seat.objects.filter(movie_room=showtime.movie_room)
+        return Response(showtime_seat_map(showtime, request.query_params.get("encoding")), status=200)
 
-        # Auto-create a simple seat map if this room has no seats yet.
-        if not seats_qs.exists():
-            bulk = []
-            rows = [chr(c) for c in range(ord("A"), ord("H") + 1)]  # A-H
-            for row in rows:
-                for num in range(1, 13):  # 12 seats per row
-                    bulk.append(Seat(movie_room=showtime.movie_room, row=row, number=num))
-            Seat.objects.bulk_create(bulk)
-            seats_qs = Seat.objects.filter(movie_room=showtime.movie_room)
+    @action(detail=True, methods=["get"])
+    def best_available(self, request, pk=None):
+        """
+        The best ?count= adjacent free seats (optionally of ?seat_class=),
+        chosen from the cached occupancy grid. POST /api/bookings/best_available/
+        books such a block atomically.
+        """
+        showtime = self.get_object()
+        count, seat_class = best_available_options(request.query_params)
+        layout, bitmap = seatmap.get_occupancy(showtime)
+        block = seatmap.best_block(layout, bitmap, count, seat_class)
+        if block is None:
+            return Response({"error": f"No {count} adjacent seats are available"}, status=409)
+        score, seats = block
+        return Response(
+            {
+                "showtime": showtime.pk,
+                "score": score,
+                "seats": [
+                    {"id": seat_id, "row": row, "number": number, "column": bit % layout.cols + 1, "seatClass": kind}
+                    for seat_id, row, number, bit, kind in seats
+                ],
+            },
+            status=200,
+        )
 
-        reserved_seats = Ticket.objects.filter(showtime=showtime).values_list("seat_id", flat=True)
 
-        data = []
-        for seat in seats_qs:
-            data.append({
-                "id": seat.id,
-                "row": seat.row,
-                "number": seat.number,
-                "isReserved": seat.id in reserved_seats
-            })
+def showtime_seat_map(showtime, encoding=None):
+    """
+    Seat map payload for ShowtimeViewSet.seats and its async variant.
 
-        return Response(data, status=200)
+    Read-only: seats come from the room's materialized layout (see
+    posts.room_layouts), so a room without one has an empty map.
+    """
+    if encoding == "bitmap":
+        return seatmap.compact_seat_map(showtime)
+    return seatmap.seat_map(showtime)
 
 
 # ---------------------------------------------------------
 # BOOKING VIEWSET
 # ---------------------------------------------------------
+# Best-available seating: the largest block one request may ask for
+BEST_AVAILABLE_MAX_SEATS = 20
+
+
+def best_available_options(params):
+    """``(count, seat_class)`` from a best-available request."""
+    count = query_int(params, "count")
+    if count is None or not 1 <= count <= BEST_AVAILABLE_MAX_SEATS:
+        raise ValidationError({"count": f"Must be between 1 and {BEST_AVAILABLE_MAX_SEATS}."})
+    seat_class = str(params.get("seat_class") or "").upper() or None
+    if seat_class and seat_class not in Seat.SeatClass.values:
+        raise ValidationError({"seat_class": f"Must be one of {', '.join(Seat.SeatClass.values)}."})
+    return count, seat_class
+
+
+class ShowtimeBusy(APIException):
+    """Another booking holds the database write lock; 409 with Retry-After, the key is not spent."""
+    status_code = 409
+    default_detail = "Seats for this showtime are being booked, please retry shortly."
+    default_code = "showtime_busy"
+    wait = 1
+
+
+# Ticket price relative to the showtime base price
+TICKET_PRICE_MULTIPLIERS = {
+    Ticket.TicketType.ADULT: Decimal("1.0"),
+    Ticket.TicketType.STUDENT: Decimal("0.90"),
+    Ticket.TicketType.CHILD: Decimal("0.80"),
+    Ticket.TicketType.SENIOR: Decimal("0.85"),
+}
+
+
 class BookingViewSet(viewsets.ModelViewSet):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = BookingCursorPagination
+    # History reads; the writer is pinned to the primary afterwards
+    replica_methods = SAFE_METHODS
 
     @action(detail=True, methods=["post"])
+    @idempotent
     def cancel(self, request, pk=None):
         """
         Allow a user to cancel their booking and release seats.
@@ -505,61 +907,43 @@ class BookingViewSet(viewsets.ModelViewSet):
             booking.status = Booking.Status.CANCELLED
             booking.save(update_fields=["status"])
 
-            # Delete tickets
-            Ticket.objects.filter(booking=booking).delete()
-
-            # Send cancellation email (non-blocking)
-            try:
-                send_booking_cancellation_email(booking, tickets=tickets)
-            except Exception as e:
-                print(f"Failed to send booking cancellation email: {e}")
+            # Delete tickets in one statement, skipping the per-ticket post_delete
+            # receiver, and move each showtime's seat map once for all its seats
+            Ticket.objects.filter(booking=booking)._raw_delete(Ticket.objects.db)
+            released = {}
+            for ticket in tickets:
+                released.setdefault(ticket.showtime_id, []).append(ticket.seat_id)
+            for showtime_id, seat_ids in released.items():
+                seatmap.record_seat_changes(showtime_id, seat_ids, reserved=False)
+
+            # Queue cancellation email (delivered by the outbox worker)
+            send_booking_cancellation_email(booking, tickets=tickets)
         return Response({"message": "Booking cancelled successfully."}, status=status.HTTP_200_OK)
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         """
         Create booking for a user and generate corresponding tickets.
+
+        Retries carrying the same Idempotency-Key header get the first
+        attempt's response back (see posts/idempotency.py).
         """
         user = request.user
         customer, _ = Customer.objects.get_or_create(user=user)
 
         showtime_id = request.data.get("showtime")
         seat_payload = request.data.get("seats", [])
-        payment_method = request.data.get("payment_method")
-        payment_last4 = request.data.get("payment_last4")
-        payment_card_id = request.data.get("payment_card_id")
-        promo_code = str(request.data.get("promo_code") or "").strip()
 
         if not showtime_id or not seat_payload:
             return Response({"error": "showtime and seats are required"}, status=400)
 
-        # If client provides a saved card, trust it as the payment method
-        if payment_card_id:
-            try:
-                card = PaymentCard.objects.get(id=payment_card_id, user=user)
-                payment_method = payment_method or "saved-card"
-                try:
-                    payment_last4 = card.card_number[-4:]
-                except Exception:
-                    payment_last4 = None
-            except PaymentCard.DoesNotExist:
-                return Response({"error": "Payment card not found"}, status=404)
-
-        if not payment_method:
-            return Response({"error": "payment_method is required"}, status=400)
-        # payment_last4 is optional, used only for display
-
-        showtime = get_object_or_404(Showtime, pk=showtime_id)
-
-        # Optional promotion validation
-        promo = None
-        if promo_code:
-            try:
-                promo = Promotion.objects.get(promo_code__iexact=promo_code)
-            except Promotion.DoesNotExist:
-                return Response({"error": "Promo code not found"}, status=404)
+        checkout = self._checkout_details(request)
+        if isinstance(checkout, Response):
+            return checkout
 
-            if not promo.is_active():
-                return Response({"error": "Promo code is expired or inactive"}, status=400)
+        showtime = get_object_or_404(
+            Showtime.objects.select_related("movie", "movie_room"), pk=showtime_id
+        )
 
         # Normalize seats payload into {seat_id: ticket_type}
         seat_type_map = {}
@@ -584,61 +968,161 @@ class BookingViewSet(viewsets.ModelViewSet):
             seat_type_map[sid_int] = ticket_type
             seat_ids.append(sid_int)
 
-        seats = Seat.objects.filter(id__in=seat_ids, movie_room=showtime.movie_room).order_by("id")
-        if seats.count() != len(seat_ids):
+        # Validate the whole selection in a single query
+        seats = list(
+            Seat.objects.filter(id__in=seat_ids, movie_room_id=showtime.movie_room_id).order_by("id")
+        )
+        if len(seats) != len(seat_ids):
             return Response({"error": "Invalid seat selection"}, status=400)
 
-        with transaction.atomic():
-            # Lock existing tickets for these seats/showtime to avoid race conditions
-            existing_tickets = (
-                Ticket.objects.select_for_update()
-                .filter(showtime=showtime, seat__in=seats)
+        placed = self._place_booking(request, customer, showtime, seats, seat_type_map, checkout["promo"])
+        if placed is None:
+            return Response({"error": "One or more seats are already booked"}, status=409)
+        return self._booking_response(*placed, checkout)
+
+    @action(detail=False, methods=["post"])
+    @idempotent
+    def best_available(self, request):
+        """
+        Book the best ``count`` adjacent seats the server can find.
+
+        Body: ``showtime``, ``count``, optional ``seat_class`` and
+        ``ticket_type``, plus the payment and promo fields of create. The
+        block is chosen from the committed tickets while the showtime row is
+        locked, so concurrent group buyers queue for a moment instead of
+        racing each other for the same seats and retrying on 409.
+
+        SQLite has no row locks and ignores FOR UPDATE: there the queueing
+        comes from the production profile's BEGIN IMMEDIATE
+        (settings.SQLITE_PRODUCTION_OPTIONS). Under the default deferred
+        transactions a chooser whose read lock cannot be upgraded fails with
+        "database is locked"; that is answered 409 with Retry-After.
+        """
+        showtime_id = query_int(request.data, "showtime")
+        if showtime_id is None:
+            return Response({"error": "showtime and count are required"}, status=400)
+        customer, _ = Customer.objects.get_or_create(user=request.user)
+        showtime = get_object_or_404(Showtime.objects.select_related("movie", "movie_room"), pk=showtime_id)
+        count, seat_class = best_available_options(request.data)
+        ticket_type = str(request.data.get("ticket_type") or Ticket.TicketType.ADULT).upper()
+        if ticket_type not in Ticket.TicketType.values:
+            return Response({"error": "Invalid ticket_type"}, status=400)
+
+        checkout = self._checkout_details(request)
+        if isinstance(checkout, Response):
+            return checkout
+
+        try:
+            with transaction.atomic():
+                # One chooser per showtime at a time; sold out is only decided under the lock
+                Showtime.objects.select_for_update().filter(pk=showtime.pk).exists()
+                block = seatmap.best_block(*seatmap.read_occupancy(showtime), count, seat_class)
+                if block is None:
+                    return Response({"error": f"No {count} adjacent seats are available"}, status=409)
+                seat_ids = [seat[0] for seat in block[1]]
+                seats = list(Seat.objects.filter(id__in=seat_ids).order_by("id"))
+                placed = self._place_booking(
+                    request, customer, showtime, seats, dict.fromkeys(seat_ids, ticket_type), checkout["promo"]
+                )
+        except OperationalError:
+            # Raised, not returned: the Idempotency-Key is released for the retry
+            raise ShowtimeBusy()
+        if placed is None:
+            return Response({"error": "One or more seats are already booked"}, status=409)
+        return self._booking_response(*placed, checkout)
+
+    def _checkout_details(self, request):
+        """Payment method and promotion for a booking, or an error Response."""
+        payment_method = request.data.get("payment_method")
+        payment_last4 = request.data.get("payment_last4")
+        payment_card_id = request.data.get("payment_card_id")
+        promo_code = str(request.data.get("promo_code") or "").strip()
+
+        # If client provides a saved card, trust it as the payment method
+        if payment_card_id:
+            try:
+                card = PaymentCard.objects.only("id", "card_last4").get(id=payment_card_id, user=request.user)
+                payment_method = payment_method or "saved-card"
+                payment_last4 = card.card_last4 or None
+            except PaymentCard.DoesNotExist:
+                return Response({"error": "Payment card not found"}, status=404)
+
+        if not payment_method:
+            return Response({"error": "payment_method is required"}, status=400)
+        # payment_last4 is optional, used only for display
+
+        # Optional promotion validation
+        promo = None
+        if promo_code:
+            try:
+                promo = Promotion.objects.get(promo_code__iexact=promo_code)
+            except Promotion.DoesNotExist:
+                return Response({"error": "Promo code not found"}, status=404)
+
+            if not promo.is_active():
+                return Response({"error": "Promo code is expired or inactive"}, status=400)
+
+        return {"payment_method": payment_method, "payment_last4": payment_last4, "promo": promo}
+
+    def _place_booking(self, request, customer, showtime, seats, seat_type_map, promo):
+        """
+        Price and insert the tickets for ``seats``.
+
+        Returns ``(booking, tickets, pricing)``, or None when any of the
+        seats is already booked for this showtime.
+        """
+        seat_ids = [seat.id for seat in seats]
+
+        # Price every ticket in one pass before taking any locks
+        base_price = Decimal(showtime.base_price)
+        tickets = []
+        for seat in seats:
+            ticket_type = seat_type_map[seat.id]
+            ticket_price = (base_price * TICKET_PRICE_MULTIPLIERS[ticket_type]).quantize(
+                Decimal("0.01"), rounding=ROUND_HALF_UP
+            )
+            tickets.append(
+                Ticket(showtime=showtime, seat=seat, price=ticket_price, ticket_type=ticket_type)
             )
-            if existing_tickets.exists():
-                return Response({"error": "One or more seats are already booked"}, status=409)
 
-            booking = Booking.objects.create(customer=customer, total_amount=0)
+        total_before_discount = sum((ticket.price for ticket in tickets), Decimal("0"))
+        total_price = total_before_discount
+        discount_amount = Decimal("0")
 
-            multipliers = {
-                Ticket.TicketType.ADULT: Decimal("1.0"),
-                Ticket.TicketType.STUDENT: Decimal("0.90"),
-                Ticket.TicketType.CHILD: Decimal("0.80"),
-                Ticket.TicketType.SENIOR: Decimal("0.85"),
-            }
+        if promo:
+            discount_amount = (
+                total_before_discount * Decimal(promo.discount_percent) / Decimal("100")
+            ).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            total_price = max(Decimal("0.00"), total_before_discount - discount_amount)
 
-            total_price = Decimal("0")
-            created_tickets = []
-
-            for seat in seats:
-                ticket_type = seat_type_map.get(seat.id, Ticket.TicketType.ADULT)
-                ticket_price = Decimal(showtime.base_price) * multipliers.get(ticket_type, Decimal("1.0"))
-                ticket = Ticket.objects.create(
-                    booking=booking,
-                    showtime=showtime,
-                    seat=seat,
-                    price=ticket_price,
-                    ticket_type=ticket_type
+        try:
+            with transaction.atomic():
+                # Lock existing tickets for these seats/showtime to avoid race conditions
+                already_booked = (
+                    Ticket.objects.select_for_update()
+                    .filter(showtime=showtime, seat_id__in=seat_ids)
+                    .exists()
                 )
-                total_price += ticket_price
-                created_tickets.append(ticket)
-
-            total_before_discount = total_price
-            discount_amount = Decimal("0")
-
-            if promo:
-                discount_amount = (
-                    total_before_discount * Decimal(promo.discount_percent) / Decimal("100")
-                ).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                total_price = max(Decimal("0.00"), total_before_discount - discount_amount)
-                booking.promo_code = promo.promo_code
-
-            booking.total_amount = total_price
-            booking.status = Booking.Status.CONFIRMED
-            booking.save()
-            try:
-                send_booking_confirmation_email(request.user, booking)
-            except Exception as e:
-                print("Failed to send booking confirmation:", e)
+                if already_booked:
+                    return None
+
+                booking = Booking.objects.create(
+                    customer=customer,
+                    status=Booking.Status.CONFIRMED,
+                    total_amount=total_price,
+                    promo_code=promo.promo_code if promo else "",
+                    show_starts_at=showtime.starts_at,
+                )
+                for ticket in tickets:
+                    ticket.booking = booking
+                Ticket.objects.bulk_create(tickets)
+                seatmap.record_seat_changes(showtime.id, seat_ids, reserved=True)
+
+                # Queued in the outbox as part of this transaction
+                send_booking_confirmation_email(request.user, booking, tickets=tickets)
+        except IntegrityError:
+            # A concurrent booking claimed one of the seats between the check and the insert
+            return None
 
         pricing = {
             "total_before_discount": str(total_before_discount),
@@ -649,12 +1133,16 @@ class BookingViewSet(viewsets.ModelViewSet):
         if promo:
             pricing["promo_code"] = promo.promo_code
             pricing["discount_percent"] = str(promo.discount_percent)
+        return booking, tickets, pricing
 
+    def _booking_response(self, booking, tickets, pricing, checkout):
+        # Serve the response from the in-memory rows instead of re-reading the tickets
+        ticket_data = TicketSerializer(tickets, many=True).data
         return Response(
             {
-                "booking": BookingSerializer(booking).data,
-                "tickets": TicketSerializer(created_tickets, many=True).data,
-                "payment": {"method": payment_method, "card_last4": payment_last4},
+                "booking": PlacedBookingSerializer(booking, context={"tickets": ticket_data}).data,
+                "tickets": ticket_data,
+                "payment": {"method": checkout["payment_method"], "card_last4": checkout["payment_last4"]},
                 "pricing": pricing,
             },
             status=201
@@ -662,7 +1150,14 @@ class BookingViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def my(self, request):
-        """Return bookings belonging to logged-in user."""
+        """
+        Return bookings belonging to logged-in user, newest first.
+
+        ?status= filters by booking status and ?upcoming=true keeps only
+        bookings whose showtime has not started. Tickets, seats, showtimes,
+        movies and rooms load in one prefetch, so the query count does not
+        depend on the length of the history.
+        """
         user = request.user
         customer = getattr(user, "customer_profile", None)
 
@@ -671,7 +1166,20 @@ class BookingViewSet(viewsets.ModelViewSet):
             customer, created = Customer.objects.get_or_create(user=user)
             if created:
                 # No bookings yet for a new customer
-                return Response([], status=200)
+                return Response({"next": None, "results": []}, status=200)
+
+        tickets = Ticket.objects.select_related(
+            "seat", "showtime__movie", "showtime__movie_room"
+        ).order_by("id")
+        bookings = Booking.objects.filter(customer=customer).prefetch_related(
+            Prefetch("tickets", queryset=tickets)
+        )
+
+        booking_status = request.query_params.get("status")
+        if booking_status:
+            bookings = bookings.filter(status=booking_status.upper())
+        if request.query_params.get("upcoming", "").lower() in ("true", "1", "yes"):
+            bookings = bookings.filter(show_starts_at__gte=timezone.now())
 
-        bookings = Booking.objects.filter(customer=customer).order_by("-created_at")
-        return Response(BookingSerializer(bookings, many=True).data, status=200)
+        page = self.paginate_queryset(bookings)
+        return self.get_paginated_response(BookingHistorySerializer(page, many=True).data)
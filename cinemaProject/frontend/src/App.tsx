@@ -13,7 +13,7 @@ import ProfilePage from "./pages/ProfilePage";
 import ResetPasswordPage from "./pages/ResetPasswordPage";
 import MyTicketsPage from "./pages/MyTicketsPage";
 import type { Movie } from "./types/Movie";
-import { fetchMovies } from "./data/api";
+import { fetchMovie, fetchMovies } from "./data/api";
 
 // Admin Pages
 import AdminPage from "./pages/admin/AdminPage";
@@ -26,75 +26,84 @@ import ManagePromotionsPage from "./pages/admin/ManagePromotionsPage";
 import ManageShowtimesPage from "./pages/admin/ManageShowtimesPage";
 
 
+// Normalize and cast a backend movie object into a Movie
+function normalizeMovie(m: unknown): Movie {
+  const movie = m as Record<string, unknown>;
+
+  return {
+    id: Number(movie.id ?? 0),
+    slug: String(movie.slug ?? movie.id ?? ""),
+    title: String(movie.title ?? ""),
+    genre: String(movie.genre ?? "Unknown"),
+    rating: String(movie.rating ?? "NR"),
+    description: String(movie.description ?? ""),
+    poster: String(
+      (movie.poster as string) ??
+        (movie.movie_poster_URL as string) ??
+        ""
+    ),
+    trailerId: String(
+      (movie.trailerId as string) ??
+        (movie.trailer_id as string) ??
+        ""
+    ),
+    showtimes: Array.isArray(movie.showtimes)
+      ? (movie.showtimes as any[]).map((s) => ({
+          id: Number((s as any).id ?? 0),
+          startsAt: String(
+            (s as any).startsAt ??
+              (s as any).starts_at ??
+              ""
+          ),
+          format: (s as any).format ?? undefined,
+          movieRoom:
+            (s as any).movieRoom ??
+            (s as any).movie_room ??
+            undefined,
+          movieRoomName:
+            (s as any).movieRoomName ??
+            (s as any).movie_room_name ??
+            null,
+          basePrice:
+            (s as any).basePrice ??
+            (s as any).base_price ??
+            undefined,
+        }))
+      : [],
+    category:
+      (movie.category as "currently-running" | "coming-soon") ??
+      "currently-running",
+    duration: movie.duration ? Number(movie.duration) : undefined,
+    releaseDate: movie.releaseDate
+      ? String(movie.releaseDate)
+      : movie.release_date
+      ? String(movie.release_date)
+      : undefined,
+  };
+}
+
+// Append movies that are not in the list yet
+function mergeMovies(current: Movie[], incoming: Movie[]): Movie[] {
+  const seen = new Set(current.map((m) => m.slug));
+  return [...current, ...incoming.filter((m) => !seen.has(m.slug))];
+}
+
 function AppContent() {
   const location = useLocation();
   const [movies, setMovies] = useState<Movie[]>([]);
   const [searchQuery, setSearchQuery] = useState("");
   const [selectedGenre, setSelectedGenre] = useState("");
+  const [nextMoviesUrl, setNextMoviesUrl] = useState<string | null>(null);
+  const [loadingMoreMovies, setLoadingMoreMovies] = useState(false);
 
-  // Fetch movies from backend on load
+  // Fetch the first page of movies from backend on load
   useEffect(() => {
     const loadMovies = async () => {
       try {
-        const data = await fetchMovies();
-
-        // Normalize and cast backend movie objects into Movie[]
-        const normalized: Movie[] = (data as unknown[]).map((m) => {
-          const movie = m as Record<string, unknown>;
-
-          return {
-            id: Number(movie.id ?? 0),
-            slug: String(movie.slug ?? movie.id ?? ""),
-            title: String(movie.title ?? ""),
-            genre: String(movie.genre ?? "Unknown"),
-            rating: String(movie.rating ?? "NR"),
-            description: String(movie.description ?? ""),
-            poster: String(
-              (movie.poster as string) ??
-                (movie.movie_poster_URL as string) ??
-                ""
-            ),
-            trailerId: String(
-              (movie.trailerId as string) ??
-                (movie.trailer_id as string) ??
-                ""
-            ),
-            showtimes: Array.isArray(movie.showtimes)
-              ? (movie.showtimes as any[]).map((s) => ({
-                  id: Number((s as any).id ?? 0),
-                  startsAt: String(
-                    (s as any).startsAt ??
-                      (s as any).starts_at ??
-                      ""
-                  ),
-                  format: (s as any).format ?? undefined,
-                  movieRoom:
-                    (s as any).movieRoom ??
-                    (s as any).movie_room ??
-                    undefined,
-                  movieRoomName:
-                    (s as any).movieRoomName ??
-                    (s as any).movie_room_name ??
-                    null,
-                  basePrice:
-                    (s as any).basePrice ??
-                    (s as any).base_price ??
-                    undefined,
-                }))
-              : [],
-            category:
-              (movie.category as "currently-running" | "coming-soon") ??
-              "currently-running",
-            duration: movie.duration ? Number(movie.duration) : undefined,
-            releaseDate: movie.releaseDate
-              ? String(movie.releaseDate)
-              : movie.release_date
-              ? String(movie.release_date)
-              : undefined,
-          };
-        });
-
-        setMovies(normalized);
+        const page = await fetchMovies();
+        // Keep a deep-linked movie that arrived before the first page
+        setMovies((prev) => mergeMovies(page.movies.map(normalizeMovie), prev));
+        setNextMoviesUrl(page.next);
       } catch (err) {
         console.error("Error fetching movies:", err);
       }
@@ -103,6 +112,30 @@ function AppContent() {
     loadMovies();
   }, []);
 
+  const loadMoreMovies = async () => {
+    if (!nextMoviesUrl || loadingMoreMovies) return;
+    setLoadingMoreMovies(true);
+    try {
+      const page = await fetchMovies(nextMoviesUrl);
+      setMovies((prev) => mergeMovies(prev, page.movies.map(normalizeMovie)));
+      setNextMoviesUrl(page.next);
+    } catch (err) {
+      console.error("Error fetching movies:", err);
+    } finally {
+      setLoadingMoreMovies(false);
+    }
+  };
+
+  // Deep links to a movie that is not on the pages loaded so far
+  const linkedSlug = location.pathname.match(/^\/(?:movie|booking)\/([^/]+)/)?.[1];
+  useEffect(() => {
+    if (!linkedSlug || movies.some((m) => m.slug === linkedSlug)) return;
+    fetchMovie(linkedSlug)
+      .then((movie) => setMovies((prev) => mergeMovies(prev, [normalizeMovie(movie)])))
+      .catch((err) => console.error("Error fetching movie:", err));
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [linkedSlug]);
+
   // Filter movies by search and genre
   const filteredMovies = useMemo(() => {
     return movies.filter((movie) => {
@@ -132,7 +165,17 @@ function AppContent() {
 
       <Routes>
         {/* Public Routes */}
-        <Route path="/" element={<HomePage movies={filteredMovies} />} />
+        <Route
+          path="/"
+          element={
+            <HomePage
+              movies={filteredMovies}
+              hasMore={nextMoviesUrl !== null}
+              loadingMore={loadingMoreMovies}
+              onLoadMore={loadMoreMovies}
+            />
+          }
+        />
         <Route path="/movie/:slug" element={<MovieDetailsPage movies={movies} />} />
         <Route path="/booking/:slug" element={<BookingPage movies={movies} />} />
         <Route path="/my-tickets" element={<MyTicketsPage />} />
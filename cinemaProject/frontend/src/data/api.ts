@@ -8,38 +8,40 @@ function getCookie(name: string): string | null {
   return match ? decodeURIComponent(match[2]) : null;
 }
 
-export async function fetchMovies(): Promise<Movie[]> {
-  const res = await fetch(`${API_URL}/movies/`);
-  if (!res.ok) throw new Error(`Failed to fetch movies: ${res.statusText}`);
-  const data = await res.json();
+// List endpoints use keyset pagination: { next: string | null, results: [...] }
+export interface Page<T> {
+  next: string | null;
+  results: T[];
+}
 
-  // 🔑 Convert snake_case → camelCase
-  return data.map((m: any) => ({
-    ...m,
-    poster: m.movie_poster_URL || m.poster || "",
-    trailerUrl: m.trailer_url || m.trailerUrl || "",
-    duration: m.duration || 0,
-    releaseDate: m.release_date || null,
-    category: m.category || "currently-running",
-    slug: m.slug,
-    showtimes: Array.isArray(m.showtimes)
-      ? m.showtimes.map((s: any) => ({
-          id: Number(s.id),
-          startsAt: String(s.starts_at),
-          format: s.format,
-          basePrice: s.base_price ? Number(s.base_price) : undefined,
-          movieRoom: s.movie_room ? Number(s.movie_room) : undefined,
-          movieRoomName: s.movie_room_name ?? null,
-        }))
-      : [],
-  }));
+async function fetchPage<T>(url: string, init?: RequestInit): Promise<Page<T>> {
+  const res = await fetch(url, init);
+  if (!res.ok) {
+    let message = res.statusText;
+    try {
+      const error = await res.json();
+      message =
+        error.error ||
+        error.detail ||
+        error.message ||
+        JSON.stringify(error);
+    } catch {
+      const text = await res.text().catch(() => "");
+      if (text) message = text;
+    }
+    throw new Error(message);
+  }
+  return res.json();
 }
 
-export async function fetchMovie(slug: string): Promise<Movie> {
-  const res = await fetch(`${API_URL}/movies/${slug}/`);
-  if (!res.ok) throw new Error("Movie not found");
-  const m = await res.json();
+// One page of movies; pass the previous page's `next` URL to load more
+export interface MoviePage {
+  movies: Movie[];
+  next: string | null;
+}
 
+// 🔑 Convert snake_case → camelCase
+function toMovie(m: any): Movie {
   return {
     ...m,
     poster: m.movie_poster_URL || m.poster || "",
@@ -61,6 +63,24 @@ export async function fetchMovie(slug: string): Promise<Movie> {
   };
 }
 
+export async function fetchMovies(
+  url: string = `${API_URL}/movies/?page_size=24`
+): Promise<MoviePage> {
+  let page: Page<any>;
+  try {
+    page = await fetchPage<any>(url);
+  } catch (err: any) {
+    throw new Error(`Failed to fetch movies: ${err.message}`);
+  }
+  return { movies: page.results.map(toMovie), next: page.next };
+}
+
+export async function fetchMovie(slug: string): Promise<Movie> {
+  const res = await fetch(`${API_URL}/movies/${slug}/`);
+  if (!res.ok) throw new Error("Movie not found");
+  return toMovie(await res.json());
+}
+
 export async function fetchShowtimeSeats(id: number) {
   const res = await fetch(`${API_URL}/showtimes/${id}/seats/`, {
     credentials: "include",
@@ -112,24 +132,11 @@ export async function createBooking(
   return res.json();
 }
 
-export async function fetchMyBookings() {
-  const res = await fetch(`${API_URL}/bookings/my/`, { credentials: "include" });
-  if (!res.ok) {
-    let message = "Failed to load bookings";
-    try {
-      const error = await res.json();
-      message =
-        error.error ||
-        error.detail ||
-        error.message ||
-        JSON.stringify(error);
-    } catch {
-      const text = await res.text().catch(() => "");
-      if (text) message = text;
-    }
-    throw new Error(message);
-  }
-  return res.json();
+// Newest bookings first; pass the previous page's `next` URL to load older ones
+export async function fetchMyBookings(
+  url: string = `${API_URL}/bookings/my/?page_size=20`
+): Promise<Page<any>> {
+  return fetchPage<any>(url, { credentials: "include" });
 }
 
 export async function validatePromoCode(code: string) {
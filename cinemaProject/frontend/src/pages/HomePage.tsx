@@ -4,9 +4,12 @@ import type { Movie } from "../types/Movie";
 
 interface HomePageProps {
   movies: Movie[];
+  hasMore?: boolean;
+  loadingMore?: boolean;
+  onLoadMore?: () => void;
 }
 
-const HomePage = ({ movies }: HomePageProps) => {
+const HomePage = ({ movies, hasMore, loadingMore, onLoadMore }: HomePageProps) => {
   const currentlyRunning = movies.filter((m) => m.category === "currently-running");
   const comingSoon = movies.filter((m) => m.category === "coming-soon");
 
@@ -108,6 +111,17 @@ const HomePage = ({ movies }: HomePageProps) => {
           )}
         </div>
       </section>
+
+      {/* Movies are fetched a page at a time */}
+      {hasMore && onLoadMore && (
+        <button
+          onClick={onLoadMore}
+          disabled={loadingMore}
+          className="px-6 py-2 rounded-lg bg-blue-600 text-white font-medium hover:bg-blue-700 disabled:opacity-60"
+        >
+          {loadingMore ? "Loading..." : "Load more movies"}
+        </button>
+      )}
     </div>
   );
 };
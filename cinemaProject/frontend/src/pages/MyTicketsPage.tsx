@@ -36,6 +36,8 @@ interface Booking {
 
 const MyTicketsPage = () => {
   const [bookings, setBookings] = useState<Booking[]>([]);
+  const [nextUrl, setNextUrl] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [retryCount, setRetryCount] = useState(0);
@@ -46,8 +48,9 @@ const MyTicketsPage = () => {
     const load = async () => {
       try {
         setError(null);
-        const data = await fetchMyBookings();
-        setBookings(data);
+        const page = await fetchMyBookings();
+        setBookings(page.results);
+        setNextUrl(page.next);
       } catch (err: any) {
         console.error("Failed to load bookings:", err);
         // Parse different error types
@@ -70,6 +73,20 @@ const MyTicketsPage = () => {
     load();
   }, [retryCount]);
 
+  const handleLoadMore = async () => {
+    if (!nextUrl) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchMyBookings(nextUrl);
+      setBookings((prev) => [...prev, ...page.results]);
+      setNextUrl(page.next);
+    } catch (err: any) {
+      setFlash({ type: "error", text: err?.message || "Could not load more bookings." });
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleRetry = () => {
     setLoading(true);
     setRetryCount((prev) => prev + 1);
@@ -416,6 +433,19 @@ const MyTicketsPage = () => {
                 </div>
               </div>
             )}
+
+            {/* Older bookings are fetched a page at a time */}
+            {nextUrl && (
+              <div className="text-center">
+                <button
+                  onClick={handleLoadMore}
+                  disabled={loadingMore}
+                  className="px-6 py-2 rounded-lg bg-blue-600 text-white font-medium hover:bg-blue-700 disabled:opacity-60"
+                >
+                  {loadingMore ? "Loading..." : "Load older bookings"}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -112,6 +112,10 @@ python3 manage.py migrate --noinput
 python3 manage.py runserver &
 BACKEND_PID=$!
 
+# Email outbox worker
+python3 manage.py send_queued_emails --loop &
+WORKER_PID=$!
+
 # Optional seed script
 python3 seed.py &
 
@@ -122,6 +126,6 @@ npm run dev &
 FRONTEND_PID=$!
 
 # Graceful shutdown
-trap "echo 'Stopping servers...'; kill $BACKEND_PID $FRONTEND_PID" EXIT
+trap "echo 'Stopping servers...'; kill $BACKEND_PID $WORKER_PID $FRONTEND_PID" EXIT
 
 wait